@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""
+Compares writing and reading a large cache file with the indented and the compact encodings.
+Run from the repository root: PYTHONPATH=. python benchmarks/cache_encoding.py [number of files]
+"""
+
+from pathlib import Path
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+from unittest import mock
+
+from eplaunch.utilities import cache
+from eplaunch.utilities.cache import CacheFile
+
+
+def build_state(num_files: int) -> dict:
+    files = {
+        f"RefBldg_{i:05d}.idf": {
+            CacheFile.ParametersKey: {CacheFile.WeatherFileKey: f"/weather/USA_Location_{i % 50}.epw"},
+            CacheFile.ResultsKey: {
+                'Errors': i % 3, 'Warnings': i % 17, 'Runtime [s]': i / 100.0, 'Version': '23.2.0',
+                'Site Energy [GJ]': i * 1.2345, 'Unmet Hours': i % 40,
+            },
+        } for i in range(num_files)
+    }
+    return {CacheFile.RootKey: {'EnergyPlus-23.2.0 SI': {CacheFile.FilesKey: files}}}
+
+
+def time_round_trip(state: dict, compact: bool, repeats: int = 5):
+    directory = Path(mkdtemp())
+    write_time = read_time = 0.0
+    with mock.patch.object(CacheFile, 'CompactEncoding', compact):
+        for _ in range(repeats):
+            c = CacheFile(directory)
+            c.workflow_state = state
+            start = perf_counter()
+            c.write()
+            write_time += perf_counter() - start
+            start = perf_counter()
+            CacheFile(directory).read(use_parsed_cache=False)
+            read_time += perf_counter() - start
+    size = (directory / CacheFile.FileName).stat().st_size
+    return size, write_time / repeats, read_time / repeats
+
+
+def main():
+    num_files = int(argv[1]) if len(argv) > 1 else 10000
+    state = build_state(num_files)
+    print(f"Cache with {num_files} files")
+    variants = [
+        ('indented, stdlib', False, {'loads': cache.json.loads}),
+        ('compact, stdlib', True, {'orjson': None, 'ujson': None, 'loads': cache.json.loads}),
+    ]
+    if cache.ujson is not None:
+        variants.append(('compact, ujson', True, {'orjson': None, 'loads': cache.ujson.loads}))
+    if cache.orjson is not None:
+        variants.append(('compact, orjson', True, {'loads': cache.orjson.loads}))
+    baseline = None
+    for label, compact, patches in variants:
+        with mock.patch.multiple(cache, **patches):
+            size, write_time, read_time = time_round_trip(state, compact)
+        total = write_time + read_time
+        baseline = baseline or total
+        print(
+            f"{label:>16}: {size / 1e6:6.2f} MB, write {write_time * 1000:7.1f} ms, "
+            f"read {read_time * 1000:7.1f} ms, speedup {baseline / total:4.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""
+Compares the scandir based file listing with the previous Path.glob based one on a large directory.
+Run from the repository root: PYTHONPATH=. python benchmarks/directory_listing.py [number of files] [directory]
+If a directory is given, such as one on a network share, the files are created there instead of in a temp directory.
+"""
+
+from datetime import datetime
+from fnmatch import fnmatch
+from mimetypes import guess_type
+from pathlib import Path
+from shutil import rmtree
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+
+from eplaunch.utilities.directory_listing import list_workflow_files
+
+FILE_TYPES = ['*.idf', '*.imf', '*.epJSON']
+
+
+def glob_listing(directory: Path, workflow_file_patterns):
+    """The file listing as it was done in EPLaunchWindow._get_files_in_current_directory"""
+    file_list = []
+    for iter_path in directory.glob('*'):
+        if iter_path.is_file() and not iter_path.name.startswith('.'):
+            base_name = iter_path.name
+            for file_type in workflow_file_patterns:
+                if fnmatch(base_name, file_type):
+                    break
+            else:
+                continue
+            file_size = iter_path.stat().st_size
+            file_modified_time = iter_path.lstat().st_mtime
+            modified_time_string = str(datetime.fromtimestamp(file_modified_time).replace(microsecond=0))
+            file_size_string = '{0:12,.0f} KB'.format(file_size / 1024)
+            guessed_type = guess_type(base_name)[0]
+            file_type_string = "(unknown)" if guessed_type is None else guessed_type
+            file_list.append((base_name, file_type_string, file_size_string, modified_time_string))
+    file_list.sort(key=lambda x: x[0])
+    return file_list
+
+
+def best_time(function, repeats: int = 5):
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main():
+    num_files = int(argv[1]) if len(argv) > 1 else 20000
+    directory = Path(mkdtemp(dir=argv[2] if len(argv) > 2 else None))
+    try:
+        # a typical results folder: inputs plus the outputs of each run
+        extensions = ['.idf', '.err', '.csv', '.htm', '.eso', '.sql', '.end', '.audit', '.bnd', '.eio']
+        for i in range(num_files):
+            (directory / f"model_{i // len(extensions):05d}{extensions[i % len(extensions)]}").write_text('x')
+        assert glob_listing(directory, FILE_TYPES) == list_workflow_files(directory, FILE_TYPES)
+        old_time = best_time(lambda: glob_listing(directory, FILE_TYPES))
+        new_time = best_time(lambda: list_workflow_files(directory, FILE_TYPES))
+        print(f"Directory with {num_files} files in {directory}")
+        print(f" Path.glob listing: {old_time * 1000:8.1f} ms")
+        print(f"os.scandir listing: {new_time * 1000:8.1f} ms, speedup {old_time / new_time:4.1f}x")
+    finally:
+        rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""
+Compares counting the objects of a large IDF file the way the IDF Details workflow used to, reading the whole file,
+stripping comments into a list of lines, joining them and splitting on ';', with a streaming IDFObjectIndex pass,
+in both time and peak memory (as traced by tracemalloc, which slows both down, so times are measured without it).
+Run from the repository root: PYTHONPATH=. python benchmarks/idf_tokenizer.py [number of zones]
+"""
+
+from pathlib import Path
+from shutil import rmtree
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+import tracemalloc
+
+from eplaunch.utilities.idf_tokenizer import IDFObjectIndex
+
+
+def count_zones_by_splitting(file_path: Path) -> int:
+    content = open(file_path).read()
+    new_lines = []
+    for line in content.split('\n'):
+        if line.strip() == '':
+            continue
+        if '!' not in line:
+            new_lines.append(line.strip())
+        else:
+            line_without_comment = line[0:line.index('!')].strip()
+            if line_without_comment != '':
+                new_lines.append(line_without_comment)
+    one_long_line = ''.join(new_lines)
+    return len([obj for obj in one_long_line.split(';') if obj.upper().startswith('ZONE,')])
+
+
+def count_zones_by_index(file_path: Path) -> int:
+    return IDFObjectIndex(file_path).count('Zone')
+
+
+def measure(function, file_path: Path):
+    start = perf_counter()
+    result = function(file_path)
+    elapsed = perf_counter() - start
+    tracemalloc.start()
+    function(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    num_zones = int(argv[1]) if len(argv) > 1 else 20000
+    directory = Path(mkdtemp())
+    try:
+        file_path = directory / 'large.idf'
+        with open(file_path, 'w') as f:
+            f.write('Version,9.6;\n')
+            for i in range(num_zones):
+                f.write(f"Zone,\n  Zone {i},  !- Name\n  0,  !- Direction of Relative North\n  0, 0, 0;  !- Origin\n")
+                f.write(f"People,\n  People {i},  !- Name\n  Zone {i},  !- Zone Name\n  Schedule,  !- Schedule\n")
+                f.write("  People, 10, , , 0.3, AUTOCALCULATE;  !- Number of People\n\n")
+        size_mb = file_path.stat().st_size / 1e6
+        split_count, split_time, split_peak = measure(count_zones_by_splitting, file_path)
+        index_count, index_time, index_peak = measure(count_zones_by_index, file_path)
+        assert split_count == index_count == num_zones
+        print(f"IDF file of {size_mb:.1f} MB with {num_zones} zones")
+        print(f"   join and split: {split_time * 1000:8.1f} ms, peak memory {split_peak / 1e6:6.1f} MB")
+        print(f"   IDFObjectIndex: {index_time * 1000:8.1f} ms, peak memory {index_peak / 1e6:6.1f} MB")
+    finally:
+        rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+"""
+Compares computing the stale states of every input file in a directory one file at a time, as the file list scan used
+to, with a single OutputIndex pass, both the first time and again once the index is warm.
+Run from the repository root: PYTHONPATH=. python benchmarks/stale_states.py [number of input files] [directory]
+If a directory is given, such as one on a network share, the files are created there instead of in a temp directory.
+"""
+
+from pathlib import Path
+from shutil import rmtree
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import List, Optional
+
+from eplaunch.utilities.output_index import OutputIndex
+
+OUTPUT_SUFFIXES = ['.csv', '.htm', '.err', '.eso', '.sql']
+
+
+def is_file_stale(directory: Path, input_file_name: str, output_suffixes: List[str]) -> Optional[bool]:
+    """
+    Returns a tri-state value trying to characterize whether an input file is "stale", one file at a time, the way the
+    file list scan did before OutputIndex.
+    It tries to determine this based on the output suffixes of the workflow.
+    If the workflow does not include any output suffixes, "stale" cannot be determined.
+    If '.err' is in the output suffixes, this is the only suffix checked.
+
+    :param directory: The directory holding the input file
+    :param input_file_name: The name of the input file
+    :param output_suffixes: The output suffixes of the workflow
+    :returns: None if stale cannot be determined, True if it is stale, and False if not.
+    """
+    if len(output_suffixes) == 0:
+        return None  # can't support stale without output suffixes
+    full_file_path = directory / input_file_name
+    if full_file_path.exists():
+        input_file_date = full_file_path.lstat().st_mtime
+        suffixes = output_suffixes
+        if '.err' in suffixes:  # for energyplus workflows just use the err file
+            suffixes = ['.err']
+        file_name_no_ext = full_file_path.with_suffix('').name
+        for suffix in suffixes:
+            output_sub_dir = f"EPLaunchRun_{file_name_no_ext}"
+            output_file_name = file_name_no_ext + suffix
+            tentative_output_file_path = directory / output_sub_dir / output_file_name
+            if tentative_output_file_path.exists():
+                output_file_date = tentative_output_file_path.lstat().st_mtime
+                if output_file_date < input_file_date:
+                    return True
+    return False
+
+
+def best_time(function, repeats: int = 5):
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main():
+    num_files = int(argv[1]) if len(argv) > 1 else 5000
+    directory = Path(mkdtemp(dir=argv[2] if len(argv) > 2 else None))
+    try:
+        input_files = []
+        for i in range(num_files):
+            input_files.append(f"model_{i:05d}.idf")
+            (directory / input_files[-1]).write_text('x')
+            if i % 4:  # most inputs have been run
+                output_folder = directory / f"EPLaunchRun_model_{i:05d}"
+                output_folder.mkdir()
+                for suffix in ['.csv', '.htm', '.err', '.eso', '.sql', '.end', '.audit', '.bnd', '.eio']:
+                    (output_folder / f"model_{i:05d}{suffix}").write_text('x')
+        per_file = {f: is_file_stale(directory, f, OUTPUT_SUFFIXES) for f in input_files}
+        assert per_file == OutputIndex(directory).stale_states(input_files, OUTPUT_SUFFIXES)
+        per_file_time = best_time(lambda: [is_file_stale(directory, f, OUTPUT_SUFFIXES) for f in input_files])
+        cold_time = best_time(lambda: OutputIndex(directory).stale_states(input_files, OUTPUT_SUFFIXES))
+        warm_index = OutputIndex(directory)
+        warm_index.stale_states(input_files, OUTPUT_SUFFIXES)
+        warm_time = best_time(lambda: warm_index.stale_states(input_files, OUTPUT_SUFFIXES))
+        print(f"Directory with {num_files} input files in {directory}")
+        print(f"      is_file_stale per file: {per_file_time * 1000:8.1f} ms")
+        print(f"  OutputIndex, first pass: {cold_time * 1000:8.1f} ms, speedup {per_file_time / cold_time:5.1f}x")
+        print(f"OutputIndex, unchanged folders: {warm_time * 1000:8.1f} ms, speedup {per_file_time / warm_time:5.1f}x")
+    finally:
+        rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
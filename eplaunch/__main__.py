@@ -1,4 +1,5 @@
 from eplaunch.tk_runner import main_gui
 
 
-main_gui()
+if __name__ == "__main__":  # guarded so worker processes that re-import the main module don't launch the GUI
+    main_gui()
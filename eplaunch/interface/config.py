@@ -5,6 +5,8 @@ from pathlib import Path
 from re import search
 from typing import Any, Dict, List, Optional
 
+from eplaunch.utilities.cache import CacheBackendType
+
 
 class ConfigManager:
     config_file_name = '.EP-Launch.json'
@@ -33,6 +35,9 @@ class ConfigManager:
         self.viewer_overrides: Dict[str, Path] = {}
         self.dir_file_paned_window_sash_position: int = 400
         self.list_group_paned_window_sash_position: int = 500
+        self.max_concurrent_workflows: int = 0  # zero means use the number of available cores
+        self.cache_backend: str = CacheBackendType.Json
+        self.cache_compact_encoding: bool = False
 
     def load(self, called_from_ep_cli: bool):
         # load the config from the file on disk
@@ -137,6 +142,11 @@ class ConfigManager:
                     self.list_group_paned_window_sash_position = config.get(
                         'ListGroupPanedWindowSash', self.list_group_paned_window_sash_position
                     )
+                    self.max_concurrent_workflows = config.get(
+                        'MaxConcurrentWorkflows', self.max_concurrent_workflows
+                    )
+                    self.cache_backend = config.get('CacheBackend', self.cache_backend)
+                    self.cache_compact_encoding = config.get('CacheCompactEncoding', self.cache_compact_encoding)
                 else:
                     pass  # Bad config saved file format?  Indicates a crash?
                 # fix up the current selected directory to initialize in case it doesn't exist (anymore)
@@ -170,6 +180,9 @@ class ConfigManager:
             'ViewerOverrides': {k: None if v is None else str(v) for k, v in self.viewer_overrides.items()},
             'DirFilePanedWindowSash': self.dir_file_paned_window_sash_position,
             'ListGroupPanedWindowSash': self.list_group_paned_window_sash_position,
+            'MaxConcurrentWorkflows': self.max_concurrent_workflows,
+            'CacheBackend': self.cache_backend,
+            'CacheCompactEncoding': self.cache_compact_encoding,
         }
         config_file_path = Path.home() / ConfigManager.config_file_name
         config_file_path.write_text(dumps(output_dict, indent=2))
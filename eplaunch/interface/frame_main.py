@@ -1,8 +1,4 @@
-from datetime import datetime
-from fnmatch import fnmatch
-
 from json import dumps
-from mimetypes import guess_type
 from os import getenv
 from pathlib import Path
 from platform import system
@@ -18,14 +14,13 @@ if system() == 'Darwin':
     from tkmacosx import Button
 else:
     from tkinter.ttk import Button
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 from webbrowser import open as open_web
 from plan_tools.runtime import fixup_taskbar_icon_on_windows
 
 from eplaunch import VERSION, DOCS_URL, NAME
 from eplaunch.interface.dialog_generic import TkGenericDialog
-from eplaunch.utilities.exceptions import EPLaunchFileException
 from eplaunch.interface.config import ConfigManager
 from eplaunch.interface.widget_dir_list import DirListScrollableFrame
 from eplaunch.interface.widget_file_list import FileListScrollableFrame
@@ -34,8 +29,14 @@ from eplaunch.interface.dialog_external_viewers import TkViewerDialog
 from eplaunch.interface.dialog_weather import TkWeatherDialog
 from eplaunch.interface.dialog_workflow_dirs import TkWorkflowsDialog
 from eplaunch.interface.dialog_output import TkOutputDialog
-from eplaunch.workflows.workflow_thread import WorkflowThread
-from eplaunch.utilities.cache import CacheFile
+from eplaunch.workflows.workflow_process import shutdown_pool
+from eplaunch.workflows.workflow_thread import WorkflowThread, WorkflowThreadStatus
+from eplaunch.utilities.cache import CacheFile, set_cache_backend
+from eplaunch.utilities.cache_writer import CoalescingCacheWriter
+from eplaunch.utilities.exceptions import EPLaunchFileException
+from eplaunch.utilities.directory_scan import DirectoryScanThread, build_file_rows
+from eplaunch.utilities.directory_watcher import DirectoryWatcher, FileChange, OutputFolderPrefix, watch_directory
+from eplaunch.utilities.output_index import OutputIndex, output_folder_name
 from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
 from eplaunch.workflows.manager import WorkflowManager
 from eplaunch.workflows.workflow import Workflow
@@ -85,12 +86,23 @@ class EPLaunchWindow(Tk):
         # create a config manager and load up the saved, or default, configuration
         self.conf = ConfigManager()
         self.conf.load(called_from_ep_cli)
+        # where and how every CacheFile below stores its data
+        set_cache_backend(self.conf.cache_backend)
+        CacheFile.CompactEncoding = self.conf.cache_compact_encoding
 
         # initialize some dir/file selection variables
         self.previous_selected_directory: Optional[Path] = None
+        self._directory_scan: Optional[DirectoryScanThread] = None
+        self._directory_scan_generation = 0
+        self._directory_scan_file_names: Set[str] = set()
+        self._directory_scan_selection: List[str] = []
+        self._file_list_directory: Optional[Path] = None  # the directory whose files are in the file list
+        self._directory_watcher: Optional[DirectoryWatcher] = None  # keeps the file list up to date between scans
+        self._output_index: Optional[OutputIndex] = None  # what is known about the output folders of the directory
 
         # create a workflow manager, it will initialize workflows in predetermined locations
         self.workflow_manager = WorkflowManager()
+        self.workflow_manager.scheduler.set_max_concurrent(self.conf.max_concurrent_workflows)
 
         # but now, if the saved configuration exists, use that as the list of directories to use moving forward
         if self.conf.workflow_directories:
@@ -107,6 +119,13 @@ class EPLaunchWindow(Tk):
         self._gui_queue = Queue()
         self._check_queue()
 
+        # the EnergyPlus installs came from the last search, so search again in the background if that was a while ago
+        self._using_auto_found_workflow_directories = not self.conf.workflow_directories
+        self.workflow_manager.auto_find_workflow_directories_in_background(self._callback_workflow_directories_found)
+
+        # workflow results are written to the cache files in the background, many at a time
+        self.cache_writer = CoalescingCacheWriter(on_flushed=self._callback_cache_flushed)
+
         # set up some tk tracking variables and then build the GUI itself
         self._define_tk_variables()
         self._build_gui()
@@ -424,6 +443,8 @@ class EPLaunchWindow(Tk):
         if len(self.workflow_manager.threads) > 0:
             msg = 'Program closing, but there are threads running; would you like to kill the threads and close?'
             if messagebox.askyesno(msg):
+                # drop anything still waiting in the queue first so that aborting threads doesn't start new ones
+                self.workflow_manager.scheduler.cancel_pending()
                 for thread_id in self.workflow_manager.threads:
                     try:
                         self.workflow_manager.threads[thread_id].abort()
@@ -444,6 +465,14 @@ class EPLaunchWindow(Tk):
         self.conf.dir_file_paned_window_sash_position = self.dir_files_pw.sashpos(0)
         self.conf.list_group_paned_window_sash_position = self.list_group_pw.sashpos(0)
         self.conf.save()
+        if self._directory_scan is not None:
+            self._directory_scan.cancel()
+        if self._directory_watcher is not None:
+            self._directory_watcher.stop()
+        # write out any workflow results that are still buffered
+        self.cache_writer.close()
+        # the aborted process mode runs had their workers terminated, so this doesn't wait on anything
+        shutdown_pool()
         self.destroy()
 
     def _update_status_bar(self, message: str) -> None:
@@ -490,6 +519,7 @@ class EPLaunchWindow(Tk):
         # the stale attribute, which should be accomplished with just the call here.
         # It's possible we also need to check the _event.widget to make sure we are only
         # calling this when the main window is focused.
+        # The stale attribute is now kept up to date by the directory watcher, see _handler_directory_changes.
         pass  # self._update_file_list()
 
     @staticmethod
@@ -503,6 +533,7 @@ class EPLaunchWindow(Tk):
             ("Control + g ", "Run Workflow on Current Group"),
             ("Control + m ", "Cycle Through Group Files"),
             ("Control + z ", "Navigate to Previous Folder"),
+            ("Control + a ", "Select All Files in the File List"),
         ]
 
     # endregion
@@ -618,8 +649,7 @@ class EPLaunchWindow(Tk):
             return
         self.conf.directory = entry.parent
         self.dir_tree.dir_list.try_to_select_directory(self.conf.directory)
-        self._update_file_list()
-        self.file_list.tree.try_to_reselect([entry.name])
+        self._update_file_list(files_to_select=[entry.name])
 
     # endregion
 
@@ -681,34 +711,6 @@ class EPLaunchWindow(Tk):
         self.dir_tree.dir_list.try_to_select_directory(self.conf.directory)
         self._update_file_list()
 
-    def _get_files_in_current_directory(self, workflow_file_patterns: List[str]) -> List[Tuple[str, str, str, str]]:
-        """
-        Returns a list of file information for each file in the currently selected directory
-        :param workflow_file_patterns: List of file patterns that this workflow supports, for filtering
-        :return: A list of tuples which each contain (file name, file type, file size, modified time) for each file
-        """
-        file_list = []
-        # loop over all non-hidden files to retrieve data for each
-        for iter_path in self.conf.directory.glob('*'):
-            if iter_path.is_file() and not iter_path.name.startswith('.'):
-                base_name = iter_path.name
-                # check to see if this file type matches any of the workflow patterns
-                for file_type in workflow_file_patterns:
-                    if fnmatch(base_name, file_type):
-                        break  # breaks out of for loop, allowing processing to continue 3 lines down
-                else:  # if we never broke, we will hit this else block
-                    continue  # in which case, we want to skip this file, so continue the outer for loop
-                file_size = iter_path.stat().st_size
-                file_modified_time = iter_path.lstat().st_mtime
-                modified_time_string = str(datetime.fromtimestamp(file_modified_time).replace(microsecond=0))
-                file_size_string = '{0:12,.0f} KB'.format(file_size / 1024)  # size
-                guessed_type = guess_type(base_name)[0]
-                file_type_string = "(unknown)" if guessed_type is None else guessed_type
-                file_list.append((base_name, file_type_string, file_size_string, modified_time_string))
-        # sort the list and return it
-        file_list.sort(key=lambda x: x[0])
-        return file_list
-
     def _new_dir_selected(self, selected_path: Path):
         self.previous_selected_directory = self.conf.directory
         self.conf.directory = selected_path
@@ -723,8 +725,14 @@ class EPLaunchWindow(Tk):
         except Exception as e:  # noqa -- status_bar and things may not exist during initialization, just ignore
             print(str(e))  # log it to the console for fun
 
-    def _update_file_list(self):
-        """Update the file listing widget by querying the directory and cache contents, try to reselect current files"""
+    def _update_file_list(self, files_to_select: Optional[List[str]] = None):
+        """
+        Update the file listing widget by querying the directory and cache contents, try to reselect current files.
+        The directory is scanned on a background thread, which posts rows back in batches, so the list fills in
+        progressively; any scan still in progress from an earlier call is cancelled.
+
+        :param files_to_select: Files to select once the list is filled, instead of the currently selected files
+        """
         # If selected directory hasn't been set up yet then just carry on, this is only happening during app init
         if self._init or not self.conf.directory:
             return
@@ -735,94 +743,101 @@ class EPLaunchWindow(Tk):
             return
 
         # If we are staying in the same directory, try to select the files that were previously selected
-        if self.previous_selected_directory == self.conf.directory:
-            previous_selected_files = self.conf.file_selection
+        if files_to_select is not None:
+            self._directory_scan_selection = files_to_select
+        elif self.previous_selected_directory == self.conf.directory:
+            self._directory_scan_selection = self.conf.file_selection
         else:
-            previous_selected_files = []
+            self._directory_scan_selection = []
+
+        # when refreshing the same directory, rows are updated in place as the scan goes, and only the rows of files
+        # that are gone are removed at the end; a different directory starts from an empty list
+        if self._directory_scan is not None:
+            self._directory_scan.cancel()
+        if self._file_list_directory != self.conf.directory:
+            self.file_list.tree.set_files([])
+            self._file_list_directory = self.conf.directory
+            if self._directory_watcher is not None:
+                self._directory_watcher.stop()
+            self._directory_watcher = watch_directory(self.conf.directory, self._callback_directory_changes)
+        self._directory_scan_generation += 1
+        self._directory_scan_file_names = set()
+        self._directory_scan = DirectoryScanThread(
+            self._directory_scan_generation, self.conf.directory, self.workflow_manager.current_workflow,
+            self._callback_directory_scan_batch, self._callback_directory_scan_error,
+            output_index=self._current_output_index()
+        )
 
-        # there should be a cache file there, so get the cached data for the current workflow if it exists
-        files_in_current_workflow = {}
-        workflow_file_patterns = []
-        workflow_columns = []
-        if self.workflow_manager.current_workflow:
-            cache = CacheFile(self.conf.directory)
-            files_in_current_workflow = cache.get_files_for_workflow(
-                self.workflow_manager.current_workflow.name
-            )
-            workflow_file_patterns = self.workflow_manager.current_workflow.file_types
-            workflow_columns = self.workflow_manager.current_workflow.columns
-
-        # then get the entire list of files in the current directory to build up the listview items
-        # if they happen to match the filename in the workflow cache, then add that info to the row structure
-        control_list_rows = []
-        files_in_dir = self._get_files_in_current_directory(workflow_file_patterns)
-        for file_structure in files_in_dir:
-            # always add the columns to the raw list for all files
-            file_name = file_structure[0]
-            # listview row always includes the filename itself, so start the array with that
-            row = [file_name]
-            # if it in the cache then the listview row can include additional data
-            if file_name in files_in_current_workflow:
-                # potentially add a stale column token
-                response = self._is_file_stale(file_name)
-                if response is None:  # doesn't support stale, so ignore
-                    pass
-                elif response:  # does support stale and it's true
-                    row.append('*')
-                else:  # does support stale and it's not
-                    row.append('')
-                cached_file_info = files_in_current_workflow[file_name]
-                if self.workflow_manager.current_workflow.uses_weather:
-                    if CacheFile.ParametersKey in cached_file_info:
-                        if CacheFile.WeatherFileKey in cached_file_info[CacheFile.ParametersKey]:
-                            full_weather_path = cached_file_info[CacheFile.ParametersKey][CacheFile.WeatherFileKey]
-                            weather_path_object = Path(full_weather_path)
-                            row.append(weather_path_object.name)
-                        else:
-                            row.append('<no_weather_files>')
-                    else:
-                        row.append('<no_weather_file>')
-                if CacheFile.ResultsKey in cached_file_info:
-                    for column in workflow_columns:
-                        if column in cached_file_info[CacheFile.ResultsKey]:
-                            row.append(cached_file_info[CacheFile.ResultsKey][column])
-
-            # always add the row to the main list
-            control_list_rows.append(row)
-
-        # clear all items from the listview and then add them back in
-        self.file_list.tree.set_files(control_list_rows)
-        if previous_selected_files:
-            self.file_list.tree.try_to_reselect(previous_selected_files)
-        # self._rebuild_group_menu()
-
-    def _is_file_stale(self, input_file_name: str) -> Optional[bool]:
+    def _callback_directory_scan_batch(self, generation: int, rows: List[List], done: bool) -> None:
+        self._gui_queue.put(lambda: self._handler_directory_scan_batch(generation, rows, done))
+
+    def _handler_directory_scan_batch(self, generation: int, rows: List[List], done: bool) -> None:
+        if generation != self._directory_scan_generation:
+            return  # from a scan that has been replaced since
+        self.file_list.tree.upsert_files(rows)
+        self._directory_scan_file_names.update(row[0] for row in rows)
+        if done:
+            self.file_list.tree.retain_files(self._directory_scan_file_names)
+            self._directory_scan = None
+            if self._directory_scan_selection:
+                self.file_list.tree.try_to_reselect(self._directory_scan_selection)
+
+    def _callback_directory_scan_error(self, generation: int, message: str) -> None:
+        self._gui_queue.put(lambda: self._handler_directory_scan_error(generation, message))
+
+    def _handler_directory_scan_error(self, generation: int, message: str) -> None:
+        if generation != self._directory_scan_generation:
+            return
+        self._directory_scan = None
+        self.file_list.tree.set_files([])
+        self._file_list_directory = None
+        if self._directory_watcher is not None:
+            self._directory_watcher.stop()
+            self._directory_watcher = None
+        self._update_status_bar(message)
+
+    def _callback_directory_changes(self, directory: Path, changes: List[FileChange]) -> None:
+        self._gui_queue.put(lambda: self._handler_directory_changes(directory, changes))
+
+    def _handler_directory_changes(self, directory: Path, changes: List[FileChange]) -> None:
         """
-        Returns a tri-state value trying to characterize whether the current file is "stale."
-        It tries to determine this based on the output suffixes of the current workflow.
-        If the current workflow does not include any output suffixes, "stale" cannot be determined.
-        If '.err' is in the output suffixes, this is the only suffix checked.
-
-        :returns: None if stale cannot be determined, True if it is stale, and False if not.
+        Applies the changes a directory watcher saw to the file list, only rebuilding the rows of the files that were
+        added, removed or modified, and of the files whose outputs changed, which is what makes them stale or not
         """
-        if len(self.workflow_manager.current_workflow.output_suffixes) == 0:
-            return None  # can't support stale without output suffixes
-        full_file_path = self.conf.directory / input_file_name
-        if full_file_path.exists():
-            input_file_date = full_file_path.lstat().st_mtime
-            suffixes = self.workflow_manager.current_workflow.output_suffixes
-            if '.err' in suffixes:  # for energyplus workflows just use the err file
-                suffixes = ['.err']
-            file_name_no_ext = full_file_path.with_suffix('').name
-            for suffix in suffixes:
-                output_sub_dir = f"EPLaunchRun_{file_name_no_ext}"
-                output_file_name = file_name_no_ext + suffix
-                tentative_output_file_path = self.conf.directory / output_sub_dir / output_file_name
-                if tentative_output_file_path.exists():
-                    output_file_date = tentative_output_file_path.lstat().st_mtime
-                    if output_file_date < input_file_date:
-                        return True
-        return False
+        if self._directory_watcher is None or directory != self._directory_watcher.directory:
+            return  # from a watcher that has been replaced since
+        workflow = self.workflow_manager.current_workflow
+        if workflow is None:
+            return
+        if any(change.kind == FileChange.Unknown for change in changes):
+            self._update_file_list()
+            return
+        output_index = self._current_output_index()
+        file_names = set()
+        output_stems = set()
+        for change in changes:
+            if change.kind == FileChange.Added:
+                output_index.file_added(change.file_name, change.output_folder)
+            elif change.kind == FileChange.Removed:
+                output_index.file_removed(change.file_name, change.output_folder)
+            else:
+                output_index.file_modified(change.file_name, change.output_folder)
+            if change.output_folder is not None:
+                output_stems.add(change.output_folder[len(OutputFolderPrefix):])
+            elif workflow.matches_file_type(change.file_name):
+                file_names.add(change.file_name)
+        self._refresh_output_suffix_buttons_based_on_selection()
+        if output_stems:
+            file_names.update(f for f in self.file_list.tree.model.names() if Path(f).stem in output_stems)
+        if not file_names:
+            return
+        rows = build_file_rows(directory, workflow, file_names, output_index)
+        file_names_gone = file_names.difference(row[0] for row in rows)
+        self.file_list.tree.upsert_files(rows)
+        self.file_list.tree.remove_files(file_names_gone)
+        if self._directory_scan is not None:  # so that the end of the scan doesn't undo these
+            self._directory_scan_file_names.update(row[0] for row in rows)
+            self._directory_scan_file_names.difference_update(file_names_gone)
 
     def _callback_file_selection_changed(self, selected_file_names: List[str]) -> None:
         """This gets called back by the file listing widget when a selection changes"""
@@ -863,14 +878,14 @@ class EPLaunchWindow(Tk):
     def _handler_weather_recent_option_changed(self, new_weather_path: Path):
         """This is called when the recent weather option menu changes value"""
         self._tk_var_weather_recent.set(str(new_weather_path.name))
+        # the file list is refreshed once the buffered configs are actually written, see _handler_cache_flushed
         for selected_file_name in self.conf.file_selection:
-            cache = CacheFile(self.conf.directory)
-            cache.add_config(
+            self.cache_writer.add_config(
+                self.conf.directory,
                 self.workflow_manager.current_workflow.name,
                 selected_file_name,
                 {'weather': str(new_weather_path)}
             )
-        self._update_file_list()
 
     def _apply_weather_to_a_file_list(self, list_of_file_paths: List[Path]):
         dialog_weather = TkWeatherDialog(self, list(self.conf.weathers_recent))
@@ -884,14 +899,14 @@ class EPLaunchWindow(Tk):
             if weather_file_to_use not in self.conf.weathers_recent:
                 self.conf.weathers_recent.appendleft(weather_file_to_use)
                 self._repopulate_recent_weather_list(weather_file_to_use)
+        # the file list is refreshed once the buffered configs are actually written, see _handler_cache_flushed
         for selected_path in list_of_file_paths:
-            workflow_directory_cache = CacheFile(selected_path.parent)
-            workflow_directory_cache.add_config(
+            self.cache_writer.add_config(
+                selected_path.parent,
                 self.workflow_manager.current_workflow.name,
                 selected_path.name,
                 {'weather': str(weather_file_to_use)}
             )
-        self._update_file_list()
 
     def _set_weather_for_current_group(self):
         self._apply_weather_to_a_file_list(self.conf.group_locations)
@@ -904,6 +919,26 @@ class EPLaunchWindow(Tk):
 
     # region workflow running, tracking, callbacks and handlers
 
+    def _callback_workflow_directories_found(self, found: List[Path]) -> None:
+        self._gui_queue.put(lambda: self._handler_workflow_directories_found(found))
+
+    def _handler_workflow_directories_found(self, found: List[Path]) -> None:
+        new_directories = self.workflow_manager.merge_auto_found_workflow_directories(found)
+        if not new_directories:
+            return
+        if not self._using_auto_found_workflow_directories:
+            # the user picked the workflow directories, so the new ones are only offered in the settings dialog
+            self._update_status_bar(f"Found {len(new_directories)} new EnergyPlus install(s), see Workflow Directories")
+            return
+        if self.workflow_manager.threads:
+            return  # workflows can't change while threads are running, they are loaded at the next startup instead
+        for directory in new_directories:
+            if directory not in self.workflow_manager.workflow_directories:
+                self.workflow_manager.workflow_directories.append(directory)
+        self.workflow_manager.instantiate_all_workflows()  # only the workflow files of the new installs are imported
+        self._repopulate_workflow_context_menu()
+        self._repopulate_workflow_instance_menu()
+
     def _repopulate_workflow_context_menu(self):
         """Clears and repopulates the workflow context menu; tries to reselect the last context saved in config"""
         # save the currently selected workflow context for later
@@ -965,12 +1000,8 @@ class EPLaunchWindow(Tk):
         # store the new instance name in the tk var and in the config
         self._tk_var_workflow_instance.set(new_value)
         self.conf.cur_workflow_name = new_value
-        # find the new workflow in the list of currently available workflows
-        new_workflow = None
-        for w in self.available_workflows:
-            if w.name == self._tk_var_workflow_instance.get():
-                new_workflow = w
-                break
+        # find the new workflow among the currently available workflows
+        new_workflow = self.workflow_manager.workflow_by_name(self.conf.cur_workflow_context, new_value)
         if new_workflow is None:
             messagebox.showerror("There was an unexpected error updating the workflow list, suggest restarting app.")
         # assign the current workflow instance in the workflow manager
@@ -1013,14 +1044,15 @@ class EPLaunchWindow(Tk):
         self._tk_var_output_5.set(suffixes[4] if len(suffixes) > 4 else '--')
         self._refresh_output_suffix_buttons_based_on_selection()
 
+    def _current_output_index(self) -> OutputIndex:
+        """The output index of the current directory, which is kept for as long as the directory stays selected"""
+        if self._output_index is None or self._output_index.directory != self.conf.directory:
+            self._output_index = OutputIndex(self.conf.directory)
+        return self._output_index
+
     def _suffixed_paths_exist(self, original_path: Path, new_suffix: str) -> Tuple[Optional[Path], Optional[Path]]:
-        filename_no_ext = original_path.with_suffix('').name
-        new_path = self.conf.directory / (filename_no_ext + new_suffix)
-        eplus_sub_dir = f"EPLaunchRun_{filename_no_ext}"
-        eplus_specific_output_path = self.conf.directory / eplus_sub_dir / f"{filename_no_ext}{new_suffix}"
-        primary_path_to_return = new_path if new_path.exists() else None
-        eplus_path_to_return = eplus_specific_output_path if eplus_specific_output_path.exists() else None
-        return primary_path_to_return, eplus_path_to_return
+        # looked up in the output index rather than on disk, as this runs for every selected file on each selection
+        return self._current_output_index().output_paths(original_path.name, new_suffix)
 
     def _refresh_single_output_suffix_button(self, tk_var: Variable, button: Button):
         if tk_var.get() == '--':
@@ -1031,7 +1063,7 @@ class EPLaunchWindow(Tk):
             for f in self.conf.file_selection:
                 original_path = self.conf.directory / f
                 new_path, eplus_path = self._suffixed_paths_exist(original_path, suffix_to_open)
-                if (new_path and new_path.exists()) or (eplus_path and eplus_path.exists()):
+                if new_path or eplus_path:
                     pass  # good
                 else:
                     all_files_have_this_suffix = False
@@ -1065,6 +1097,7 @@ class EPLaunchWindow(Tk):
                 self, 'Workflow Processing Errors', '\n'.join(self.workflow_manager.warnings)
             )
         self.conf.workflow_directories = self.workflow_manager.workflow_directories
+        self._using_auto_found_workflow_directories = False
         self._repopulate_workflow_context_menu()
         self._repopulate_workflow_instance_menu()
 
@@ -1109,8 +1142,9 @@ class EPLaunchWindow(Tk):
                             self.conf.weathers_recent.appendleft(w.selected_weather_file)
             # save the current selected one as the new backup for subsequent files
             backup_weather_file_to_use = weather_file_to_use
-        # add the weather configuration to the cache regardless of how it was retrieved, and update file listing
-        cache.add_config(cur_workflow.name, selected_file, {'weather': weather_file_to_use})
+        # add the weather configuration to the cache regardless of how it was retrieved; the run itself uses the
+        # returned weather file, so the write is buffered, and the file list is refreshed once it lands
+        self.cache_writer.add_config(directory, cur_workflow.name, selected_file, {'weather': weather_file_to_use})
         return True, weather_file_to_use, backup_weather_file_to_use
 
     def _run_workflow_on_selection(self) -> None:
@@ -1134,7 +1168,14 @@ class EPLaunchWindow(Tk):
         already_running_instances = []
         cur_workflow = self.workflow_manager.current_workflow
         w_name = cur_workflow.name
+        try:  # import the workflow class now if it is only known from the manifest, to fail before running anything
+            _ = cur_workflow.workflow_class
+        except EPLaunchFileException as e:
+            messagebox.showerror(title='Workflow Error', message=f"ERROR: {e.message}")
+            return
         backup_weather_file_to_use: Optional[str] = None
+        # a weather file that was just chosen for these files may still be buffered, write it before looking it up
+        self.cache_writer.flush()
 
         # loop over all the selected files and try to run the current workflow on each of them
         for path in file_paths:
@@ -1165,13 +1206,16 @@ class EPLaunchWindow(Tk):
             new_uuid = str(uuid4())
             new_instance = cur_workflow.workflow_class()
             new_instance.register_standard_output_callback(new_uuid, self._callback_workflow_stdout)
-            self.workflow_manager.threads[new_uuid] = WorkflowThread(
+            new_thread = WorkflowThread(
                 new_uuid, new_instance, path.parent, path.name,
                 {'weather': this_wea, 'workflow location': cur_workflow.workflow_directory},
-                self._callback_workflow_done
+                self._callback_workflow_done, start_immediately=False, workflow_module_path=cur_workflow.module_path
             )
+            self.workflow_manager.threads[new_uuid] = new_thread
             self.output_dialogs[new_uuid] = self._create_output_dialog(new_uuid)
-            self.output_dialogs[new_uuid].add_output("*** STARTING WORKFLOW ***")
+            self.output_dialogs[new_uuid].add_output("*** QUEUED WORKFLOW ***")
+            # the scheduler starts the thread right away if a slot is free, otherwise it waits its turn in the queue
+            self.workflow_manager.scheduler.submit(new_thread)
 
         # emit an error dialog if needed
         if len(already_running_instances) > 0:
@@ -1179,7 +1223,7 @@ class EPLaunchWindow(Tk):
             messagebox.showerror("Run Error", f"Some configurations were already running, and were skipped: {out}")
 
         self._update_file_list()  # do one update once all threads are spawned to update for weather selection, etc.
-        self._update_status_bar("Currently %s processes running" % len(self.workflow_manager.threads))
+        self._update_status_bar(self._workflow_thread_status_message())
 
     def _create_output_dialog(self, workflow_id: str) -> TkOutputDialog:
         """Generates an output dialog with the specified ID, updating dialog counter and setting dialog position"""
@@ -1221,20 +1265,20 @@ class EPLaunchWindow(Tk):
         try:
             if workflow_response.success:
                 status_message = 'Successfully completed a workflow: ' + workflow_response.message
-                try:
-                    data_from_workflow = workflow_response.column_data
-                    workflow_working_directory = self.workflow_manager.threads[workflow_response.id].run_directory
-                    workflow_directory_cache = CacheFile(workflow_working_directory)
-                    workflow_directory_cache.add_result(
-                        self.workflow_manager.threads[workflow_response.id].workflow_instance.name(),
-                        self.workflow_manager.threads[workflow_response.id].file_name,
-                        data_from_workflow
+                # the file list is refreshed once the buffered result is actually written, see _handler_cache_flushed
+                data_from_workflow = workflow_response.column_data
+                workflow_working_directory = self.workflow_manager.threads[workflow_response.id].run_directory
+                if self._output_index is not None and self._output_index.directory == workflow_working_directory:
+                    # the outputs may have been rewritten in place, which the index can't tell by itself
+                    self._output_index.invalidate(
+                        output_folder_name(self.workflow_manager.threads[workflow_response.id].file_name)
                     )
-                    if self.conf.directory == workflow_working_directory:
-                        # only update file lists if we are still in that directory
-                        self._update_file_list()
-                except EPLaunchFileException:
-                    pass
+                self.cache_writer.add_result(
+                    workflow_working_directory,
+                    self.workflow_manager.threads[workflow_response.id].workflow_instance.name(),
+                    self.workflow_manager.threads[workflow_response.id].file_name,
+                    data_from_workflow
+                )
                 if not self.conf.keep_dialog_open:
                     self.output_dialogs[workflow_response.id].close()
             else:
@@ -1249,7 +1293,20 @@ class EPLaunchWindow(Tk):
             del self.workflow_manager.threads[workflow_response.id]
         except Exception as e:
             print(e)
-        self._update_status_bar("Currently %s processes running" % len(self.workflow_manager.threads))
+        self._update_status_bar(self._workflow_thread_status_message())
+
+    def _callback_cache_flushed(self, directory: Path) -> None:
+        self._gui_queue.put(lambda: self._handler_cache_flushed(directory))
+
+    def _handler_cache_flushed(self, directory: Path) -> None:
+        if self.conf.directory == directory:
+            # only update file lists if we are still in that directory
+            self._update_file_list()
+
+    def _workflow_thread_status_message(self) -> str:
+        counts = self.workflow_manager.thread_status_counts()
+        return f"Currently {counts[WorkflowThreadStatus.Running]} processes running, " \
+               f"{counts[WorkflowThreadStatus.Queued]} queued"
 
     def _callback_workflow_stdout(self, workflow_id: str, message: str) -> None:
         self._gui_queue.put(lambda: self._handler_workflow_stdout(workflow_id, message))
@@ -1346,13 +1403,9 @@ EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
             return
         for f in self.conf.file_selection:
             original_path = self.conf.directory / f
-            filename_no_ext = original_path.with_suffix('').name
-            new_path = self.conf.directory / (filename_no_ext + suffix_to_open)
-            new_path_str = str(new_path)
-            eplus_sub_dir = f"EPLaunchRun_{filename_no_ext}"
-            eplus_specific_output_path = self.conf.directory / eplus_sub_dir / f"{filename_no_ext}{suffix_to_open}"
-            eplus_specific_output_file = str(eplus_specific_output_path)
-            if new_path.exists():
+            new_path, eplus_specific_output_path = self._suffixed_paths_exist(original_path, suffix_to_open)
+            if new_path:
+                new_path_str = str(new_path)
                 if suffix_to_open in self.conf.viewer_overrides:
                     if self.conf.viewer_overrides[suffix_to_open] is not None:
                         # then the viewer override was found, and not None, so use it
@@ -1360,7 +1413,8 @@ EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
                         continue
                 # if we make it this far, we didn't open it with a custom viewer, try to use the default
                 self._open_file_or_dir_with_default(new_path)
-            elif eplus_specific_output_path.exists():
+            elif eplus_specific_output_path:
+                eplus_specific_output_file = str(eplus_specific_output_path)
                 if suffix_to_open in self.conf.viewer_overrides:
                     if self.conf.viewer_overrides[suffix_to_open] is not None:
                         # then the viewer override was found, and not None, so use it
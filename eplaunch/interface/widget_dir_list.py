@@ -1,12 +1,25 @@
 from pathlib import Path
 from platform import system
+from queue import Empty, Queue
 from string import ascii_uppercase
 from tkinter import Tk, NSEW, VERTICAL, HORIZONTAL, Frame, END, NS, TOP, BOTH, EW, PhotoImage, BROWSE
 from tkinter.ttk import Treeview, Scrollbar
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
+
+from eplaunch.utilities.directory_children import DirectoryChildrenCache, DirectoryListing
 
 
 class DirListWidget(Treeview):
+    """
+    The directory tree.  Folders are listed on background threads, so expanding a folder on a slow share never
+    freezes the window: a folder that hasn't been listed shows a {loading} item until its listing arrives.  Listings
+    are remembered for a while, so expanding a folder again shows its subfolders right away, and they are then
+    refreshed in the background, updating the folder in place, so subfolders that are already expanded stay that way.
+    Once a folder is shown, its subfolders are listed ahead of time, as they are the likely next ones to expand.
+    """
+
+    PrefetchLimit = 100  # the most subfolders of an expanded folder to list ahead of time
+
     def __init__(
             self, parent_frame: Frame,
             on_select: Optional[Callable[[Path], None]] = None
@@ -23,10 +36,18 @@ class DirListWidget(Treeview):
         self.non_root_folder_image = PhotoImage(file=folder_closed_icon_path)
         # load the drive root(s), initially closed, with a single dummy item inside, so it allows expanding
         self.root_node_ids = []
+        self._paths_by_id: Dict[str, Path] = {}  # the folder of each node; placeholder items have none
         for r in DirListWidget.get_roots_by_platform():
             drive_root = self.insert('', END, text=r.anchor, open=False, tags=r.parts)
             self.root_node_ids.append(drive_root)
+            self._paths_by_id[drive_root] = r
             self.insert(drive_root, END, text='{loading}', open=False, image=self.non_root_folder_image)
+        # folder listings come from background threads, through a queue that is only polled while listings are pending
+        self.children_cache = DirectoryChildrenCache()
+        self._listed_queue: Queue = Queue()
+        self._pending_listings = 0
+        self._selection_generation = 0  # to drop a selection in progress when another one starts
+        self._programmatic_selection: Optional[str] = None  # the node last selected by try_to_select_directory
         # bind the click event
         self.bind('<<TreeviewSelect>>', self._item_selected)
         self.bind('<<TreeviewOpen>>', self._item_expanded)
@@ -35,32 +56,92 @@ class DirListWidget(Treeview):
 
     def _item_expanded(self, *_):
         item_id = self.focus()
-        self._rebuild_single_node(item_id)
-
-    def _rebuild_single_node(self, item_id: str):
-        item_details = self.item(item_id)
-        item_path = Path(*item_details['tags'])
-        # first delete any items from this node
-        for item in self.get_children(item_id):
-            self.delete(item)
-        # now rebuild it
-        raw_child_paths = []
-        try:
-            for f in item_path.iterdir():
-                if f.is_dir():
-                    raw_child_paths.append(f)
-        except PermissionError:
-            self.insert(item_id, END, text="{access_denied}", open=False, image=self.non_root_folder_image)
+        self._expand_node(item_id)
+
+    def _node_path(self, item_id: str) -> Path:
+        return self._paths_by_id[item_id]
+
+    def _delete_nodes(self, item_ids: List[str]):
+        if not item_ids:
             return
-        if len(raw_child_paths) == 0:
-            self.insert(item_id, END, text="{empty}", open=False, image=self.non_root_folder_image)
-        else:
-            new_child_file_paths = sorted(raw_child_paths)
-            for path in new_child_file_paths:
-                new_child_id = self.insert(
-                    item_id, END, text=path.name, open=False, image=self.non_root_folder_image, tags=path.parts
+        to_forget = list(item_ids)
+        while to_forget:
+            item_id = to_forget.pop()
+            self._paths_by_id.pop(item_id, None)
+            to_forget.extend(self.get_children(item_id))
+        self.delete(*item_ids)
+
+    def _expand_node(self, item_id: str, then: Optional[Callable[[], None]] = None):
+        """
+        Shows the subfolders of a node, from a remembered listing if there is one, and lists the folder in the
+        background unless that listing is fresh
+
+        :param item_id: The node
+        :param then: Optional function to call once the node shows a fresh listing
+        """
+        item_path = self._node_path(item_id)
+        cached = self.children_cache.cached(item_path)
+        if cached is not None:
+            listing, fresh = cached
+            self._fill_node(item_id, listing)
+            if fresh:
+                if then:
+                    then()
+                return
+        self._request_listing(item_id, item_path, then)
+
+    def _request_listing(self, item_id: str, item_path: Path, then: Optional[Callable[[], None]]):
+        def on_listed_in_background(_path: Path, listing: DirectoryListing):
+            self._listed_queue.put((item_id, item_path, listing, then))
+
+        self._pending_listings += 1
+        if self._pending_listings == 1:
+            self.after(50, self._check_listed_queue)
+        self.children_cache.request(item_path, on_listed_in_background)
+
+    def _check_listed_queue(self):
+        while True:
+            try:
+                item_id, item_path, listing, then = self._listed_queue.get_nowait()
+            except Empty:
+                break
+            self._pending_listings -= 1
+            # the node may be gone, or be a different folder, by the time its listing arrives
+            if self._paths_by_id.get(item_id) == item_path:
+                self._fill_node(item_id, listing)
+                if then:
+                    then()
+        if self._pending_listings > 0:
+            self.after(50, self._check_listed_queue)
+
+    def _fill_node(self, item_id: str, listing: DirectoryListing):
+        """Makes the children of a node match a listing, keeping the nodes (and subtrees) of folders still there"""
+        item_path = self._node_path(item_id)
+        existing_ids = {}
+        for child_id in self.get_children(item_id):
+            if child_id in self._paths_by_id:
+                existing_ids[self._node_path(child_id).name] = child_id
+            else:  # a {loading}, {empty} or {access_denied} placeholder
+                self.delete(child_id)
+        if not listing:
+            self._delete_nodes(list(existing_ids.values()))
+            text = "{access_denied}" if listing is None else "{empty}"
+            self.insert(item_id, END, text=text, open=False, image=self.non_root_folder_image)
+            return
+        keep = set(listing)
+        self._delete_nodes([child_id for name, child_id in existing_ids.items() if name not in keep])
+        for index, name in enumerate(listing):
+            child_id = existing_ids.get(name)
+            if child_id is None:
+                path = item_path / name
+                child_id = self.insert(
+                    item_id, index, text=name, open=False, image=self.non_root_folder_image, tags=path.parts
                 )
-                self.insert(new_child_id, END, text="{loading}", open=False, image=self.non_root_folder_image)
+                self._paths_by_id[child_id] = path
+                self.insert(child_id, END, text="{loading}", open=False, image=self.non_root_folder_image)
+            elif self.index(child_id) != index:
+                self.move(child_id, item_id, index)
+        self.children_cache.prefetch(item_path / name for name in listing[:self.PrefetchLimit])
 
     @staticmethod
     def get_roots_by_platform() -> List[Path]:
@@ -78,44 +159,60 @@ class DirListWidget(Treeview):
         return roots
 
     def _item_selected(self, *_):
+        if self.selection() != (self._programmatic_selection,):
+            # the user selected a folder, which overrides a selection still waiting for its folder listings
+            self._selection_generation += 1
+        self._programmatic_selection = None
         if len(self.selection()) != 1:
             return  # must not have selected anything
         single_selected_item_id = self.selection()[0]
-        item_contents = self.item(single_selected_item_id)
-        if self.callback_on_new_selection:
-            selected_path = Path(*item_contents['tags'])
+        if self.callback_on_new_selection and single_selected_item_id in self._paths_by_id:
+            selected_path = self._node_path(single_selected_item_id)
             self.callback_on_new_selection(selected_path)
 
     def try_to_select_directory(self, target_path: Path):
+        """
+        Expands the tree down to a directory and selects it.  Folders along the way are listed in the background as
+        needed, so the selection may only happen once those listings arrive; if the directory can't be found, the
+        deepest folder found along the way is selected.
+
+        :param target_path: The directory to select
+        """
         path_parts = target_path.parts
         # loop over each root, looking for the root node that matches the root of the target path
         # this is treated a little different because root paths could look weird on Windows, so
         # instead of a string match, I'm doing a pathlib.Path() equality check
         for found_root in self.root_node_ids:
-            root_item = self.item(found_root)
-            root_name = root_item['tags'][0]
-            if Path(root_name) == Path(target_path.anchor):
+            if self._node_path(found_root) == Path(target_path.anchor):
                 break
         else:
             # Could not find the root directory, just select the root
             raise Exception("Not an exception eventually")
-        latest_parent_id = found_root
-        items_to_expand = [latest_parent_id]
-        self._rebuild_single_node(latest_parent_id)
-        for ind, part in enumerate(path_parts):
-            if ind == 0:
-                continue  # we already got the root
-            for child_node_id in self.get_children(latest_parent_id):
-                this_child_node = self.item(child_node_id)
-                if this_child_node['text'] == part:
-                    latest_parent_id = child_node_id
-                    items_to_expand.append(latest_parent_id)
-                    self._rebuild_single_node(latest_parent_id)
-                    break
-        for i in items_to_expand:
-            self.item(i, open=True)
-        self.selection_set(latest_parent_id)
-        self.see(latest_parent_id)
+        self._selection_generation += 1
+        self._continue_selection(self._selection_generation, found_root, path_parts, 1, [found_root])
+
+    def _continue_selection(self, generation: int, node_id: str, path_parts, index: int, items_to_expand: List[str]):
+        if generation != self._selection_generation:
+            return  # another selection has started since
+
+        def when_listed():
+            if generation != self._selection_generation:
+                return
+            if index < len(path_parts):
+                for child_node_id in self.get_children(node_id):
+                    child_path = self._paths_by_id.get(child_node_id)
+                    if child_path is not None and child_path.name == path_parts[index]:
+                        self._continue_selection(
+                            generation, child_node_id, path_parts, index + 1, items_to_expand + [child_node_id]
+                        )
+                        return
+            for i in items_to_expand:
+                self.item(i, open=True)
+            self._programmatic_selection = node_id
+            self.selection_set(node_id)
+            self.see(node_id)
+
+        self._expand_node(node_id, then=when_listed)
 
 
 class DirListScrollableFrame(Frame):
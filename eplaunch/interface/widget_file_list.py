@@ -1,11 +1,37 @@
 from random import randint
-from tkinter import NSEW, VERTICAL, Frame, END, NS, TOP, BOTH, EXTENDED, W, CENTER
-from tkinter.ttk import Treeview, Scrollbar
+from tkinter import NSEW, VERTICAL, Frame, NS, TOP, BOTH, EXTENDED, W, CENTER, EW, LEFT, X, Entry, Label, StringVar
+from tkinter.ttk import Treeview, Scrollbar, Style
 from tkinter.messagebox import showinfo
-from typing import Tuple, Optional, Callable, List
+from typing import Tuple, Optional, Callable, Dict, Iterable, List, Sequence, Set
+
+from eplaunch.utilities.crossplatform import Platform
+from eplaunch.utilities.file_list_model import FileListModel
+
+# the modifier key bits of event.state that extend the selection with a click or arrow key, where Command toggles on
+# a Mac rather than Control
+ShiftMask = 0x1
+ToggleMask = 0x8 if Platform.get_current_platform() == Platform.MAC else 0x4
 
 
 class FileListWidget(Treeview):
+    """
+    The file listing, one row per file, where the file name is the first value of each row.
+
+    All rows live in a FileListModel, which does the sorting (click a column heading) and filtering, and the Treeview
+    only holds items for the rows being shown.  Up to VirtualThreshold rows, that is every row in the view, and the
+    Treeview scrolls itself as usual.  Beyond that, the list scrolls virtually: only the rows that fit in the widget
+    are materialized, and scrolling swaps the window of rows being shown, so even folders with hundreds of thousands
+    of files stay quick and light.  Either way, updates only touch the items of rows that were inserted, deleted, or
+    whose values changed, so refreshing a listing where little has changed is cheap and doesn't flicker, and the
+    selection is kept by file name, so it stays in place through updates and scrolling.
+
+    When virtual, the Treeview only knows about the selected files in the window, so a selection change it makes is
+    applied to the full selection according to the click or key that made it: a Shift-click selects the range of rows
+    from the anchor row in the model view, a Control-click or Shift-arrow only adds and removes the files of the
+    window, and anything else replaces the selection.  Ctrl-a selects every row in the view.
+    """
+
+    VirtualThreshold = 2000
 
     def __init__(self, parent_frame: Frame, on_selection_changed: Optional[Callable[[List[str]], None]] = None,
                  on_double_click: Optional[Callable[[str], None]] = None):
@@ -14,30 +40,253 @@ class FileListWidget(Treeview):
         self.callback_on_selection_changed = None
         self.callback_on_double_click = None
         self.columns = ['File Name']
-        # define headings
-        for c in self.columns:
-            self.heading(c, text=c)
-        self.file_ids: List[str] = []
+        self.model = FileListModel()
+        self.scrollbar: Optional[Scrollbar] = None
+        self.virtual = False
+        self._first_row = 0  # the position in the model view of the first row shown, when virtual
+        self._shown_names: List[str] = []  # the names of the rows that have items, in display order
+        self._ids_by_name: Dict[str, str] = {}
+        self._names_by_id: Dict[str, str] = {}
+        self._values_by_name: Dict[str, Tuple] = {}
+        self._selected_names: Set[str] = set()
+        self._anchor_name: Optional[str] = None  # the file a Shift-click selects a range from
+        self._input_modifiers = 0  # the modifier bits of the click or key press that may change the selection next
+        self._input_clicked_name: Optional[str] = None  # the file of that click, or None for a key press
+        self._refresh_pending = False
+        self._update_headings()
         self.bind('<<TreeviewSelect>>', self._selection_changed)
         self.bind('<Double-1>', self._item_double_clicked)
+        self.bind('<Configure>', self._resized)
+        self.bind('<MouseWheel>', self._mouse_wheel)
+        self.bind('<Button-4>', self._mouse_wheel)
+        self.bind('<Button-5>', self._mouse_wheel)
+        self.bind('<ButtonPress-1>', self._pointer_pressed)
+        self.bind('<Up>', lambda event: self._key_past_window(event, -1))
+        self.bind('<Down>', lambda event: self._key_past_window(event, 1))
+        self.bind('<Control-a>', self.select_all)
         self.callback_on_selection_changed = on_selection_changed
         self.callback_on_double_click = on_double_click
 
-    def set_files(self, file_list: List[Tuple]):
-        for file_id in self.file_ids:
-            self.delete(file_id)
-        self.file_ids.clear()
-        for file_data in file_list:
-            self.file_ids.append(self.insert('', END, values=file_data))
+    def attach_scrollbar(self, scrollbar: Scrollbar) -> None:
+        """Connects the scrollbar that scrolls this list, which is driven by the model when the list is virtual"""
+        self.scrollbar = scrollbar
+        self._connect_scrollbar()
+
+    def set_files(self, file_list: Sequence[Sequence]):
+        """
+        Makes the listing hold exactly these rows
+
+        :param file_list: The rows, each a sequence of column values starting with the file name
+        """
+        if self.model.set_rows(file_list):
+            self._model_changed()
+
+    def upsert_files(self, file_list: Iterable[Sequence]):
+        """
+        Adds rows for new files and updates the values of existing rows that changed; other rows are left alone
+
+        :param file_list: The rows, each a sequence of column values starting with the file name
+        """
+        if self.model.upsert(file_list):
+            self._model_changed()
+
+    def retain_files(self, file_names_to_keep: Iterable[str]):
+        """
+        Deletes the rows of all files not in the given collection
+
+        :param file_names_to_keep: The names of the files whose rows should stay
+        """
+        if self.model.retain(file_names_to_keep):
+            self._model_changed()
+
+    def remove_files(self, file_names_to_remove: Iterable[str]):
+        """
+        Deletes the rows of the given files, ignoring files that are not listed
+
+        :param file_names_to_remove: The names of the files whose rows should go
+        """
+        if self.model.remove(file_names_to_remove):
+            self._model_changed()
+
+    def sort_by_column(self, column: int) -> None:
+        """Sorts the listing by a column, or reverses the order if it is already sorted by that column"""
+        descending = not self.model.sort_descending if column == self.model.sort_column else False
+        self.model.sort_by(column, descending)
+        self._update_headings()
+        self._refresh()
+
+    def set_filter(self, filter_text: str) -> None:
+        """Only lists files whose name contains the given text, ignoring case; empty text lists all files"""
+        self.model.set_filter(filter_text)
+        self._first_row = 0
+        self._refresh()
+
+    def _model_changed(self) -> None:
+        # rows often arrive in many small updates, which are shown together once the GUI is idle
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self._refresh)
+
+    def _resized(self, _) -> None:
+        if self.virtual:  # the number of rows that fit has changed
+            self._refresh()
+
+    def _rows_that_fit(self) -> int:
+        row_height = int(float(Style().lookup('Treeview', 'rowheight') or 20))
+        heading_height = row_height
+        if self._shown_names:
+            first_row_box = self.bbox(self._ids_by_name[self._shown_names[0]])
+            if first_row_box:
+                heading_height = first_row_box[1]
+        return max(1, (self.winfo_height() - heading_height) // row_height)
+
+    def _refresh(self) -> None:
+        self._refresh_pending = False
+        total = self.model.view_count()
+        # selected files that left the view are no longer selected
+        selected_in_view = {f for f in self._selected_names if self.model.view_position(f) is not None}
+        selection_pruned = selected_in_view != self._selected_names
+        self._selected_names = selected_in_view
+        virtual = total > self.VirtualThreshold
+        if virtual != self.virtual:
+            self.virtual = virtual
+            self._first_row = 0
+            self._connect_scrollbar()
+        if self.virtual:
+            window_size = self._rows_that_fit()
+            self._first_row = max(0, min(self._first_row, total - window_size))
+            self._show_rows(self.model.view_rows(self._first_row, window_size))
+            self.yview_moveto(0)
+            if self.scrollbar:
+                self.scrollbar.set(self._first_row / total, min(1.0, (self._first_row + window_size) / total))
+        else:
+            self._show_rows(self.model.view_rows())
+        if selection_pruned:
+            self._notify_selection()
+
+    def _show_rows(self, rows: List[Tuple]) -> None:
+        new_names = [row[0] for row in rows]
+        keep = set(new_names)
+        names_to_delete = [f for f in self._shown_names if f not in keep]
+        if names_to_delete:
+            ids_to_delete = [self._ids_by_name.pop(f) for f in names_to_delete]
+            for item_id in ids_to_delete:
+                del self._names_by_id[item_id]
+            for file_name in names_to_delete:
+                del self._values_by_name[file_name]
+            self.delete(*ids_to_delete)
+        # while the rows kept are still in the same order, new rows can just be inserted in place, which covers
+        # files arriving and scrolling; otherwise, such as after sorting, every row is moved into place
+        kept_names = [f for f in self._shown_names if f in keep]
+        reorder = kept_names != [f for f in new_names if f in self._ids_by_name]
+        for index, values in enumerate(rows):
+            file_name = values[0]
+            item_id = self._ids_by_name.get(file_name)
+            if item_id is None:
+                item_id = self.insert('', index, values=values)
+                self._ids_by_name[file_name] = item_id
+                self._names_by_id[item_id] = file_name
+                self._values_by_name[file_name] = values
+                continue
+            if self._values_by_name[file_name] != values:
+                self.item(item_id, values=values)
+                self._values_by_name[file_name] = values
+            if reorder:
+                self.move(item_id, '', index)
+        self._shown_names = new_names
+        # items for selected files may have just been created, or may have been deleted
+        selected_ids = {self._ids_by_name[f] for f in self._shown_names if f in self._selected_names}
+        if selected_ids != set(self.selection()):
+            self.selection_set(list(selected_ids))
+
+    def _connect_scrollbar(self) -> None:
+        if self.scrollbar is None:
+            return
+        if self.virtual:
+            self.scrollbar.configure(command=self._scroll_virtual)
+            self.configure(yscrollcommand='')
+        else:
+            self.scrollbar.configure(command=self.yview)
+            self.configure(yscrollcommand=self.scrollbar.set)
+
+    def _scroll_to(self, first_row: int) -> None:
+        self._first_row = first_row
+        self._refresh()
+
+    def _scroll_virtual(self, *args) -> None:
+        # the scrollbar sends ('moveto', fraction) or ('scroll', count, 'units' or 'pages')
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * self.model.view_count()))
+        elif args[0] == 'scroll':
+            step = len(self._shown_names) if args[2] == 'pages' else 1
+            self._scroll_to(self._first_row + int(args[1]) * step)
+
+    def _mouse_wheel(self, event):
+        if not self.virtual:
+            return None  # the Treeview scrolls itself
+        if event.num == 4 or event.delta > 0:
+            self._scroll_to(self._first_row - 3)
+        else:
+            self._scroll_to(self._first_row + 3)
+        return 'break'
+
+    def _pointer_pressed(self, event) -> None:
+        # this runs before the Treeview's own click handling, which is what changes the selection
+        self._input_modifiers = event.state
+        self._input_clicked_name = self._names_by_id.get(self.identify_row(event.y))
+
+    def _key_past_window(self, event, direction: int) -> None:
+        self._input_modifiers = event.state
+        self._input_clicked_name = None
+        # arrow keys move within the items that exist, so scroll one row when they are about to run off the window;
+        # this runs before the Treeview's own key handling, which then moves to the row that was scrolled in
+        if not self.virtual or not self._shown_names:
+            return
+        edge_name = self._shown_names[0] if direction < 0 else self._shown_names[-1]
+        if self.focus() == self._ids_by_name[edge_name]:
+            self._scroll_to(self._first_row + direction)
+
+    def _update_headings(self) -> None:
+        for i, c in enumerate(self.columns):
+            if i == self.model.sort_column:
+                c += ' \u25bc' if self.model.sort_descending else ' \u25b2'
+            self.heading(i, text=c, command=lambda column=i: self.sort_by_column(column))
 
     def _selection_changed(self, *_):
+        # names come from the index, as Tk may turn values that look like numbers into numbers
+        selected = {self._names_by_id[i] for i in self.selection() if i in self._names_by_id}
+        shown_selected = {f for f in self._shown_names if f in self._selected_names}
+        if selected == shown_selected:
+            return  # items were selected to match the selection while refreshing, rather than by the user
+        modifiers, clicked_name = self._input_modifiers, self._input_clicked_name
+        self._input_modifiers, self._input_clicked_name = 0, None
+        if not self.virtual:  # every row has an item, so the Treeview selection is the whole selection
+            self._selected_names = selected
+        elif modifiers & ShiftMask and clicked_name is not None and self._anchor_name is not None:
+            # the Treeview can only select the part of the range in the window
+            range_names = self.model.view_names_between(self._anchor_name, clicked_name)
+            self._selected_names = (self._selected_names if modifiers & ToggleMask else set()) | set(range_names)
+            self.selection_set([self._ids_by_name[f] for f in self._shown_names if f in self._selected_names])
+        elif modifiers & (ShiftMask | ToggleMask):  # only the files in the window changed
+            self._selected_names = (self._selected_names - (shown_selected - selected)) | (selected - shown_selected)
+        else:
+            self._selected_names = selected
+        if not modifiers & ShiftMask:
+            focus_id = self.focus()
+            self._anchor_name = clicked_name if clicked_name is not None else self._names_by_id.get(focus_id)
+        self._notify_selection()
+
+    def select_all(self, _=None) -> str:
+        """Selects every row in the view, including the rows outside the window when the list is virtual"""
+        self._selected_names = {row[0] for row in self.model.view_rows()}
+        self.selection_set([self._ids_by_name[f] for f in self._shown_names])
+        self._notify_selection()
+        return 'break'  # a Treeview has no select all of its own, but don't let anything else handle the key either
+
+    def _notify_selection(self) -> None:
         if not self.callback_on_selection_changed:
             return
-        response = []
-        for selected_id in self.selection():
-            item_contents = self.item(selected_id)
-            file_name = item_contents['values'][0]
-            response.append(file_name)
+        response = sorted(self._selected_names, key=lambda f: self.model.view_position(f))
         self.callback_on_selection_changed(response)
 
     def _item_double_clicked(self, _):
@@ -49,21 +298,17 @@ class FileListWidget(Treeview):
         showinfo(title='Information', message=','.join(record))
 
     def try_to_reselect(self, files_to_reselect: List[str]):
-        # don't call back during programmatic selection
-        hold_callback = self.callback_on_selection_changed
-        self.callback_on_selection_changed = None
-        for item in self.selection():
-            self.selection_remove(item)
-        items_to_select = []
-        for f in self.file_ids:
-            item = self.item(f)
-            if item['values'][0] in files_to_reselect:
-                items_to_select.append(f)
-        if len(items_to_select) > 0:
-            self.focus(items_to_select[0])
-            self.selection_set(items_to_select)
-        self.callback_on_selection_changed = hold_callback
-        self._selection_changed()
+        self._refresh()
+        self._selected_names = {f for f in files_to_reselect if self.model.view_position(f) is not None}
+        if self._selected_names:
+            first_position = min(self.model.view_position(f) for f in self._selected_names)
+            if self.virtual and not self._first_row <= first_position < self._first_row + len(self._shown_names):
+                self._first_row = first_position
+            self._refresh()
+            self.focus(self._ids_by_name[self.model.view_rows(first_position, 1)[0][0]])
+        elif self.selection():
+            self.selection_remove(*self.selection())
+        self._notify_selection()
 
     def set_new_columns(self, extended_column_names=None) -> None:
         # we always leave Filename, the list should include Stale, Weather, etc.
@@ -72,14 +317,17 @@ class FileListWidget(Treeview):
         column_list = ['File Name']
         column_list.extend(extended_column_names)
         self["columns"] = column_list
+        self.columns = column_list
+        if self.model.sort_column >= len(column_list):
+            self.model.sort_by(0)
         num_cols = len(column_list)
         widget_width = max(self.winfo_width(), 400)
         desired_first_column_portion = 1.093 - 0.195 * num_cols + 0.0116667 * num_cols * num_cols
         first_column_width = int(desired_first_column_portion * widget_width)
         remaining_width = widget_width - first_column_width
         remaining_column_widths = remaining_width // (len(column_list) - 1)
+        self._update_headings()
         for i, c in enumerate(column_list):
-            self.heading(i, text=c)
             self.column(
                 i,
                 width=first_column_width if i == 0 else remaining_column_widths,
@@ -90,13 +338,19 @@ class FileListWidget(Treeview):
 class FileListScrollableFrame(Frame):
     def __init__(self, parent, on_selection_changed: Optional[Callable[[List[str]], None]] = None):
         super().__init__(parent)
+        filter_frame = Frame(self)
+        Label(filter_frame, text="Filter:").pack(side=LEFT, padx=3)
+        self.filter_text = StringVar()
+        Entry(filter_frame, textvariable=self.filter_text).pack(side=LEFT, fill=X, expand=True)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=EW, pady=2)
         self.tree = FileListWidget(self, on_selection_changed)
-        self.tree.grid(row=0, column=0, sticky=NSEW)
+        self.tree.grid(row=1, column=0, sticky=NSEW)
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure('all', weight=1)
-        scrollbar = Scrollbar(self, orient=VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.grid(row=0, column=1, sticky=NS)
+        self.grid_rowconfigure(1, weight=1)
+        scrollbar = Scrollbar(self, orient=VERTICAL)
+        self.tree.attach_scrollbar(scrollbar)
+        scrollbar.grid(row=1, column=1, sticky=NS)
+        self.filter_text.trace_add('write', lambda *_: self.tree.set_filter(self.filter_text.get()))
 
 
 if __name__ == "__main__":
@@ -125,7 +379,7 @@ if __name__ == "__main__":
     counter = 0
     file_listing = FileListScrollableFrame(root, printer)
     files = []
-    for n in range(1, 100):
+    for n in range(1, 100000):
         rand = randint(1, 10)
         files.append((
             f"FileName{n}.png",
@@ -1,12 +1,13 @@
 import json
+import multiprocessing
 import os
 import pathlib
 import tempfile
 import threading
-import time
 import unittest
+from unittest import mock
 
-from eplaunch.utilities.cache import CacheFile as CF, cache_files_currently_updating_or_writing
+from eplaunch.utilities.cache import CacheFile as CF, cache_file_lock
 from eplaunch.utilities.exceptions import EPLaunchFileException
 
 
@@ -46,6 +47,98 @@ class TestCacheFileInitialization(unittest.TestCase):
         c = CF(working_directory=self.temp_dir)
         c.write()
 
+    def test_write_leaves_no_temporary_files(self):
+        c = CF(working_directory=self.temp_dir)
+        c.add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        CF.FsyncOnWrite = True
+        try:
+            c.add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        finally:
+            CF.FsyncOnWrite = False
+        self.assertEqual([CF.FileName], [p.name for p in self.temp_dir.iterdir()])
+
+    def test_failed_write_keeps_previous_file(self):
+        c = CF(working_directory=self.temp_dir)
+        c.add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        with mock.patch('eplaunch.utilities.cache.replace', side_effect=OSError('disk went away')):
+            with self.assertRaises(EPLaunchFileException):
+                c.add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        self.assertEqual(['fileA'], list(CF(self.temp_dir).get_files_for_workflow('workflowA')))
+        self.assertEqual([CF.FileName], [p.name for p in self.temp_dir.iterdir()])
+
+    def test_write_retries_replace_while_file_is_open_elsewhere(self):
+        c = CF(working_directory=self.temp_dir)
+        c.add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        # Windows refuses to replace a file that a reader has open, until the reader closes it
+        sharing_violations = [PermissionError('in use'), PermissionError('in use')]
+
+        def replace_once_closed(source, target):
+            if sharing_violations:
+                raise sharing_violations.pop()
+            os.replace(source, target)
+
+        with mock.patch('eplaunch.utilities.cache.replace', side_effect=replace_once_closed):
+            c.add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        self.assertEqual(['fileA', 'fileB'], sorted(CF(self.temp_dir).get_files_for_workflow('workflowA')))
+        self.assertEqual([CF.FileName], [p.name for p in self.temp_dir.iterdir()])
+
+
+class TestCacheFileCompactEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.test_cache_file_path = self.temp_dir / CF.FileName
+        self.state = {CF.RootKey: {'workflowA': {CF.FilesKey: {
+            f'file{i}': {CF.ResultsKey: {'b': i, 'a': 'd\u00e9j\u00e0'}} for i in range(3)
+        }}}}
+
+    def write_state(self):
+        c = CF(working_directory=self.temp_dir)
+        c.workflow_state = self.state
+        with mock.patch.object(CF, 'CompactEncoding', True):
+            c.write()
+        return self.test_cache_file_path.read_text(encoding='utf-8')
+
+    def test_compact_file_is_smaller_and_sorted(self):
+        indented = json.dumps(self.state, indent=2)
+        compact = self.write_state()
+        self.assertLess(len(compact), len(indented) / 2)
+        self.assertNotIn('\n', compact)
+        self.assertLess(compact.index('"a"'), compact.index('"b"'))
+        self.assertEqual(self.state, json.loads(compact))
+
+    def test_standard_library_fallback(self):
+        with mock.patch.multiple('eplaunch.utilities.cache', orjson=None, ujson=None):
+            compact = self.write_state()
+        self.assertEqual(json.dumps(self.state, separators=(',', ':'), sort_keys=True), compact)
+
+    def test_falls_back_to_standard_library_for_unencodable_state(self):
+        self.state[CF.RootKey]['workflowA'][CF.FilesKey]['file0'][CF.ResultsKey] = {1: 2 ** 70}
+        compact = self.write_state()
+        self.assertEqual(json.dumps(self.state, separators=(',', ':'), sort_keys=True), compact)
+
+    def test_non_finite_values_are_read_back(self):
+        c = CF(working_directory=self.temp_dir)
+        c.add_result('workflowA', 'fileA', {'energy': float('nan'), 'peak': float('inf')})
+        c = CF(working_directory=self.temp_dir)
+        c.read(use_parsed_cache=False)
+        results = c.workflow_state[CF.RootKey]['workflowA'][CF.FilesKey]['fileA'][CF.ResultsKey]
+        self.assertNotEqual(results['energy'], results['energy'])  # NaN
+        self.assertEqual(float('inf'), results['peak'])
+        c.add_result('workflowA', 'fileB', {'energy': 1.0})
+        self.assertEqual(['fileA', 'fileB'], sorted(CF(self.temp_dir).get_files_for_workflow('workflowA')))
+
+    def test_legacy_and_compact_files_are_read(self):
+        for compact in [False, True]:
+            with mock.patch.object(CF, 'CompactEncoding', compact):
+                c = CF(working_directory=self.temp_dir)
+                c.workflow_state = self.state
+                c.write()
+            self.assertEqual(self.state, json.loads(self.test_cache_file_path.read_text(encoding='utf-8')))
+            c = CF(working_directory=self.temp_dir)
+            c.read(use_parsed_cache=False)
+            self.assertEqual(self.state, c.workflow_state)
+
 
 class TestCacheFileAddingResults(unittest.TestCase):
 
@@ -137,30 +230,176 @@ class TestCacheFileUtilityFunctions(unittest.TestCase):
         self.assertEqual(0, len(files_in_workflow))
 
 
-class TestCacheFileOKToContinue(unittest.TestCase):
+class TestCacheFileParsedStateCache(unittest.TestCase):
 
     def setUp(self):
         self.temp_dir = pathlib.Path(tempfile.mkdtemp())
         self.test_cache_file_path = self.temp_dir / CF.FileName
 
-    @staticmethod
-    def block_cache_then_release(cache_file_path):
-        cache_files_currently_updating_or_writing.append(cache_file_path)
-        time.sleep(2)
-        cache_files_currently_updating_or_writing.remove(cache_file_path)
-
-    def test_ok_to_continue(self):
-        # to do this test, I need to first add the current cache file to the array, then try to check ok to continue,
-        # but then on another thread, wait
-        download_thread = threading.Thread(
-            target=TestCacheFileOKToContinue.block_cache_then_release,
-            args=[self.test_cache_file_path]
-        )
-        c = CF(working_directory=self.temp_dir)
-        download_thread.start()
-        self.assertTrue(c.ok_to_continue())
+    def test_unchanged_file_is_not_parsed_again(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        with mock.patch('eplaunch.utilities.cache.loads', wraps=json.loads) as mock_loads:
+            self.assertIn('fileA', CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA'))
+            self.assertIn('fileA', CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA'))
+            self.assertEqual(0, mock_loads.call_count)
 
-    def test_never_ok_to_continue(self):
+    def test_changed_file_is_parsed_again(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')
+        # another program replaces the file behind our back
+        self.test_cache_file_path.write_text(json.dumps({CF.RootKey: {'workflowB': {CF.FilesKey: {'fileB': {}}}}}))
         c = CF(working_directory=self.temp_dir)
-        cache_files_currently_updating_or_writing.append(self.test_cache_file_path)
-        self.assertFalse(c.ok_to_continue())
+        self.assertEqual({}, c.get_files_for_workflow('workflowA'))
+        self.assertIn('fileB', c.get_files_for_workflow('workflowB'))
+
+    def test_modifying_does_not_alter_shared_state(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        files_before = CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        self.assertEqual(['fileA'], list(files_before))
+        self.assertEqual(
+            ['fileA', 'fileB'], list(CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA'))
+        )
+
+    def test_least_recently_used_states_are_evicted(self):
+        other_dirs = [pathlib.Path(tempfile.mkdtemp()) for _ in range(3)]
+        with mock.patch.object(CF, 'MaxParsedStatesCached', 2):
+            for d in [self.temp_dir] + other_dirs:
+                CF(working_directory=d).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+            with mock.patch('eplaunch.utilities.cache.loads', wraps=json.loads) as mock_loads:
+                CF(working_directory=other_dirs[-1]).read()
+                self.assertEqual(0, mock_loads.call_count)
+                CF(working_directory=self.temp_dir).read()
+                self.assertEqual(1, mock_loads.call_count)
+
+
+class TestCacheFileJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.test_cache_file_path = self.temp_dir / CF.FileName
+        self.test_journal_file_path = self.temp_dir / CF.JournalFileName
+        patcher = mock.patch.object(CF, 'JournalMode', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_changes_are_appended_to_journal(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        CF(working_directory=self.temp_dir).add_config('workflowA', 'fileA', {'weather': 'a.epw'})
+        self.assertFalse(self.test_cache_file_path.exists())
+        self.assertEqual(2, len(self.test_journal_file_path.read_text().splitlines()))
+        file_a = CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')['fileA']
+        self.assertEqual({'columnA': 'dataA'}, file_a[CF.ResultsKey])
+        self.assertEqual({'weather': 'a.epw'}, file_a[CF.ParametersKey])
+
+    def test_journal_is_replayed_over_snapshot(self):
+        with mock.patch.object(CF, 'JournalMode', False):
+            CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        snapshot_text = self.test_cache_file_path.read_text()
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataC'})
+        self.assertEqual(snapshot_text, self.test_cache_file_path.read_text())
+        files = CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')
+        self.assertEqual('dataC', files['fileA'][CF.ResultsKey]['columnA'])
+        self.assertEqual('dataB', files['fileB'][CF.ResultsKey]['columnA'])
+
+    def test_journal_is_compacted_past_threshold(self):
+        with mock.patch.object(CF, 'JournalCompactBytes', 300):
+            for i in range(10):
+                CF(working_directory=self.temp_dir).add_result('workflowA', f'file{i}', {'columnA': i})
+                if not self.test_journal_file_path.exists():
+                    break
+            else:
+                self.fail('Journal was never compacted')
+        self.assertEqual(
+            [f'file{j}' for j in range(i + 1)],
+            list(json.loads(self.test_cache_file_path.read_text())[CF.RootKey]['workflowA'][CF.FilesKey])
+        )
+
+    def test_partial_journal_line_is_skipped(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        with open(self.test_journal_file_path, 'a') as f:
+            f.write('["workflowA", "fileX", "res')  # as if the program crashed in the middle of appending
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        files = CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')
+        self.assertEqual(['fileA', 'fileB'], list(files))
+
+    def test_snapshot_write_folds_in_and_removes_journal(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        with mock.patch.object(CF, 'JournalMode', False):
+            CF(working_directory=self.temp_dir).add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        self.assertFalse(self.test_journal_file_path.exists())
+        self.assertEqual(
+            ['fileA', 'fileB'],
+            list(json.loads(self.test_cache_file_path.read_text())[CF.RootKey]['workflowA'][CF.FilesKey])
+        )
+
+    def test_journal_append_invalidates_parsed_state(self):
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        self.assertEqual(['fileA'], list(CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')))
+        CF(working_directory=self.temp_dir).add_result('workflowA', 'fileB', {'columnA': 'dataB'})
+        files = CF(working_directory=self.temp_dir).get_files_for_workflow('workflowA')
+        self.assertEqual(['fileA', 'fileB'], list(files))
+
+
+def add_results_for_files(temp_dir, prefix, count):
+    c = CF(working_directory=temp_dir)
+    for i in range(count):
+        c.add_result('workflowA', f"{prefix}{i}", {'columnA': i})
+
+
+class TestCacheFileLocking(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.test_cache_file_path = self.temp_dir / CF.FileName
+
+    def test_writer_waits_for_lock_holder(self):
+        lock_acquired = threading.Event()
+        release_lock = threading.Event()
+
+        def hold_lock():
+            with cache_file_lock(self.test_cache_file_path):
+                lock_acquired.set()
+                release_lock.wait(10)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        lock_acquired.wait(10)
+        writer = threading.Thread(target=add_results_for_files, args=[self.temp_dir, 'file', 1])
+        writer.start()
+        writer.join(0.5)
+        self.assertTrue(writer.is_alive())  # still blocked behind the lock holder, not giving up on a timeout
+        self.assertFalse(self.test_cache_file_path.exists())
+        release_lock.set()
+        writer.join(10)
+        holder.join(10)
+        self.assertEqual(['file0'], list(CF(self.temp_dir).get_files_for_workflow('workflowA')))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "The lock file is only used with fcntl, only tested on POSIX systems")
+    def test_lock_file_is_removed_on_release(self):
+        with cache_file_lock(self.test_cache_file_path):
+            self.assertEqual([CF.FileName + '.lock'], [p.name for p in self.temp_dir.iterdir()])
+        self.assertEqual([], list(self.temp_dir.iterdir()))
+
+    def test_concurrent_threads_do_not_lose_results(self):
+        threads = [
+            threading.Thread(target=add_results_for_files, args=[self.temp_dir, f"thread{t}_", 10]) for t in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        self.assertEqual(40, len(CF(self.temp_dir).get_files_for_workflow('workflowA')))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Cross process locking relies on fcntl, only tested on POSIX systems")
+    def test_concurrent_processes_do_not_lose_results(self):
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=add_results_for_files, args=[self.temp_dir, f"process{p}_", 10]) for p in range(4)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join(30)
+        self.assertEqual(40, len(CF(self.temp_dir).get_files_for_workflow('workflowA')))
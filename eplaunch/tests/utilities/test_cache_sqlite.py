@@ -0,0 +1,80 @@
+import json
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from eplaunch.utilities.cache import CacheBackendType, CacheFile as CF, set_cache_backend
+from eplaunch.utilities.cache_sqlite import SqliteCacheBackend
+
+
+class TestSqliteCacheBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.run_dir = self.temp_dir / 'run'
+        self.run_dir.mkdir()
+        self.database_path = self.temp_dir / 'cache.sqlite'
+        set_cache_backend(CacheBackendType.Sqlite, self.database_path)
+        self.addCleanup(set_cache_backend, CacheBackendType.Json)
+
+    def test_backend_is_selected(self):
+        self.assertIsInstance(CF.Backend, SqliteCacheBackend)
+        with sqlite3.connect(str(self.database_path)) as connection:
+            self.assertEqual('wal', connection.execute('PRAGMA journal_mode').fetchone()[0])
+
+    def test_adding_results_and_config(self):
+        CF(self.run_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        CF(self.run_dir).add_result('workflowA', 'fileA', {'columnB': 'dataB'})
+        CF(self.run_dir).add_config('workflowA', 'fileA', {'weather': 'a.epw'})
+        CF(self.run_dir).add_config('workflowA', 'fileA', {'other': 'x'})
+        file_a = CF(self.run_dir).get_files_for_workflow('workflowA')['fileA']
+        self.assertEqual({'columnB': 'dataB'}, file_a[CF.ResultsKey])
+        self.assertEqual({'weather': 'a.epw', 'other': 'x'}, file_a[CF.ParametersKey])
+        self.assertEqual({}, CF(self.run_dir).get_files_for_workflow('workflowB'))
+        self.assertFalse((self.run_dir / CF.FileName).exists())
+
+    def test_read_builds_cache_file_layout(self):
+        CF(self.run_dir).add_result('workflowA', 'fileA', {'columnA': 'dataA'})
+        c = CF(self.run_dir)
+        c.read()
+        self.assertEqual(
+            {CF.RootKey: {'workflowA': {CF.FilesKey: {'fileA': {CF.ResultsKey: {'columnA': 'dataA'}}}}}},
+            c.workflow_state
+        )
+
+    def test_existing_cache_file_is_imported_once(self):
+        cache_file_path = self.run_dir / CF.FileName
+        cache_file_path.write_text(json.dumps(
+            {CF.RootKey: {'workflowA': {CF.FilesKey: {'fileA': {CF.ResultsKey: {'columnA': 'old'}}}}}}
+        ))
+        CF(self.run_dir).add_result('workflowA', 'fileB', {'columnA': 'new'})
+        self.assertEqual(['fileA', 'fileB'], sorted(CF(self.run_dir).get_files_for_workflow('workflowA')))
+        # a fresh backend on the same database must not import the file again over newer data
+        cache_file_path.write_text(json.dumps({CF.RootKey: {}}))
+        CF(self.run_dir).add_result('workflowA', 'fileA', {'columnA': 'newer'})
+        set_cache_backend(CacheBackendType.Sqlite, self.database_path)
+        files = CF(self.run_dir).get_files_for_workflow('workflowA')
+        self.assertEqual('newer', files['fileA'][CF.ResultsKey]['columnA'])
+
+    def test_query_across_directories(self):
+        other_dir = self.temp_dir / 'other'
+        other_dir.mkdir()
+        CF(self.run_dir).add_result('workflowA', 'fileA', {'columnA': 1})
+        CF(other_dir).add_result('workflowA', 'fileB', {'columnA': 2})
+        CF(other_dir).add_result('workflowB', 'fileC', {'columnA': 3})
+        found = CF.Backend.find_workflow_files('workflowA')
+        self.assertEqual([other_dir, self.run_dir], list(found))  # sorted by directory
+        self.assertEqual(2, found[other_dir]['fileB'][CF.ResultsKey]['columnA'])
+
+    def test_concurrent_threads_do_not_lose_results(self):
+        def add_results(prefix):
+            for i in range(20):
+                CF(self.run_dir).add_result('workflowA', f"{prefix}{i}", {'columnA': i})
+        threads = [threading.Thread(target=add_results, args=(p,)) for p in 'abcd']
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        self.assertEqual(80, len(CF(self.run_dir).get_files_for_workflow('workflowA')))
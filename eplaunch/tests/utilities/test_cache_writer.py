@@ -0,0 +1,91 @@
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from eplaunch.utilities.cache import CacheFile as CF
+from eplaunch.utilities.cache_writer import CoalescingCacheWriter
+from eplaunch.utilities.exceptions import EPLaunchFileException
+
+
+class TestCoalescingCacheWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+
+    def files_in_cache(self, workflow_name='workflow'):
+        return CF(self.temp_dir).get_files_for_workflow(workflow_name)
+
+    def test_many_results_are_written_in_one_write(self):
+        writer = CoalescingCacheWriter(flush_interval_ms=60000, max_pending_mutations=1000)
+        with mock.patch.object(CF, 'write', autospec=True, side_effect=CF.write) as mock_write:
+            for i in range(100):
+                writer.add_result(self.temp_dir, 'workflow', f'file_{i}.idf', {'column': i})
+            self.assertEqual(100, writer.num_pending())
+            writer.close()
+        self.assertEqual(1, mock_write.call_count)
+        files = self.files_in_cache()
+        self.assertEqual(100, len(files))
+        self.assertEqual(42, files['file_42.idf'][CF.ResultsKey]['column'])
+
+    def test_changes_keep_their_order(self):
+        writer = CoalescingCacheWriter(flush_interval_ms=60000)
+        writer.add_config(self.temp_dir, 'workflow', 'a.idf', {'weather': 'one.epw'})
+        writer.add_config(self.temp_dir, 'workflow', 'a.idf', {'other': 'x'})
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 2})
+        writer.flush()
+        a = self.files_in_cache()['a.idf']
+        self.assertEqual({'weather': 'one.epw', 'other': 'x'}, a[CF.ParametersKey])
+        self.assertEqual({'column': 2}, a[CF.ResultsKey])
+        writer.close()
+
+    def test_flushes_after_interval(self):
+        flushed = threading.Event()
+        writer = CoalescingCacheWriter(flush_interval_ms=10, on_flushed=lambda _: flushed.set())
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        self.assertTrue(flushed.wait(10))
+        self.assertIn('a.idf', self.files_in_cache())
+        writer.close()
+
+    def test_flushes_when_too_many_pending(self):
+        flushed = threading.Event()
+        writer = CoalescingCacheWriter(
+            flush_interval_ms=60000, max_pending_mutations=3, on_flushed=lambda _: flushed.set()
+        )
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        writer.add_result(self.temp_dir, 'workflow', 'b.idf', {'column': 1})
+        self.assertFalse(flushed.is_set())
+        writer.add_result(self.temp_dir, 'workflow', 'c.idf', {'column': 1})
+        self.assertTrue(flushed.wait(10))
+        self.assertEqual(3, len(self.files_in_cache()))
+        writer.close()
+
+    def test_directories_are_written_separately(self):
+        other_dir = pathlib.Path(tempfile.mkdtemp())
+        flushed_dirs = []
+        writer = CoalescingCacheWriter(flush_interval_ms=60000, on_flushed=flushed_dirs.append)
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        writer.add_result(other_dir, 'workflow', 'b.idf', {'column': 2})
+        writer.close()
+        self.assertEqual({self.temp_dir, other_dir}, set(flushed_dirs))
+        self.assertEqual(['a.idf'], list(self.files_in_cache()))
+        self.assertEqual(['b.idf'], list(CF(other_dir).get_files_for_workflow('workflow')))
+
+    def test_add_after_close_writes_immediately(self):
+        writer = CoalescingCacheWriter()
+        writer.close()
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        self.assertEqual(0, writer.num_pending())
+        self.assertIn('a.idf', self.files_in_cache())
+
+    def test_write_error_is_reported(self):
+        errors = []
+        writer = CoalescingCacheWriter(on_error=lambda d, e: errors.append((d, e)))
+        writer.add_result(self.temp_dir, 'workflow', 'a.idf', {'column': 1})
+        with mock.patch('eplaunch.utilities.cache.replace', side_effect=OSError('denied')):
+            writer.close()
+        self.assertEqual(1, len(errors))
+        self.assertEqual(self.temp_dir, errors[0][0])
+        self.assertIsInstance(errors[0][1], EPLaunchFileException)
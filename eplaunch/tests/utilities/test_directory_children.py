@@ -0,0 +1,96 @@
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from eplaunch.utilities import directory_children
+from eplaunch.utilities.directory_children import DirectoryChildrenCache, list_subdirectories
+
+
+class TestListSubdirectories(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        for name in ['b', 'a', 'c']:
+            (self.temp_dir / name).mkdir()
+        (self.temp_dir / 'file.idf').write_text('')
+
+    def test_only_directories_sorted(self):
+        self.assertEqual(['a', 'b', 'c'], list_subdirectories(self.temp_dir))
+
+    @unittest.skipIf(os.name == 'nt', 'creating links needs extra privileges on Windows')
+    def test_links(self):
+        (self.temp_dir / 'link_to_a').symlink_to(self.temp_dir / 'a')
+        (self.temp_dir / 'broken').symlink_to(self.temp_dir / 'missing')
+        self.assertEqual(['a', 'b', 'c', 'link_to_a'], list_subdirectories(self.temp_dir))
+
+    def test_missing_directory_is_empty(self):
+        self.assertEqual([], list_subdirectories(self.temp_dir / 'missing'))
+
+    def test_access_denied(self):
+        with mock.patch.object(directory_children.os, 'scandir', side_effect=PermissionError()):
+            self.assertIsNone(list_subdirectories(self.temp_dir))
+
+
+class TestDirectoryChildrenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        (self.temp_dir / 'a').mkdir()
+        (self.temp_dir / 'a' / 'deeper').mkdir()
+        self.listed = threading.Event()
+        self.results = []
+
+    def on_listed(self, directory, listing):
+        self.results.append((directory, listing))
+        self.listed.set()
+
+    def test_request_lists_and_remembers(self):
+        cache = DirectoryChildrenCache()
+        self.assertIsNone(cache.cached(self.temp_dir))
+        cache.request(self.temp_dir, self.on_listed)
+        self.assertTrue(self.listed.wait(10))
+        self.assertEqual([(self.temp_dir, ['a'])], self.results)
+        self.assertEqual((['a'], True), cache.cached(self.temp_dir))
+        cache.invalidate(self.temp_dir)
+        self.assertIsNone(cache.cached(self.temp_dir))
+
+    def test_listings_expire(self):
+        cache = DirectoryChildrenCache(ttl=0)
+        cache.request(self.temp_dir, self.on_listed)
+        self.assertTrue(self.listed.wait(10))
+        self.assertEqual((['a'], False), cache.cached(self.temp_dir))
+
+    def test_requests_for_one_directory_share_a_listing(self):
+        release = threading.Event()
+        real_list = directory_children.list_subdirectories
+        calls = []
+
+        def slow_list(directory):
+            calls.append(directory)
+            release.wait(10)
+            return real_list(directory)
+
+        with mock.patch.object(directory_children, 'list_subdirectories', side_effect=slow_list):
+            cache = DirectoryChildrenCache()
+            cache.request(self.temp_dir, self.on_listed)
+            cache.request(self.temp_dir, self.on_listed)
+            release.set()
+            for _ in range(100):
+                if len(self.results) == 2:
+                    break
+                threading.Event().wait(0.05)
+        self.assertEqual([(self.temp_dir, ['a'])] * 2, self.results)
+        self.assertEqual([self.temp_dir], calls)
+
+    def test_prefetch(self):
+        cache = DirectoryChildrenCache()
+        cache.prefetch([self.temp_dir / 'a', self.temp_dir])
+        for _ in range(100):
+            if cache.cached(self.temp_dir) is not None:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual((['deeper'], True), cache.cached(self.temp_dir / 'a'))
+        self.assertEqual((['a'], True), cache.cached(self.temp_dir))
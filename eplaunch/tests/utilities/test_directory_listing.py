@@ -0,0 +1,66 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from fnmatch import fnmatch
+from mimetypes import guess_type
+
+from eplaunch.utilities.directory_listing import file_type_matcher, list_workflow_files, mime_type_description
+
+
+class TestFileTypeMatcher(unittest.TestCase):
+
+    def test_matches_like_fnmatch(self):
+        patterns = ['*.idf', '*.imf', 'in?.epJSON', '[ab]*.txt']
+        names = [
+            'a.idf', 'a.IDF', 'a.idf.bak', 'b.imf', 'in1.epJSON', 'in12.epJSON', 'a.txt', 'c.txt', 'idf', '.idf',
+            'weird|name.idf', 'new\nline.idf'
+        ]
+        matches = file_type_matcher(patterns)
+        for name in names:
+            self.assertEqual(any(fnmatch(name, p) for p in patterns), matches(name), name)
+
+    def test_no_patterns_match_nothing(self):
+        self.assertFalse(file_type_matcher([])('a.idf'))
+
+    def test_matchers_are_reused(self):
+        self.assertIs(file_type_matcher(['*.idf', '*.imf']), file_type_matcher(['*.idf', '*.imf']))
+
+
+class TestMimeTypeDescription(unittest.TestCase):
+
+    def test_matches_guess_type(self):
+        for name in ['a.txt', 'b.TXT', 'c.html', 'd.tar.gz', 'e.tgz', 'f.json.bz2', 'g.csv']:
+            self.assertEqual(guess_type(name)[0], mime_type_description(name), name)
+
+    def test_unknown_types(self):
+        for name in ['a.idf', 'README', 'x.unknownextension']:
+            self.assertEqual('(unknown)', mime_type_description(name))
+
+
+class TestListWorkflowFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        for name, size in [('b.idf', 2048), ('a.idf', 10), ('c.txt', 5), ('.hidden.idf', 1)]:
+            (self.temp_dir / name).write_bytes(b'x' * size)
+        (self.temp_dir / 'folder.idf').mkdir()
+
+    def test_lists_matching_visible_files_sorted(self):
+        files = list_workflow_files(self.temp_dir, ['*.idf'])
+        self.assertEqual(['a.idf', 'b.idf'], [f[0] for f in files])
+        self.assertEqual('(unknown)', files[0][1])
+        self.assertEqual('2 KB', files[1][2].strip())
+
+    def test_multiple_patterns(self):
+        files = list_workflow_files(self.temp_dir, ['*.idf', '*.txt'])
+        self.assertEqual(['a.idf', 'b.idf', 'c.txt'], [f[0] for f in files])
+        self.assertEqual('text/plain', files[2][1])
+
+    @unittest.skipIf(os.name == 'nt', 'symlinks need extra privileges on Windows')
+    def test_links_to_files_are_listed_and_broken_links_skipped(self):
+        (self.temp_dir / 'link.idf').symlink_to(self.temp_dir / 'b.idf')
+        (self.temp_dir / 'broken.idf').symlink_to(self.temp_dir / 'missing.idf')
+        files = list_workflow_files(self.temp_dir, ['*.idf'])
+        self.assertEqual(['a.idf', 'b.idf', 'link.idf'], [f[0] for f in files])
+        self.assertEqual(files[1][2], files[2][2])  # the size is the one of the target
@@ -0,0 +1,95 @@
+import pathlib
+import tempfile
+import threading
+import unittest
+
+from eplaunch.utilities.cache import CacheFile
+from eplaunch.utilities.directory_scan import DirectoryScanThread, build_file_rows
+from eplaunch.workflows.workflow import Workflow
+
+
+def make_workflow(output_suffixes, uses_weather=True):
+    return Workflow(
+        None, 'scanWorkflow', 'context', output_suffixes, ['*.idf'], ['Errors'],
+        pathlib.Path('/workflow/dir'), 'description', is_energyplus=False, uses_weather=uses_weather, version_id=1
+    )
+
+
+class TestDirectoryScanThread(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        for i in range(7):
+            (self.temp_dir / f'file{i}.idf').write_text('')
+        (self.temp_dir / 'other.txt').write_text('')
+        self.batches = []
+        self.errors = []
+        self.done = threading.Event()
+
+    def on_batch(self, generation, rows, done):
+        self.batches.append((generation, rows, done))
+        if done:
+            self.done.set()
+
+    def on_error(self, generation, message):
+        self.errors.append((generation, message))
+        self.done.set()
+
+    def test_rows_arrive_in_batches(self):
+        scan = DirectoryScanThread(3, self.temp_dir, make_workflow([]), self.on_batch, self.on_error, batch_size=3)
+        self.assertTrue(self.done.wait(10))
+        scan.join(10)
+        self.assertEqual([(3, False), (3, False), (3, True)], [(b[0], b[2]) for b in self.batches])
+        self.assertEqual([f'file{i}.idf' for i in range(7)], [r[0] for b in self.batches for r in b[1]])
+
+    def test_rows_include_cached_data(self):
+        CacheFile(self.temp_dir).add_config('scanWorkflow', 'file1.idf', {CacheFile.WeatherFileKey: '/w/a.epw'})
+        CacheFile(self.temp_dir).add_result('scanWorkflow', 'file1.idf', {'Errors': 2})
+        DirectoryScanThread(0, self.temp_dir, make_workflow(['.err']), self.on_batch, self.on_error)
+        self.assertTrue(self.done.wait(10))
+        rows = self.batches[-1][1]
+        self.assertEqual(['file0.idf'], rows[0])
+        self.assertEqual(['file1.idf', '', 'a.epw', 2], rows[1])  # not stale, weather file name, result column
+
+    def test_no_workflow_lists_nothing(self):
+        DirectoryScanThread(0, self.temp_dir, None, self.on_batch, self.on_error)
+        self.assertTrue(self.done.wait(10))
+        self.assertEqual([(0, [], True)], self.batches)
+
+    def test_cancelled_scan_stops_calling_back(self):
+        release = threading.Event()
+
+        def blocking_on_batch(generation, rows, done):
+            self.on_batch(generation, rows, done)
+            release.wait(10)
+
+        scan = DirectoryScanThread(0, self.temp_dir, make_workflow([]), blocking_on_batch, self.on_error, batch_size=2)
+        scan.cancel()
+        release.set()
+        scan.join(10)
+        self.assertFalse(scan.is_alive())
+        self.assertLessEqual(len(self.batches), 1)
+        self.assertFalse(self.done.is_set())
+
+    def test_missing_directory_reports_error(self):
+        DirectoryScanThread(5, self.temp_dir / 'missing', make_workflow([]), self.on_batch, self.on_error)
+        self.assertTrue(self.done.wait(10))
+        self.assertEqual([], self.batches)
+        self.assertEqual(5, self.errors[0][0])
+
+
+class TestBuildFileRows(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        (self.temp_dir / 'a.idf').write_text('')
+        (self.temp_dir / 'b.idf').write_text('')
+        (self.temp_dir / 'notes.txt').write_text('')
+
+    def test_only_existing_workflow_files(self):
+        CacheFile(self.temp_dir).add_result('scanWorkflow', 'b.idf', {'Errors': 1})
+        rows = build_file_rows(self.temp_dir, make_workflow([]), ['b.idf', 'gone.idf', 'notes.txt', 'a.idf'])
+        self.assertEqual([['a.idf'], ['b.idf', '<no_weather_file>', 1]], rows)
+
+    def test_nothing_to_build(self):
+        self.assertEqual([], build_file_rows(self.temp_dir, make_workflow([]), ['gone.idf']))
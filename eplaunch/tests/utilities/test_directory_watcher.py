@@ -0,0 +1,146 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from queue import Empty, Queue
+from time import monotonic
+from unittest import mock
+
+from eplaunch.utilities.crossplatform import Platform
+from eplaunch.utilities.directory_watcher import FileChange, InotifyWatcher, PollingWatcher, watch_directory
+
+
+class BaseWatcherTests:
+    """Tests run against each kind of watcher, see the subclasses below"""
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        (self.temp_dir / 'existing.idf').write_text('')
+        (self.temp_dir / 'EPLaunchRun_existing').mkdir()
+        self.batches = Queue()
+        self.watcher = self.make_watcher()
+        self.assertTrue(self.watcher.wait_until_ready(10))
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.watcher.join(10)
+
+    def make_watcher(self):
+        raise NotImplementedError()
+
+    def on_changes(self, directory, changes):
+        self.assertEqual(self.temp_dir, directory)
+        self.batches.put(changes)
+
+    def wait_for(self, expected_change):
+        seen = []
+        while True:
+            try:
+                seen.extend(self.batches.get(timeout=10))
+            except Empty:
+                self.fail(f"Never saw {expected_change}, only {seen}")
+            if expected_change in seen:
+                return seen
+
+    def test_added_file(self):
+        (self.temp_dir / 'new.idf').write_text('x')
+        self.wait_for(FileChange(FileChange.Added, 'new.idf'))
+
+    def test_modified_file(self):
+        os.utime(self.temp_dir / 'existing.idf', (1000, 1000))
+        self.wait_for(FileChange(FileChange.Modified, 'existing.idf'))
+
+    def test_removed_file(self):
+        (self.temp_dir / 'existing.idf').unlink()
+        self.wait_for(FileChange(FileChange.Removed, 'existing.idf'))
+
+    def test_file_in_output_folder(self):
+        (self.temp_dir / 'EPLaunchRun_existing' / 'existing.err').write_text('x')
+        self.wait_for(FileChange(FileChange.Added, 'existing.err', 'EPLaunchRun_existing'))
+
+    def test_new_output_folder_is_watched(self):
+        (self.temp_dir / 'EPLaunchRun_new').mkdir()
+        self.wait_for(FileChange(FileChange.Added, None, 'EPLaunchRun_new'))
+        (self.temp_dir / 'EPLaunchRun_new' / 'new.err').write_text('x')
+        self.wait_for(FileChange(FileChange.Added, 'new.err', 'EPLaunchRun_new'))
+
+    def test_stopped_watcher_ends(self):
+        self.watcher.stop()
+        self.watcher.join(10)
+        self.assertFalse(self.watcher.is_alive())
+
+
+class TestPollingWatcher(BaseWatcherTests, unittest.TestCase):
+
+    def make_watcher(self):
+        return PollingWatcher(self.temp_dir, self.on_changes, poll_interval=0.05)
+
+
+class TestPollingWatcherListing(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        (self.temp_dir / 'existing.idf').write_text('')
+        (self.temp_dir / 'EPLaunchRun_existing').mkdir()
+        (self.temp_dir / 'EPLaunchRun_existing' / 'existing.err').write_text('')
+        # stop the thread right away, to take the snapshots here
+        self.watcher = PollingWatcher(self.temp_dir, lambda *_: None, poll_interval=60)
+        self.watcher.stop()
+        self.watcher.join(10)
+        self.old_time = 1_000_000_000
+        for path in [self.temp_dir / 'EPLaunchRun_existing', self.temp_dir]:  # as if nothing changed in a while
+            os.utime(path, ns=(self.old_time, self.old_time))
+
+    def test_only_changed_folders_are_listed(self):
+        self.watcher._take_snapshot(full=True)
+        with mock.patch.object(self.watcher, '_list_folder', wraps=self.watcher._list_folder) as list_folder:
+            self.watcher._take_snapshot(full=False)
+            list_folder.assert_not_called()
+            (self.temp_dir / 'EPLaunchRun_existing' / 'new.err').write_text('')
+            os.utime(self.temp_dir / 'EPLaunchRun_existing', ns=(self.old_time + 1, self.old_time + 1))
+            snapshot = self.watcher._take_snapshot(full=False)
+            list_folder.assert_called_once_with('EPLaunchRun_existing')
+        self.assertEqual(['existing.err', 'new.err'], sorted(snapshot['EPLaunchRun_existing']))
+        self.assertEqual(['existing.idf'], list(snapshot[None]))
+
+    def test_recently_changed_folders_are_listed_again(self):
+        os.utime(self.temp_dir, None)
+        self.watcher._take_snapshot(full=True)
+        with mock.patch.object(self.watcher, '_list_folder', wraps=self.watcher._list_folder) as list_folder:
+            self.watcher._take_snapshot(full=False)
+            list_folder.assert_called_once_with(None)
+
+    def test_full_rescan_sees_files_written_in_place(self):
+        self.watcher._snapshot = self.watcher._take_snapshot(full=True)
+        self.watcher._last_full_scan = monotonic()
+        os.utime(self.temp_dir / 'existing.idf', (1000, 1000))
+        with mock.patch.object(self.watcher._stopped, 'wait', return_value=False):
+            self.assertEqual([], self.watcher._read_changes(0))
+            self.watcher.full_rescan_interval = 0
+            self.assertEqual([FileChange(FileChange.Modified, 'existing.idf')], self.watcher._read_changes(0))
+
+
+@unittest.skipUnless(Platform.get_current_platform() == Platform.LINUX, 'inotify is only available on Linux')
+class TestInotifyWatcher(BaseWatcherTests, unittest.TestCase):
+
+    def make_watcher(self):
+        return InotifyWatcher(self.temp_dir, self.on_changes, settle_time=0.05)
+
+    def test_changes_are_batched(self):
+        for i in range(20):
+            (self.temp_dir / f'file{i}.idf').write_text('')
+        seen = self.wait_for(FileChange(FileChange.Added, 'file19.idf'))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_missing_directory_raises(self):
+        with self.assertRaises(OSError):
+            InotifyWatcher(self.temp_dir / 'missing', self.on_changes)
+
+
+class TestWatchDirectory(unittest.TestCase):
+
+    def test_starts_a_watcher(self):
+        watcher = watch_directory(pathlib.Path(tempfile.mkdtemp()), lambda *_: None)
+        self.assertTrue(watcher.is_alive())
+        watcher.stop()
+        watcher.join(10)
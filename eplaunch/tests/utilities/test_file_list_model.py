@@ -0,0 +1,81 @@
+import unittest
+
+from eplaunch.utilities.file_list_model import FileListModel
+
+
+class TestFileListModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = FileListModel()
+        self.model.upsert([
+            ('c.idf', '', 'b.epw', 3), ('a.idf', '*', 'A.epw', 10), ('b.idf',), ('D.idf', '', 'c.epw', 2)
+        ])
+
+    def names(self, start=0, count=None):
+        return [row[0] for row in self.model.view_rows(start, count)]
+
+    def test_view_is_sorted_by_name(self):
+        self.assertEqual(4, len(self.model))
+        self.assertEqual(['D.idf', 'a.idf', 'b.idf', 'c.idf'], self.names())
+        self.assertEqual(['a.idf', 'b.idf'], self.names(1, 2))
+
+    def test_upsert_replaces_rows_by_name(self):
+        self.assertTrue(self.model.upsert([('b.idf', '', 'x.epw', 1), ('e.idf',)]))
+        self.assertEqual(('b.idf', '', 'x.epw', 1), self.model.get('b.idf'))
+        self.assertEqual(5, self.model.view_count())
+        self.assertFalse(self.model.upsert([('e.idf',)]))
+
+    def test_retain_removes_other_rows(self):
+        self.assertTrue(self.model.retain(['c.idf', 'a.idf']))
+        self.assertEqual(['a.idf', 'c.idf'], self.names())
+        self.assertIsNone(self.model.get('b.idf'))
+        self.assertEqual(('c.idf', '', 'b.epw', 3), self.model.get('c.idf'))
+        self.assertFalse(self.model.retain(['c.idf', 'a.idf']))
+
+    def test_set_rows(self):
+        self.assertTrue(self.model.set_rows([('z.idf',)]))
+        self.assertEqual(['z.idf'], self.names())
+        self.assertFalse(self.model.set_rows([('z.idf',)]))
+
+    def test_sort_by_number_column(self):
+        self.model.sort_by(3)
+        self.assertEqual(['D.idf', 'c.idf', 'a.idf', 'b.idf'], self.names())  # no value last
+        self.model.sort_by(3, descending=True)
+        self.assertEqual(['b.idf', 'a.idf', 'c.idf', 'D.idf'], self.names())
+
+    def test_sort_by_text_column_ignores_case(self):
+        self.model.sort_by(2)
+        self.assertEqual(['a.idf', 'c.idf', 'D.idf', 'b.idf'], self.names())
+
+    def test_changed_values_move_rows_in_sorted_view(self):
+        self.model.sort_by(3)
+        self.assertEqual('D.idf', self.names()[0])
+        self.model.upsert([('a.idf', '*', 'A.epw', 1)])
+        self.assertEqual('a.idf', self.names()[0])
+
+    def test_filter_ignores_case(self):
+        self.model.set_filter('d.')
+        self.assertEqual(['D.idf'], self.names())
+        self.assertEqual(0, self.model.view_position('D.idf'))
+        self.assertIsNone(self.model.view_position('a.idf'))
+        self.model.set_filter('')
+        self.assertEqual(4, self.model.view_count())
+
+    def test_view_position(self):
+        self.assertEqual(2, self.model.view_position('b.idf'))
+        self.model.upsert([('B.idf',)])
+        self.assertEqual(3, self.model.view_position('b.idf'))
+        self.assertIsNone(self.model.view_position('missing.idf'))
+
+    def test_view_names_between(self):
+        self.assertEqual(['a.idf', 'b.idf', 'c.idf'], self.model.view_names_between('a.idf', 'c.idf'))
+        self.assertEqual(['a.idf', 'b.idf', 'c.idf'], self.model.view_names_between('c.idf', 'a.idf'))
+        self.assertEqual(['b.idf'], self.model.view_names_between('b.idf', 'b.idf'))
+        self.model.set_filter('c')
+        self.assertEqual([], self.model.view_names_between('a.idf', 'c.idf'))
+
+    def test_remove(self):
+        self.assertTrue(self.model.remove(['a.idf', 'missing.idf']))
+        self.assertEqual(['D.idf', 'b.idf', 'c.idf'], self.names())
+        self.assertEqual(['D.idf', 'b.idf', 'c.idf'], sorted(self.model.names()))
+        self.assertFalse(self.model.remove(['missing.idf']))
@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+from eplaunch.utilities import idf_tokenizer
+from eplaunch.utilities.idf_tokenizer import IDFObjectIndex, find_idf_object, iter_idf_objects
+
+IDF_CONTENTS = b"""! a comment; with a separator, and a comma
+  Version,8.9;
+Zone,
+  Zone One,   !- Name
+  0;          !- Direction of Relative North
+Zone, Zone Two, 0; Zone, Zone Three;
+
+RunPeriod,
+  ,           !- Name
+  1;
+RunPeriodControl:SpecialDays, New Years Day, January 1;
+SizingPeriod:DesignDay,Winter;
+Site:Location, Somewhere \xc2\xb0C, 39.77;
+"""
+
+
+class TestIterIDFObjects(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = Path(tempfile.mkdtemp()) / 'in.idf'
+        self.file_path.write_bytes(IDF_CONTENTS)
+
+    def objects(self, **kwargs):
+        return list(iter_idf_objects(self.file_path, encoding='utf-8', **kwargs))
+
+    def test_objects(self):
+        objects = self.objects()
+        self.assertEqual(
+            ['Version', 'Zone', 'Zone', 'Zone', 'RunPeriod', 'RunPeriodControl:SpecialDays', 'SizingPeriod:DesignDay',
+             'Site:Location'],
+            [object_type for object_type, _ in objects]
+        )
+        self.assertEqual(['Version', '8.9'], objects[0][1])
+        self.assertEqual(['Zone', 'Zone One', '0'], objects[1][1])
+        self.assertEqual(['Zone', 'Zone Two', '0'], objects[2][1])
+        self.assertEqual(['Zone', 'Zone Three'], objects[3][1])
+        self.assertEqual(['RunPeriod', '', '1'], objects[4][1])
+        self.assertEqual(['Site:Location', 'Somewhere °C', '39.77'], objects[7][1])
+
+    def test_windows_line_endings(self):
+        expected = self.objects()
+        self.file_path.write_bytes(IDF_CONTENTS.replace(b'\n', b'\r\n'))
+        self.assertEqual(expected, self.objects())
+
+    def test_small_blocks(self):
+        expected = self.objects()
+        with mock.patch.object(idf_tokenizer, 'BlockSize', 7):
+            self.assertEqual(expected, self.objects())
+
+    def test_bad_encoding(self):
+        self.file_path.write_bytes(IDF_CONTENTS + b'! 20\xb0C\n')
+        with self.assertRaises(UnicodeDecodeError):
+            self.objects()
+
+    def test_no_trailing_newline(self):
+        self.file_path.write_bytes(b'Version,9.6;\nZone,Last;')
+        self.assertEqual([('Version', ['Version', '9.6']), ('Zone', ['Zone', 'Last'])], self.objects())
+
+    def test_unterminated_object_is_dropped(self):
+        self.file_path.write_bytes(b'Version,9.6;\nZone,Last\n')
+        self.assertEqual([('Version', ['Version', '9.6'])], self.objects())
+
+
+class TestIDFObjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = Path(tempfile.mkdtemp()) / 'in.idf'
+        self.file_path.write_bytes(IDF_CONTENTS)
+
+    def test_index(self):
+        index = IDFObjectIndex(self.file_path, 'utf-8')
+        self.assertEqual(3, index.count('ZONE'))
+        self.assertEqual(0, index.count('Building'))
+        self.assertEqual(2, index.count_starting_with('runperiod'))
+        self.assertEqual(['Zone', 'Zone One', '0'], index.first_fields('zone'))
+        self.assertEqual(['Version', '8.9'], index.first_fields('version'))
+        self.assertEqual(['Site:Location', 'Somewhere °C', '39.77'], index.first_fields('Site:Location'))
+        self.assertIsNone(index.first_fields('Building'))
+
+    def test_types_ignore_case(self):
+        self.file_path.write_bytes(b'ZONE,One;\nZone,Two;\nzone,Three;\n')
+        index = IDFObjectIndex(self.file_path, 'utf-8')
+        self.assertEqual(3, index.count('Zone'))
+        self.assertEqual(['ZONE', 'One'], index.first_fields('zone'))
+
+
+class TestFindIDFObject(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = Path(tempfile.mkdtemp()) / 'in.idf'
+
+    def test_find(self):
+        self.file_path.write_bytes(b'Version,\n  9.6;\nZone,One;\n')
+        self.assertEqual(['Version', '9.6'], find_idf_object(self.file_path, 'VERSION'))
+        self.assertIsNone(find_idf_object(self.file_path, 'Building'))
+
+    def test_reads_only_up_to_the_object(self):
+        # bad text further into the file than the first block doesn't matter if the object comes before it
+        self.file_path.write_bytes(b'Version,9.6;\n' + b'! padding\n' * 10000 + b'! 20\xb0C\n')
+        self.assertGreater(os.path.getsize(self.file_path), idf_tokenizer.BlockSize)
+        self.assertEqual(['Version', '9.6'], find_idf_object(self.file_path, 'Version'))
@@ -0,0 +1,132 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from eplaunch.utilities import output_index
+from eplaunch.utilities.output_index import OutputIndex, output_folder_name
+
+
+class TestOutputFolderName(unittest.TestCase):
+
+    def test_output_folder_name(self):
+        self.assertEqual('EPLaunchRun_in', output_folder_name('in.idf'))
+        self.assertEqual('EPLaunchRun_in.v2', output_folder_name('in.v2.idf'))
+
+
+class TestOutputIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        for name in ['fresh', 'stale', 'no_outputs', 'no_err']:
+            (self.temp_dir / f'{name}.idf').write_text('')
+            os.utime(self.temp_dir / f'{name}.idf', (2000, 2000))
+        for name, suffix, mtime in [('fresh', '.err', 3000), ('stale', '.err', 1000), ('stale', '.csv', 3000),
+                                    ('no_err', '.csv', 1000)]:
+            (self.temp_dir / f'EPLaunchRun_{name}').mkdir(exist_ok=True)
+            output_file = self.temp_dir / f'EPLaunchRun_{name}' / f'{name}{suffix}'
+            output_file.write_text('')
+            os.utime(output_file, (mtime, mtime))
+        self.input_files = ['fresh.idf', 'stale.idf', 'no_outputs.idf', 'no_err.idf', 'missing.idf']
+        self.index = OutputIndex(self.temp_dir)
+
+    def test_no_output_suffixes(self):
+        self.assertEqual({f: None for f in self.input_files}, self.index.stale_states(self.input_files, []))
+
+    def test_only_err_file_is_checked_when_listed(self):
+        expected = {'fresh.idf': False, 'stale.idf': True, 'no_outputs.idf': False, 'no_err.idf': False,
+                    'missing.idf': False}
+        self.assertEqual(expected, self.index.stale_states(self.input_files, ['.csv', '.err']))
+
+    def test_any_older_output_is_stale(self):
+        expected = {'fresh.idf': False, 'stale.idf': False, 'no_outputs.idf': False, 'no_err.idf': True,
+                    'missing.idf': False}
+        self.assertEqual(expected, self.index.stale_states(self.input_files, ['.csv']))
+        self.assertEqual({f: False for f in self.input_files}, self.index.stale_states(self.input_files, ['.htm']))
+
+    def test_unchanged_folders_are_not_listed_again(self):
+        self.index.stale_states(self.input_files, ['.err'])
+        with mock.patch.object(output_index.os, 'scandir', wraps=os.scandir) as scandir:
+            self.index.stale_states(self.input_files, ['.err'])
+            self.assertEqual(0, scandir.call_count)
+            (self.temp_dir / 'EPLaunchRun_fresh' / 'fresh.csv').write_text('')
+            self.index.stale_states(self.input_files, ['.err'])
+            self.assertEqual(1, scandir.call_count)
+
+    def test_new_output_folder(self):
+        self.index.stale_states(self.input_files, ['.err'])
+        (self.temp_dir / 'EPLaunchRun_no_outputs').mkdir()
+        (self.temp_dir / 'EPLaunchRun_no_outputs' / 'no_outputs.err').write_text('')
+        os.utime(self.temp_dir / 'EPLaunchRun_no_outputs' / 'no_outputs.err', (1000, 1000))
+        self.assertTrue(self.index.stale_states(['no_outputs.idf'], ['.err'])['no_outputs.idf'])
+
+    def test_invalidate_after_rewrite_in_place(self):
+        self.assertFalse(self.index.stale_states(['fresh.idf'], ['.err'])['fresh.idf'])
+        folder = self.temp_dir / 'EPLaunchRun_fresh'
+        folder_stat = os.stat(folder)
+        os.utime(folder / 'fresh.err', (1000, 1000))
+        os.utime(folder, ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns))
+        self.assertFalse(self.index.stale_states(['fresh.idf'], ['.err'])['fresh.idf'])  # still the known time
+        self.index.invalidate('EPLaunchRun_fresh')
+        self.assertTrue(self.index.stale_states(['fresh.idf'], ['.err'])['fresh.idf'])
+
+
+class TestOutputIndexLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = pathlib.Path(tempfile.mkdtemp())
+        (self.temp_dir / 'in.idf').write_text('')
+        (self.temp_dir / 'in.csv').write_text('')
+        (self.temp_dir / 'EPLaunchRun_in').mkdir()
+        (self.temp_dir / 'EPLaunchRun_in' / 'in.err').write_text('')
+        (self.temp_dir / 'EPLaunchRun_in' / 'in.csv').write_text('')
+        self.index = OutputIndex(self.temp_dir)
+
+    def test_output_paths(self):
+        self.assertEqual(
+            (self.temp_dir / 'in.csv', self.temp_dir / 'EPLaunchRun_in' / 'in.csv'),
+            self.index.output_paths('in.idf', '.csv')
+        )
+        self.assertEqual((None, self.temp_dir / 'EPLaunchRun_in' / 'in.err'), self.index.output_paths('in.idf', '.err'))
+        self.assertEqual((None, None), self.index.output_paths('in.idf', '.htm'))
+        self.assertEqual((None, None), self.index.output_paths('other.idf', '.err'))
+        self.assertTrue(self.index.has_output('in.idf', '.err'))
+        self.assertFalse(self.index.has_output('in.idf', '.htm'))
+
+    def test_lookups_do_not_touch_the_disk_once_listed(self):
+        self.index.stale_states(['in.idf'], [])
+        with mock.patch.object(output_index.os, 'scandir') as scandir, \
+                mock.patch.object(output_index.os, 'stat') as stat:
+            for _ in range(3):
+                self.index.has_output('in.idf', '.err')
+                self.index.has_output('other.idf', '.err')
+            scandir.assert_not_called()
+            stat.assert_not_called()
+
+    def test_changes_are_applied(self):
+        self.assertFalse(self.index.has_output('in.idf', '.htm'))
+        self.index.file_added('in.htm', 'EPLaunchRun_in')
+        self.assertTrue(self.index.has_output('in.idf', '.htm'))
+        self.index.file_removed('in.csv')
+        self.index.file_removed('in.csv', 'EPLaunchRun_in')
+        self.assertFalse(self.index.has_output('in.idf', '.csv'))
+        self.index.file_added('new.err')
+        self.assertEqual((self.temp_dir / 'new.err', None), self.index.output_paths('new.idf', '.err'))
+
+    def test_added_and_removed_output_folders(self):
+        self.index.has_output('in.idf', '.err')
+        (self.temp_dir / 'EPLaunchRun_new').mkdir()
+        (self.temp_dir / 'EPLaunchRun_new' / 'new.err').write_text('')
+        self.index.file_added(None, 'EPLaunchRun_new')
+        self.assertTrue(self.index.has_output('new.idf', '.err'))
+        self.index.file_removed(None, 'EPLaunchRun_in')
+        self.assertFalse(self.index.has_output('in.idf', '.err'))
+
+    def test_modified_output_time_is_read_again(self):
+        os.utime(self.temp_dir / 'in.idf', (2000, 2000))
+        os.utime(self.temp_dir / 'EPLaunchRun_in' / 'in.err', (3000, 3000))
+        self.assertFalse(self.index.stale_states(['in.idf'], ['.err'])['in.idf'])
+        os.utime(self.temp_dir / 'EPLaunchRun_in' / 'in.err', (1000, 1000))
+        self.index.file_modified('in.err', 'EPLaunchRun_in')
+        self.assertTrue(self.index.stale_states(['in.idf'], ['.err'])['in.idf'])
@@ -0,0 +1,81 @@
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+from eplaunch.utilities.cache import CacheFile
+from eplaunch.workflows.batch_runner import cli
+from eplaunch.workflows.install_finder import InstallCache
+
+
+class TestBatchRunner(unittest.TestCase):
+    workflow_file_contents = """
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+class BatchWorkflow(BaseEPLaunchWorkflow1):
+    def name(self): return 'batch'
+    def context(self): return 'theseWorkflows'
+    def description(self): return 'Batch workflow'
+    def get_file_types(self): return ['*.txt']
+    def get_output_suffixes(self): return []
+    def get_interface_columns(self): return ['length']
+    def uses_weather(self): return True
+    def main(self, run_directory, file_name, args):
+        contents = (run_directory / file_name).read_text()
+        if contents == 'fail':
+            return EPLaunchWorkflowResponse1(success=False, message='Failed', column_data={})
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={'length': len(contents)})
+"""
+
+    def setUp(self):
+        self.workflow_dir = Path(tempfile.mkdtemp())
+        (self.workflow_dir / 'batch_workflow.py').write_text(self.workflow_file_contents)
+        self.run_dir_a = Path(tempfile.mkdtemp())
+        self.run_dir_b = Path(tempfile.mkdtemp())
+        (self.run_dir_a / 'one.txt').write_text('1')
+        (self.run_dir_a / 'two.txt').write_text('22')
+        (self.run_dir_a / 'skipped.pdf').write_text('333')
+        (self.run_dir_b / 'three.txt').write_text('333')
+        # keep the workflow manifest and install cache out of the home directory, and don't search for installs
+        cache_dir = Path(tempfile.mkdtemp())
+        InstallCache(cache_dir / 'installs.json').save([])
+        self.manager_options = [
+            '--workflow-manifest', str(cache_dir / 'manifest.json'), '--install-cache', str(cache_dir / 'installs.json')
+        ]
+
+    def run_cli(self, *targets: str) -> int:
+        return cli(
+            ['-w', 'batch', '-d', str(self.workflow_dir), '--skip-ep-search', '-j', '2', '--weather', 'my.epw']
+            + self.manager_options + list(targets)
+        )
+
+    def test_directory_globs(self):
+        # the weather is queued along with the results, instead of rewriting the cache file for each file up front
+        with mock.patch.object(CacheFile, 'add_config', side_effect=AssertionError('config written directly')):
+            self.assertEqual(0, self.run_cli(str(self.run_dir_a), str(self.run_dir_b / '*.txt')))
+        files_a = CacheFile(self.run_dir_a).get_files_for_workflow('batch')
+        self.assertEqual(['one.txt', 'two.txt'], sorted(files_a))
+        self.assertEqual(2, files_a['two.txt'][CacheFile.ResultsKey]['length'])
+        weather = files_a['two.txt'][CacheFile.ParametersKey][CacheFile.WeatherFileKey]
+        self.assertEqual(str(Path('my.epw').resolve()), weather)
+        files_b = CacheFile(self.run_dir_b).get_files_for_workflow('batch')
+        self.assertEqual(3, files_b['three.txt'][CacheFile.ResultsKey]['length'])
+
+    def test_group_file(self):
+        group_file = self.run_dir_b / 'my_group.epg3'
+        group_file.write_text(f"{self.run_dir_a / 'one.txt'}\n{self.run_dir_b / 'three.txt'}\n")
+        self.assertEqual(0, self.run_cli(str(group_file)))
+        self.assertEqual(['one.txt'], list(CacheFile(self.run_dir_a).get_files_for_workflow('batch')))
+        self.assertEqual(['three.txt'], list(CacheFile(self.run_dir_b).get_files_for_workflow('batch')))
+
+    def test_failures_give_nonzero_exit_code(self):
+        (self.run_dir_b / 'bad.txt').write_text('fail')
+        self.assertEqual(1, self.run_cli(str(self.run_dir_b)))
+        files_b = CacheFile(self.run_dir_b).get_files_for_workflow('batch')
+        self.assertIn(CacheFile.ResultsKey, files_b['three.txt'])
+        self.assertNotIn(CacheFile.ResultsKey, files_b['bad.txt'])
+
+    def test_bad_workflow_name_or_targets(self):
+        self.assertEqual(
+            2, cli(['-w', 'unknown', '-d', str(self.workflow_dir), '--skip-ep-search', 'x'] + self.manager_options)
+        )
+        self.assertEqual(2, self.run_cli(str(self.run_dir_a / '*.idf')))
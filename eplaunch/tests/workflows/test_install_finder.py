@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+import tempfile
+from threading import Event
+from time import monotonic, time
+import unittest
+from unittest import mock
+
+from eplaunch.workflows import install_finder
+from eplaunch.workflows.install_finder import InstallCache, find_workflow_directories, \
+    find_workflow_directories_in_root
+from eplaunch.workflows.manager import WorkflowManager
+from eplaunch.workflows.manifest import WorkflowManifest
+
+
+class TestFindWorkflowDirectories(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for install_name in ['EnergyPlus-9-6-0', 'EnergyPlus-23-1-0', 'Something-else']:
+            (self.root / install_name / 'workflows').mkdir(parents=True)
+        (self.root / 'EnergyPlus-no-workflows').mkdir()
+        (self.root / 'EnergyPlus-a-file').write_text('')
+
+    def test_find_in_root(self):
+        self.assertEqual(
+            [self.root / 'EnergyPlus-23-1-0' / 'workflows', self.root / 'EnergyPlus-9-6-0' / 'workflows'],
+            find_workflow_directories_in_root(self.root, ['EnergyPlus*', 'EP*'])
+        )
+
+    def test_missing_root(self):
+        self.assertEqual([], find_workflow_directories_in_root(self.root / 'missing', ['EnergyPlus*']))
+
+    def test_unresponsive_root_is_skipped(self):
+        stuck_root = self.root / 'stuck'
+        release = Event()
+        real_find = find_workflow_directories_in_root
+
+        def find(search_root, names):
+            if search_root == stuck_root:
+                release.wait(10)
+            return real_find(search_root, names)
+
+        with mock.patch.object(install_finder, 'find_workflow_directories_in_root', side_effect=find):
+            start_time = monotonic()
+            found = find_workflow_directories([stuck_root, self.root, self.root], ['EnergyPlus*'], 0.2)
+            release.set()
+        self.assertLess(monotonic() - start_time, 5)
+        self.assertEqual(2, len(found))  # and the root that was searched twice is only reported once
+
+
+class TestInstallCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_path = Path(tempfile.mkdtemp()) / 'installs.json'
+        self.workflow_dirs = [Path(tempfile.mkdtemp()) for _ in range(2)]
+
+    def test_nothing_cached(self):
+        self.assertIsNone(InstallCache(self.cache_path).load())
+        self.cache_path.write_text('{"searched_at": "soon"}')
+        self.assertIsNone(InstallCache(self.cache_path).load())
+
+    def test_cached_directories_that_are_gone_are_dropped(self):
+        InstallCache(self.cache_path).save(self.workflow_dirs)
+        self.assertEqual((self.workflow_dirs, True), InstallCache(self.cache_path).load())
+        self.workflow_dirs[0].rmdir()
+        self.assertEqual((self.workflow_dirs[1:], True), InstallCache(self.cache_path).load())
+        self.assertEqual([self.cache_path.name], [p.name for p in self.cache_path.parent.iterdir()])
+
+    def test_expired(self):
+        self.cache_path.write_text(json.dumps({
+            'searched_at': time() - 100, 'workflow_directories': [str(d) for d in self.workflow_dirs]
+        }))
+        self.assertEqual((self.workflow_dirs, False), InstallCache(self.cache_path, ttl=10).load())
+
+
+class TestManagerInstallCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_path = Path(tempfile.mkdtemp()) / 'installs.json'
+        self.manifest = WorkflowManifest(Path(tempfile.mkdtemp()) / 'manifest.json')
+        self.workflow_dir = Path(tempfile.mkdtemp())
+
+    def test_first_manager_searches_and_later_ones_use_the_cache(self):
+        with mock.patch('eplaunch.workflows.manager.find_workflow_directories', return_value=[self.workflow_dir]):
+            manager = WorkflowManager(self.manifest, InstallCache(self.cache_path))
+        self.assertEqual([self.workflow_dir], manager.auto_found_workflow_dirs)
+        with mock.patch('eplaunch.workflows.manager.find_workflow_directories', side_effect=AssertionError()):
+            manager = WorkflowManager(self.manifest, InstallCache(self.cache_path))
+            self.assertEqual([self.workflow_dir], manager.auto_found_workflow_dirs)
+            self.assertEqual([self.workflow_dir], manager.workflow_directories)
+            self.assertFalse(manager.auto_find_workflow_directories_in_background(lambda found: None))
+
+    def test_stale_cache_is_searched_again_in_the_background(self):
+        InstallCache(self.cache_path).save([self.workflow_dir])
+        new_dir = Path(tempfile.mkdtemp())
+        manager = WorkflowManager(self.manifest, InstallCache(self.cache_path, ttl=0))
+        found_event = Event()
+        found_dirs = []
+
+        def on_found(found):
+            found_dirs.extend(found)
+            found_event.set()
+
+        with mock.patch(
+                'eplaunch.workflows.manager.find_workflow_directories', return_value=[self.workflow_dir, new_dir]
+        ):
+            self.assertTrue(manager.auto_find_workflow_directories_in_background(on_found))
+            self.assertTrue(found_event.wait(10))
+        self.assertFalse(manager.auto_find_workflow_directories_in_background(on_found))  # only once
+        self.assertEqual([new_dir], manager.merge_auto_found_workflow_directories(found_dirs))
+        self.assertEqual([self.workflow_dir, new_dir], manager.auto_found_workflow_dirs)
+        self.assertEqual([self.workflow_dir, new_dir], InstallCache(self.cache_path).load()[0])
@@ -1,16 +1,34 @@
 import os
+import sys
 from pathlib import Path
 import tempfile
+from typing import Optional
 import unittest
 
+from eplaunch.utilities.exceptions import EPLaunchFileException
+from eplaunch.workflows.install_finder import InstallCache
 from eplaunch.workflows.manager import WorkflowManager
+from eplaunch.workflows.manifest import WorkflowManifest
+
+
+def temporary_manager(manifest_path: Optional[Path] = None) -> WorkflowManager:
+    """
+    Creates a workflow manager that keeps its manifest and install cache in temporary files instead of the home
+    directory, with an install cache that already holds an empty search, so no EnergyPlus installs are searched for
+    """
+    install_cache = InstallCache(Path(tempfile.mkdtemp()) / 'installs.json')
+    install_cache.save([])
+    return WorkflowManager(WorkflowManifest(manifest_path or Path(tempfile.mkdtemp()) / 'manifest.json'), install_cache)
 
 
 class TestGetWorkflows(unittest.TestCase):
 
     def setUp(self):
         self.extra_workflow_dir = Path(tempfile.mkdtemp())
-        self.workflow_manager = WorkflowManager()
+        self.workflow_manager = WorkflowManager(
+            WorkflowManifest(Path(tempfile.mkdtemp()) / 'manifest.json'),
+            InstallCache(Path(tempfile.mkdtemp()) / 'installs.json')
+        )
 
     def test_default_behavior_with_builtins(self):
         self.workflow_manager.instantiate_all_workflows(disable_builtins=False)
@@ -160,3 +178,260 @@ class SiteLocationWorkflow(BaseEPLaunchWorkflow1):
             self.assertEqual(0, len(self.workflow_manager.auto_found_workflow_dirs))
         else:
             self.assertIsInstance(self.workflow_manager.auto_found_workflow_dirs, list)
+
+
+class TestWorkflowManifest(unittest.TestCase):
+    file_contents = """
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+class ManifestWorkflow(BaseEPLaunchWorkflow1):
+    def name(self): return '%s'
+    def context(self): return 'theseWorkflows'
+    def description(self): return 'Manifest workflow'
+    def get_file_types(self): return ['*.txt', '*.pdf']
+    def get_output_suffixes(self): return ['.out']
+    def get_interface_columns(self): return ['dummy']
+    def uses_weather(self): return True
+    def main(self, run_directory, file_name, args):
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={})
+"""
+
+    def setUp(self):
+        self.workflow_dir = Path(tempfile.mkdtemp())
+        self.workflow_file = self.workflow_dir / 'manifest_workflow.py'
+        self.workflow_file.write_text(self.file_contents % 'first')
+        self.manifest_path = Path(tempfile.mkdtemp()) / 'manifest.json'
+
+    def instantiate(self) -> WorkflowManager:
+        manager = temporary_manager(self.manifest_path)
+        manager.instantiate_all_workflows(
+            extra_workflow_dir=self.workflow_dir, disable_builtins=True, skip_ep_search=True
+        )
+        return manager
+
+    def test_unchanged_workflow_file_is_not_imported_again(self):
+        imported = self.instantiate().workflows[0]
+        self.assertTrue(imported.class_is_loaded)
+        self.assertTrue(self.manifest_path.exists())
+        manager = self.instantiate()
+        self.assertEqual(1, len(manager.workflows))
+        from_manifest = manager.workflows[0]
+        self.assertFalse(from_manifest.class_is_loaded)
+        for attribute in ['name', 'context', 'file_types', 'output_suffixes', 'columns', 'uses_weather',
+                          'description', 'module_path', 'class_name']:
+            self.assertEqual(getattr(imported, attribute), getattr(from_manifest, attribute))
+        self.assertEqual({'theseWorkflows'}, manager.workflow_contexts)
+        # the class is imported once it is needed
+        workflow_class = from_manifest.workflow_class
+        self.assertEqual('ManifestWorkflow', workflow_class.__name__)
+        self.assertEqual('first', workflow_class().name())
+        self.assertTrue(from_manifest.class_is_loaded)
+        self.assertIs(workflow_class, from_manifest.workflow_class)
+
+    def test_modified_workflow_file_is_imported_again(self):
+        self.assertEqual('first', self.instantiate().workflows[0].name)
+        self.workflow_file.write_text(self.file_contents % 'second, and longer')
+        workflow = self.instantiate().workflows[0]
+        self.assertEqual('second, and longer', workflow.name)
+        self.assertTrue(workflow.class_is_loaded)
+
+    def test_broken_workflow_files_are_imported_again(self):
+        broken_file = self.workflow_dir / 'broken_workflow.py'
+        broken_file.write_text('import package_that_is_not_installed\n')
+        manager = self.instantiate()
+        self.assertEqual(1, len(manager.warnings))
+        self.assertNotIn(str(broken_file), self.manifest_path.read_text())
+        manager = self.instantiate()
+        self.assertEqual(1, len(manager.warnings))
+        self.assertIn(broken_file, manager.import_timings)
+        # as if the package got installed, without the workflow file changing
+        (self.workflow_dir / 'package_that_is_not_installed.py').write_text('')
+        sys.path.insert(0, str(self.workflow_dir))
+        try:
+            manager.instantiate_all_workflows(
+                extra_workflow_dir=self.workflow_dir, disable_builtins=True, skip_ep_search=True
+            )
+        finally:
+            sys.path.remove(str(self.workflow_dir))
+            sys.modules.pop('package_that_is_not_installed', None)
+        self.assertEqual([], manager.warnings)
+        self.assertIn(str(broken_file), self.manifest_path.read_text())
+
+    def test_removed_workflow_files_are_dropped(self):
+        self.instantiate()
+        self.workflow_file.unlink()
+        self.assertEqual(0, len(self.instantiate().workflows))
+        self.assertNotIn(str(self.workflow_file), self.manifest_path.read_text())
+
+    def test_manifest_is_written_without_leaving_temporary_files(self):
+        self.instantiate()
+        self.instantiate()
+        self.assertEqual([self.manifest_path.name], [p.name for p in self.manifest_path.parent.iterdir()])
+
+    def test_other_manifest_contents_are_ignored(self):
+        self.manifest_path.write_text('{"format": 0, "files": {}}')
+        self.assertTrue(self.instantiate().workflows[0].class_is_loaded)
+        self.manifest_path.write_text('not json')
+        self.assertTrue(self.instantiate().workflows[0].class_is_loaded)
+
+    def test_missing_workflow_class_raises(self):
+        self.instantiate()
+        manager = self.instantiate()
+        self.workflow_file.write_text('')
+        with self.assertRaises(EPLaunchFileException):
+            _ = manager.workflows[0].workflow_class
+
+
+class TestParallelImport(unittest.TestCase):
+    file_contents = """
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+class ParallelWorkflow(BaseEPLaunchWorkflow1):
+    def name(self): return 'same name'
+    def context(self): return '%s'
+    def description(self): return 'Parallel workflow'
+    def get_file_types(self): return ['*.txt']
+    def get_output_suffixes(self): return []
+    def get_interface_columns(self): return []
+    def main(self, run_directory, file_name, args):
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={})
+"""
+
+    def setUp(self):
+        self.workflow_dirs = [Path(tempfile.mkdtemp()) for _ in range(4)]
+        for i, workflow_dir in enumerate(self.workflow_dirs):
+            for file_name in ['b_workflow.py', 'a_workflow.py']:
+                (workflow_dir / file_name).write_text(self.file_contents % f"context {i} {file_name}")
+            (workflow_dir / 'broken_workflow.py').write_text(f"this is broken {i}\n")
+        self.manifest_path = Path(tempfile.mkdtemp()) / 'manifest.json'
+
+    def instantiate(self) -> WorkflowManager:
+        manager = temporary_manager(self.manifest_path)
+        manager.workflow_directories = list(self.workflow_dirs)
+        manager.instantiate_all_workflows(disable_builtins=True)
+        return manager
+
+    def test_order_is_deterministic(self):
+        manager = self.instantiate()
+        # all the workflows have the same description, so they stay in directory and then file order
+        expected_contexts = [f"context {i} {f}" for i in range(4) for f in ['a_workflow.py', 'b_workflow.py']]
+        self.assertEqual(expected_contexts, [w.context for w in manager.workflows])
+        self.assertEqual(4, len(manager.warnings))
+        for i, warning in enumerate(manager.warnings):
+            self.assertIn(str(self.workflow_dirs[i]), warning)
+        # the same result from the manifest, with the broken files imported again
+        from_manifest = self.instantiate()
+        self.assertEqual(expected_contexts, [w.context for w in from_manifest.workflows])
+        self.assertEqual(manager.warnings, from_manifest.warnings)
+        self.assertEqual({d / 'broken_workflow.py' for d in self.workflow_dirs}, set(from_manifest.import_timings))
+
+    def test_import_timings(self):
+        manager = self.instantiate()
+        self.assertEqual(
+            {d / f for d in self.workflow_dirs for f in ['a_workflow.py', 'b_workflow.py', 'broken_workflow.py']},
+            set(manager.import_timings)
+        )
+        self.assertTrue(all(seconds >= 0 for seconds in manager.import_timings.values()))
+        # files found in the manifest aren't imported, so they aren't timed
+        (self.workflow_dirs[2] / 'a_workflow.py').write_text(self.file_contents % 'changed context')
+        self.assertEqual(
+            {self.workflow_dirs[2] / 'a_workflow.py'} | {d / 'broken_workflow.py' for d in self.workflow_dirs},
+            set(self.instantiate().import_timings)
+        )
+
+
+class TestIncrementalReload(unittest.TestCase):
+    file_contents = """
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+counter = 0
+class ReloadWorkflow(BaseEPLaunchWorkflow1):
+    def name(self): return '%s'
+    def context(self): return 'theseWorkflows'
+    def description(self): return 'Reload workflow'
+    def get_file_types(self): return ['*.txt']
+    def get_output_suffixes(self): return []
+    def get_interface_columns(self): return []
+    def main(self, run_directory, file_name, args):
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={})
+"""
+
+    def setUp(self):
+        self.workflow_dir = Path(tempfile.mkdtemp())
+        for name in ['a', 'b']:
+            (self.workflow_dir / f'{name}_workflow.py').write_text(self.file_contents % name)
+        self.manager = temporary_manager()
+        self.manager.workflow_directories = [self.workflow_dir]
+
+    def reload(self):
+        self.manager.instantiate_all_workflows(disable_builtins=True)
+        return {w.name: w for w in self.manager.workflows}
+
+    def test_unchanged_workflows_are_kept(self):
+        first = self.reload()
+        self.assertEqual(2, len(self.manager.import_timings))
+        second = self.reload()
+        self.assertEqual({}, self.manager.import_timings)
+        self.assertIs(first['a'], second['a'])
+        self.assertIs(first['b'], second['b'])
+
+    def test_only_changed_files_are_imported(self):
+        first = self.reload()
+        (self.workflow_dir / 'b_workflow.py').write_text(self.file_contents % 'b, edited')
+        (self.workflow_dir / 'c_workflow.py').write_text(self.file_contents % 'c')
+        second = self.reload()
+        self.assertEqual(
+            {self.workflow_dir / 'b_workflow.py', self.workflow_dir / 'c_workflow.py'}, set(self.manager.import_timings)
+        )
+        self.assertEqual(['a', 'b, edited', 'c'], sorted(second))
+        self.assertIs(first['a'], second['a'])
+        self.assertEqual('b, edited', second['b, edited'].workflow_class().name())
+
+    def test_removed_files_are_dropped(self):
+        self.reload()
+        (self.workflow_dir / 'a_workflow.py').unlink()
+        self.assertEqual(['b'], sorted(self.reload()))
+        self.manager.workflow_directories = []
+        self.assertEqual({}, self.reload())
+
+    def test_each_file_gets_its_own_module(self):
+        workflows = self.reload()
+        self.assertNotEqual(workflows['a'].workflow_class.__module__, workflows['b'].workflow_class.__module__)
+
+
+class TestWorkflowLookup(unittest.TestCase):
+    file_contents = """
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+class LookupWorkflow(BaseEPLaunchWorkflow1):
+    def name(self): return '%s'
+    def context(self): return '%s'
+    def description(self): return 'Lookup workflow'
+    def get_file_types(self): return ['*.txt']
+    def get_output_suffixes(self): return []
+    def get_interface_columns(self): return []
+    def main(self, run_directory, file_name, args):
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={})
+"""
+
+    def setUp(self):
+        self.workflow_dir = Path(tempfile.mkdtemp())
+        for i, (name, context) in enumerate([('one', 'first'), ('two', 'first'), ('one', 'second')]):
+            (self.workflow_dir / f'workflow_{i}.py').write_text(self.file_contents % (name, context))
+        self.manager = temporary_manager()
+        self.manager.workflow_directories = [self.workflow_dir]
+        self.manager.instantiate_all_workflows(disable_builtins=True)
+
+    def test_lookup_by_context(self):
+        self.assertEqual(['one', 'two'], [w.name for w in self.manager.workflow_instances('first')])
+        self.assertEqual(['one'], [w.name for w in self.manager.workflow_instances('second')])
+        self.assertEqual([], self.manager.workflow_instances('third'))
+        self.manager.workflow_instances('first').clear()  # the result is a copy
+        self.assertEqual(2, len(self.manager.workflow_instances('first')))
+
+    def test_lookup_by_name(self):
+        workflow = self.manager.workflow_by_name('second', 'one')
+        self.assertEqual(('second', 'one'), (workflow.context, workflow.name))
+        self.assertIsNone(self.manager.workflow_by_name('second', 'two'))
+
+    def test_lookup_after_reset(self):
+        self.manager.reset_workflow_array('second')
+        self.assertEqual([], self.manager.workflow_instances('first'))
+        self.assertIsNone(self.manager.workflow_by_name('first', 'one'))
+        self.assertIsNotNone(self.manager.workflow_by_name('second', 'one'))
@@ -0,0 +1,101 @@
+from pathlib import Path
+from tempfile import mkdtemp
+from threading import Event
+from unittest import TestCase
+
+from eplaunch.workflows.base import EPLaunchWorkflowResponse1
+from eplaunch.workflows.install_finder import InstallCache
+from eplaunch.workflows.manager import WorkflowManager
+from eplaunch.workflows.manifest import WorkflowManifest
+from eplaunch.workflows.scheduler import WorkflowScheduler, default_concurrency
+from eplaunch.workflows.workflow_thread import WorkflowThread, WorkflowThreadStatus
+
+
+class BlockingWorkflow:
+
+    def __init__(self, release: Event):
+        self.release = release
+
+    def main(self, _, __, ___):
+        self.release.wait(10)
+        return EPLaunchWorkflowResponse1(True, '', [])
+
+    def abort(self):
+        pass
+
+
+class TestWorkflowScheduler(TestCase):
+    def setUp(self) -> None:
+        self.responses = []
+        self.all_done = Event()
+        self.expected_responses = 0
+
+    def done_callback(self, response):
+        self.responses.append(response)
+        if len(self.responses) == self.expected_responses:
+            self.all_done.set()
+
+    def make_thread(self, identifier, release: Event) -> WorkflowThread:
+        return WorkflowThread(
+            identifier=identifier, workflow_instance=BlockingWorkflow(release), run_directory='/tmp',
+            file_name='file_%s' % identifier, main_args={'workflow location': '/foo/bar'},
+            done_callback=self.done_callback, start_immediately=False
+        )
+
+    def test_default_concurrency_is_core_count(self):
+        self.assertEqual(default_concurrency(), WorkflowScheduler().max_concurrent)
+
+    def test_bounded_concurrency_and_fifo_order(self):
+        release = Event()
+        scheduler = WorkflowScheduler(max_concurrent=2)
+        threads = [self.make_thread(i, release) for i in range(5)]
+        self.expected_responses = len(threads)
+        for t in threads:
+            scheduler.submit(t)
+        self.assertEqual(2, scheduler.num_running())
+        self.assertEqual(3, scheduler.num_pending())
+        self.assertEqual(
+            [WorkflowThreadStatus.Running] * 2 + [WorkflowThreadStatus.Queued] * 3, [t.status for t in threads]
+        )
+        release.set()
+        self.assertTrue(self.all_done.wait(10))
+        for t in threads:
+            t.join(10)
+        self.assertEqual([WorkflowThreadStatus.Done] * 5, [t.status for t in threads])
+        self.assertEqual(0, scheduler.num_running())
+        self.assertEqual(0, scheduler.num_pending())
+
+    def test_cancel_pending(self):
+        release = Event()
+        scheduler = WorkflowScheduler(max_concurrent=1)
+        threads = [self.make_thread(i, release) for i in range(3)]
+        self.expected_responses = 1
+        for t in threads:
+            scheduler.submit(t)
+        cancelled = scheduler.cancel_pending()
+        self.assertEqual(threads[1:], cancelled)
+        release.set()
+        self.assertTrue(self.all_done.wait(10))
+        threads[0].join(10)
+        self.assertEqual(0, scheduler.num_running())
+        self.assertEqual(WorkflowThreadStatus.Queued, threads[1].status)
+
+    def test_manager_reports_thread_status(self):
+        release = Event()
+        install_cache = InstallCache(Path(mkdtemp()) / 'installs.json')
+        install_cache.save([])  # as if no EnergyPlus installs were found, so they aren't searched for
+        manager = WorkflowManager(WorkflowManifest(Path(mkdtemp()) / 'manifest.json'), install_cache)
+        manager.scheduler.set_max_concurrent(1)
+        self.expected_responses = 2
+        for i in range(2):
+            t = self.make_thread(i, release)
+            manager.threads[str(i)] = t
+            manager.scheduler.submit(t)
+        counts = manager.thread_status_counts()
+        self.assertEqual(1, counts[WorkflowThreadStatus.Running])
+        self.assertEqual(1, counts[WorkflowThreadStatus.Queued])
+        release.set()
+        self.assertTrue(self.all_done.wait(10))
+        for t in manager.threads.values():
+            t.join(10)
+        self.assertEqual(2, manager.thread_status_counts()[WorkflowThreadStatus.Done])
@@ -1,6 +1,8 @@
 from pathlib import Path
+import tempfile
 from unittest import TestCase
 
+from eplaunch.utilities.exceptions import EPLaunchFileException
 from eplaunch.workflows.workflow import Workflow
 from eplaunch.workflows.workflow_tester import WorkflowTesting
 
@@ -14,6 +16,39 @@ class TestWorkflow(TestCase):
         self.assertIsInstance(str(w), str)
         pass
 
+    def test_matches_file_type(self):
+        w = Workflow(
+            None, 'name', 'context', [], ['*.idf', '*.imf'], [], Path('/workflow/dir'), 'description',
+            is_energyplus=False, uses_weather=False, version_id=None
+        )
+        self.assertTrue(w.matches_file_type('in.idf'))
+        self.assertTrue(w.matches_file_type('in.imf'))
+        self.assertFalse(w.matches_file_type('in.epJSON'))
+
+    def test_workflow_class_is_imported_when_first_used(self):
+        module_path = Path(tempfile.mkdtemp()) / 'lazy_workflow.py'
+        module_path.write_text("class LazyWorkflow:\n    pass\n")
+        w = Workflow(
+            None, 'name', 'context', [], ['*.txt'], [], module_path.parent, 'description', is_energyplus=False,
+            uses_weather=False, version_id=None, module_path=module_path, class_name='LazyWorkflow'
+        )
+        self.assertFalse(w.class_is_loaded)
+        module_path.write_text("class LazyWorkflow:\n    pass\n\n\nclass Other:\n    pass\n")  # read when used
+        self.assertEqual('LazyWorkflow', w.workflow_class().__class__.__name__)
+        self.assertTrue(w.class_is_loaded)
+        self.assertIs(w.workflow_class, w.workflow_class)
+
+    def test_missing_workflow_class(self):
+        module_path = Path(tempfile.mkdtemp()) / 'lazy_workflow.py'
+        module_path.write_text("class SomethingElse:\n    pass\n")
+        w = Workflow(
+            None, 'name', 'context', [], ['*.txt'], [], module_path.parent, 'description', is_energyplus=False,
+            uses_weather=False, version_id=None, module_path=module_path, class_name='LazyWorkflow'
+        )
+        with self.assertRaises(EPLaunchFileException):
+            _ = w.workflow_class
+        self.assertFalse(w.class_is_loaded)
+
 
 class TestDefaultWorkflows(TestCase):
     def setUp(self) -> None:
@@ -1,7 +1,12 @@
+from importlib import util as import_util
+from os import getpid
 from os.path import join
+from pathlib import Path
 from tempfile import mkdtemp
-from unittest import TestCase
+from time import monotonic, sleep
+from unittest import TestCase, mock
 
+from eplaunch.workflows.workflow_process import shutdown_pool
 from eplaunch.workflows.workflow_thread import WorkflowThread
 from eplaunch.workflows.base import EPLaunchWorkflowResponse1
 
@@ -58,3 +63,106 @@ class TestWorkflowThread(TestCase):
         self.assertIsInstance(self.thread_response, EPLaunchWorkflowResponse1)
         # the base workflow has an abort method, just exercise this interface on the thread layer
         w.abort()
+
+
+class TestWorkflowThreadInProcess(TestCase):
+    workflow_file_contents = """
+import os
+import time
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1, WorkflowExecutionMode
+class ProcessWorkflow(BaseEPLaunchWorkflow1):
+    execution_mode = WorkflowExecutionMode.Process
+    def name(self): return 'process'
+    def context(self): return 'theseWorkflows'
+    def description(self): return 'Process workflow'
+    def get_file_types(self): return ['*.txt']
+    def get_output_suffixes(self): return []
+    def main(self, run_directory, file_name, args):
+        if file_name == 'throw':
+            raise ValueError('thrown in worker')
+        if file_name.startswith('sleep'):
+            self.callback(file_name + ' started')
+            time.sleep(float(file_name[len('sleep'):]))
+        self.callback('hello from ' + file_name)
+        return EPLaunchWorkflowResponse1(success=True, message='Hello', column_data={'pid': os.getpid()})
+"""
+
+    def setUp(self) -> None:
+        self.thread_response = None
+        self.responses = {}
+        self.messages = []
+        self.module_path = Path(mkdtemp()) / 'process_workflow.py'
+        self.module_path.write_text(self.workflow_file_contents)
+        module_spec = import_util.spec_from_file_location('process_workflow_module', self.module_path)
+        module = import_util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+        self.workflow_class = module.ProcessWorkflow
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutdown_pool()
+
+    def mock_callback(self, thread_response):
+        self.thread_response = thread_response
+        self.responses[thread_response.id] = thread_response
+
+    def stdout_callback(self, _workflow_id, message):
+        self.messages.append(message)
+
+    def make_thread(self, file_name: str, identifier: str = 'abc', start_immediately: bool = False) -> WorkflowThread:
+        instance = self.workflow_class()
+        instance.register_standard_output_callback(identifier, self.stdout_callback)
+        return WorkflowThread(
+            identifier=identifier, workflow_instance=instance, run_directory=self.module_path.parent,
+            file_name=file_name, main_args={'workflow location': self.module_path.parent},
+            done_callback=self.mock_callback, start_immediately=start_immediately,
+            workflow_module_path=self.module_path
+        )
+
+    def run_file(self, file_name: str):
+        self.make_thread(file_name).run()
+
+    def wait_for_message(self, message: str):
+        deadline = monotonic() + 60
+        while message not in self.messages:
+            self.assertLess(monotonic(), deadline, f'Never got message: {message}')
+            sleep(0.05)
+
+    def test_main_runs_in_worker_process(self):
+        self.run_file('in.txt')
+        self.assertTrue(self.thread_response.success)
+        self.assertNotEqual(getpid(), self.thread_response.column_data['pid'])
+        self.assertEqual(['hello from in.txt'], self.messages)
+        self.assertEqual('abc', self.thread_response.id)
+
+    def test_worker_exception_becomes_failed_response(self):
+        self.run_file('throw')
+        self.assertFalse(self.thread_response.success)
+        self.assertIn('thrown in worker', self.thread_response.message)
+
+    def test_abort_terminates_worker(self):
+        w = self.make_thread('sleep60', start_immediately=True)
+        self.wait_for_message('sleep60 started')
+        start_time = monotonic()
+        w.abort()
+        w.join(10)
+        self.assertFalse(w.is_alive())
+        self.assertLess(monotonic() - start_time, 10)
+        self.assertFalse(self.thread_response.success)
+        self.assertIn('aborted', self.thread_response.message)
+        self.run_file('in.txt')  # a new pool takes over
+        self.assertTrue(self.thread_response.success)
+
+    def test_run_in_pool_broken_by_abort_is_run_again(self):
+        shutdown_pool()  # so the next pool has two workers, to run both at once
+        with mock.patch('eplaunch.workflows.workflow_process.cpu_count', return_value=2):
+            aborted = self.make_thread('sleep60', identifier='aborted', start_immediately=True)
+            survivor = self.make_thread('sleep1', identifier='survivor', start_immediately=True)
+        self.wait_for_message('sleep60 started')
+        self.wait_for_message('sleep1 started')
+        aborted.abort()
+        aborted.join(10)
+        survivor.join(60)
+        self.assertFalse(self.responses['aborted'].success)
+        self.assertTrue(self.responses['survivor'].success)
+        self.assertEqual(2, self.messages.count('sleep1 started'))
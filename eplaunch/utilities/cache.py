@@ -1,19 +1,244 @@
-from json import dumps, loads
-from os import path
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+from os import SEEK_END, fstat, fsync, path, replace, stat, stat_result, unlink
 from pathlib import Path
+from threading import Lock
 from time import sleep
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
 
 from eplaunch.utilities.exceptions import EPLaunchFileException
 
-# I'm trying to be good and catch specific exceptions, but the json library makes it difficult like this :-D
+# accelerated JSON libraries are optional, the fastest one installed is used, otherwise the standard library
 try:
-    from json.decoder import JSONDecodeError
-except ImportError:  # pragma: no cover
-    JSONDecodeError = ValueError
+    import orjson
+except ImportError:  # pragma: no cover  -- optional dependency
+    orjson = None
+try:
+    import ujson
+except ImportError:  # pragma: no cover  -- optional dependency
+    ujson = None
+
+if orjson is not None:
+    _accelerated_loads = orjson.loads
+elif ujson is not None:  # pragma: no cover  -- depends on which optional libraries are installed
+    _accelerated_loads = ujson.loads
+else:  # pragma: no cover
+    _accelerated_loads = None
+
+
+def loads(body_text: str):
+    """
+    Parses JSON text with the fastest available library.  The indented cache files and the journal are written by the
+    standard library, which writes NaN and Infinity as bare literals that the accelerated libraries reject, so text
+    they can't parse is parsed again by the standard library, which raises the final error if it is really invalid.
+    """
+    if _accelerated_loads is not None:
+        try:
+            return _accelerated_loads(body_text)
+        except ValueError:  # the decode errors of every JSON library derive from this
+            pass
+    return json.loads(body_text)
+
+
+# advisory file locks are only available on POSIX systems; elsewhere only the in-process lock is used
+try:
+    from fcntl import flock, LOCK_EX, LOCK_UN
+except ImportError:  # pragma: no cover  -- Windows
+    flock = None
+
+#: A file signature is the (mtime, size, inode) of a file, or None if the file does not exist, and the signature of a
+#: cache is the signature of its snapshot file paired with the signature of its journal file
+FileSignature = Optional[Tuple[int, int, int]]
+CacheSignature = Tuple[FileSignature, FileSignature]
+
+#: Parsed workflow states of recently read cache files, least recently used first, keyed by the absolute cache file
+#: path.  Each value is a (cache signature, workflow state) tuple, and the entry is only used while the signature of
+#: the files on disk still matches.  These states are shared between readers, so they must never be modified in place.
+_parsed_states: 'OrderedDict[Path, Tuple[CacheSignature, Dict]]' = OrderedDict()
+_parsed_states_lock = Lock()
+
+#: The registry of per-file thread locks, keyed by the absolute cache file path, guarded by the lock below
+_cache_file_thread_locks: Dict[Path, Lock] = {}
+_cache_file_thread_locks_guard = Lock()
+
+#: How many times, and how far apart in seconds, a rename or delete of a cache file is tried when it fails with a
+#: PermissionError, which is how Windows reports that another handle, such as a reader, has the file open
+_SharingRetryAttempts = 20
+_SharingRetryDelay = 0.025
+
+
+@contextmanager
+def cache_file_lock(file_path: Path) -> Iterator[None]:
+    """
+    Holds an exclusive lock on a cache file for the duration of a with block.  This is done in two layers:
+
+    - a threading.Lock unique to the cache file path, which serializes threads within this process, and
+    - an OS advisory lock (flock) on a sidecar lock file next to the cache file, which serializes separate processes,
+      such as two EnergyPlus-Launch instances or a batch runner.  On platforms without fcntl, only the first applies.
+      The lock file is deleted again before the lock is released, so it isn't left behind in every directory.
+
+    The lock is not re-entrant, so code holding it must not try to acquire it again for the same file.
+
+    :param file_path: The path to the cache file to lock
+    """
+    file_path = Path(path.abspath(file_path))
+    with _cache_file_thread_locks_guard:
+        thread_lock = _cache_file_thread_locks.setdefault(file_path, Lock())
+    with thread_lock:
+        if flock is None:  # pragma: no cover  -- Windows
+            yield
+            return
+        lock_file_path = file_path.with_name(file_path.name + '.lock')
+        while True:
+            try:
+                lock_file = open(lock_file_path, 'a')
+            except IOError:  # pragma: no cover  -- would be difficult to mock up this weird case
+                raise EPLaunchFileException(lock_file_path, 'Could not open cache lock file')
+            flock(lock_file.fileno(), LOCK_EX)
+            # the previous holder deletes the lock file before releasing it, so the lock only counts if the file that
+            # was locked is still the one at the lock file path, otherwise try again with the new one
+            try:
+                locked_stat, current_stat = fstat(lock_file.fileno()), stat(lock_file_path)
+                if (locked_stat.st_dev, locked_stat.st_ino) == (current_stat.st_dev, current_stat.st_ino):
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+        with lock_file:
+            try:
+                yield
+            finally:
+                try:
+                    unlink(lock_file_path)
+                except OSError:  # pragma: no cover  -- would be difficult to mock up this weird case
+                    pass
+                flock(lock_file.fileno(), LOCK_UN)
+
+
+def _retry_sharing_violations(operation: Callable[[], None]) -> None:
+    """
+    Runs a rename or delete of a cache file, trying it again for a short while if it fails with a PermissionError.
+    Readers don't take the cache lock, and on Windows a file can't be replaced or deleted while a reader has it open,
+    so a write that happens to overlap a read has to wait for that read to finish instead of failing.
+
+    :param operation: The function that renames or deletes the file
+    """
+    for attempt in range(_SharingRetryAttempts):
+        try:
+            operation()
+            return
+        except PermissionError:
+            if attempt == _SharingRetryAttempts - 1:
+                raise
+            sleep(_SharingRetryDelay)
+
+
+def _dumps_compact(workflow_state: Dict) -> str:
+    """
+    Encodes a workflow state without any whitespace and with sorted keys, using the fastest available library, or the
+    standard library if that one can't encode the state, such as one with integer keys or integers over 64 bits
+    """
+    try:
+        if orjson is not None:
+            return orjson.dumps(workflow_state, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+        if ujson is not None:  # pragma: no cover  -- depends on which optional libraries are installed
+            return ujson.dumps(workflow_state, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError, OverflowError):  # orjson.JSONEncodeError derives from TypeError
+        pass
+    return json.dumps(workflow_state, separators=(',', ':'), sort_keys=True)
+
+
+def _file_signature(file_stat: stat_result) -> Tuple[int, int, int]:
+    # the inode changes on every atomic replace, which covers writes that land within the file system mtime resolution
+    return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+
+
+def _optional_file_signature(file_path: Path) -> FileSignature:
+    try:
+        return _file_signature(stat(file_path))
+    except FileNotFoundError:
+        return None
+    except OSError:  # pragma: no cover  -- would be difficult to mock up this weird case
+        raise EPLaunchFileException(file_path, 'Could not open or read text from file')
+
+
+def _get_parsed_state(file_path: Path, signature: CacheSignature) -> Optional[Dict]:
+    with _parsed_states_lock:
+        cached = _parsed_states.get(file_path)
+        if cached is None or cached[0] != signature:
+            return None
+        _parsed_states.move_to_end(file_path)
+        return cached[1]
+
+
+def _put_parsed_state(file_path: Path, signature: CacheSignature, workflow_state: Dict) -> None:
+    with _parsed_states_lock:
+        _parsed_states[file_path] = (signature, workflow_state)
+        _parsed_states.move_to_end(file_path)
+        while len(_parsed_states) > CacheFile.MaxParsedStatesCached:
+            _parsed_states.popitem(last=False)
+
+
+class CacheBackendType:
+    Json = 'json'  # the default, a .eplaunch JSON file in each directory, rewritten on every change
+    Journal = 'journal'  # the same files, but changes are appended to a journal next to each of them
+    Sqlite = 'sqlite'  # a single SQLite database for all directories, see eplaunch.utilities.cache_sqlite
+
+
+class CacheBackend:
+    """
+    The interface for alternate stores of cache data.  When CacheFile.Backend is set to an instance of a subclass,
+    CacheFile instances read and change their data through it instead of the .eplaunch file in their directory.
+    Implementations must be safe to use from several threads at once.
+    """
+
+    def read(self, directory: Path) -> Dict:
+        """
+        Gets the full cache data for a directory
+
+        :param directory: The directory the cache data belongs to
+        :return: A dictionary with the same layout as the parsed contents of a .eplaunch file
+        """
+        raise NotImplementedError()
+
+    def apply_mutations(self, directory: Path, mutations: List[Tuple[str, str, str, Dict, bool]]) -> None:
+        """
+        Applies file attribute changes to the cache data for a directory, as a single atomic update
 
-#: This is used as the mutex queue, the list of unique directories being altered at a given time
-cache_files_currently_updating_or_writing: List[Path] = []
+        :param directory: The directory the cache data belongs to
+        :param mutations: A list of (workflow name, file name, attribute, data, replace) tuples, applied in order
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def get_files_for_workflow(self, directory: Path, workflow_name: str) -> Dict:
+        """
+        Gets the files of one workflow in the cache data for a directory
+
+        :param directory: The directory the cache data belongs to
+        :param workflow_name: The name of a workflow (as determined by the name() function on the workflow)
+        :return: A map with keys that are file names found in this workflow
+        """
+        raise NotImplementedError()
+
+
+def set_cache_backend(backend_type: str, database_path: Optional[Path] = None) -> None:
+    """
+    Selects where all CacheFile instances in this process store their data from now on
+
+    :param backend_type: One of the CacheBackendType values; unknown values select the default JSON files
+    :param database_path: For the SQLite backend, the database file to use instead of the default one
+    :return: None
+    """
+    CacheFile.JournalMode = backend_type == CacheBackendType.Journal
+    if backend_type == CacheBackendType.Sqlite:
+        # imported here since the SQLite backend itself builds on this module
+        from eplaunch.utilities.cache_sqlite import SqliteCacheBackend
+        CacheFile.Backend = SqliteCacheBackend(database_path) if database_path else SqliteCacheBackend()
+    else:
+        CacheFile.Backend = None
 
 
 class CacheFile:
@@ -23,25 +248,45 @@ class CacheFile:
 
     Usage:
 
-    To ensure thread-safety, this class employs a form of a mutex, where the unique id is the current directory
-    Any worker function that wants to alter the queue should follow the following process:
+    To ensure thread- and process-safety, every read-modify-write of the cache (add_config and add_result) happens
+    while holding cache_file_lock for this cache file.  The lock blocks until any other writer is done, there is
+    no timeout, so a writer never proceeds without the lock.  Any other code that wants to alter the cache should:
+
+    - enter a ``with cache_file_lock(cache.file_path):`` block,
+    - read the cache, modify it, and write it to disk inside that block,
+    - and leave the block, which releases the lock.
+
+    Journal mode:
 
-    - The worker should call the ok_to_continue() function, which will check the mutex and then wait a predetermined
-      amount of time for the mutex to clear, or fail.
-    - The worker should check the return value of this function and if False, fail.  If True, it should set up a block
-      on the directory by adding the current directory to the cache_files_currently_updating_or_writing array
-    - The worker can then proceed to read the cache, modify ir, and write to disk
-    - The worker must then release the mutex by removing the current directory from the list
+    With JournalMode enabled, add_config and add_result don't rewrite the cache file.  Each change is instead appended
+    as one JSON line (workflow name, file name, attribute, data, replace flag) to a journal file next to the cache
+    file, which costs the same no matter how large the cache has grown, and a crash can at most lose the line being
+    written.  read() replays the journal over the last snapshot, which is the regular cache file, and once the journal
+    grows past JournalCompactBytes it is compacted: the replayed state is written as the new snapshot and the journal
+    is removed.  Any write of the snapshot removes the journal, so caches written with and without journal mode can be
+    mixed freely.  Replaying changes is idempotent, so a crash between writing the snapshot and removing the journal
+    does no harm either.
+
+    Backends:
+
+    When Backend is set (see set_cache_backend), read, add_config, add_result and get_files_for_workflow go through
+    that CacheBackend instead of the .eplaunch file, which is then left alone apart from the backend importing it.
+    read_file and write always work on the .eplaunch file.
     """
 
     FileName = '.eplaunch'
+    JournalFileName = '.eplaunch.journal'
     RootKey = 'workflows'
     FilesKey = 'files'
     ParametersKey = 'config'
     ResultsKey = 'result'
     WeatherFileKey = 'weather'
-    QueueCheckInterval = 0.1  # seconds
-    QueueTotalCheckTime = 5  # seconds
+    FsyncOnWrite = False  # if True, each write is flushed all the way to disk before it replaces the previous file
+    MaxParsedStatesCached = 256  # number of parsed cache files kept in memory, shared by all CacheFile instances
+    JournalMode = False  # if True, changes are appended to the journal file instead of rewriting the cache file
+    JournalCompactBytes = 256 * 1024  # journal size that triggers folding it back into the cache file
+    CompactEncoding = False  # if True, the cache file is written without indentation and with sorted keys
+    Backend: Optional[CacheBackend] = None  # if set, all cache data is stored through this instead of the file
 
     def _print(self, message) -> None:
         """
@@ -60,7 +305,10 @@ class CacheFile:
 
         :param working_directory:
         """
+        self.working_directory = working_directory
         self.file_path = working_directory / self.FileName
+        self.journal_file_path = working_directory / self.JournalFileName
+        self._absolute_file_path = Path(path.abspath(self.file_path))
         self._print("Created cache file")
         self.workflow_state = None
 
@@ -111,29 +359,6 @@ class CacheFile:
         else:
             root[workflow_name] = {self.FilesKey: {file_name: {attribute: data}}}
 
-    def ok_to_continue(self) -> bool:
-        """
-        This function does the check-and-wait part of the mutex.  If the current directory is not blocked, it
-        immediately returns.  If the current directory is blocked, it will attempt to check over a certain amount of
-        time, at a tight interval, to wait on the mutex to be unlocked.  Ultimately if it can't pass, it returns False.
-
-        :return: True or False, whether it is safe to write to this cache
-        """
-        self._print("Checking if its ok to continue")
-        if self.file_path not in cache_files_currently_updating_or_writing:
-            return True
-        self._print("Found this file in the writing data, trying to sleep through it")
-        for i in range(int(self.QueueTotalCheckTime / self.QueueCheckInterval)):
-            sleep(self.QueueCheckInterval)
-            if self.file_path not in cache_files_currently_updating_or_writing:
-                self._print("Managed to sleep long enough, continuing!")
-                return True
-        else:
-            self._print("Sleep didn't last long enough, aborting")
-            return False
-        # there is an **incredibly** small chance we could have a new file pop in between the check above and later code
-        # I will have to noodle on whether we want to worry about that possibility
-
     def add_config(self, workflow_name, file_name, config_data) -> None:
         """
         This function is used to add a config data block for a workflow.  A config data block contains data that is
@@ -145,17 +370,7 @@ class CacheFile:
         :return: None
         """
         self._print(f"About to add a config attribute for workflow {workflow_name}; file {file_name}")
-        if not self.ok_to_continue():  # pragma: no cover
-            # I'm not sure if we should communicate this or not.
-            # For now let's print to the term, so that we might catch it for debugging
-            print("There was a problem adding a config to a cache file, something blocked for too long maybe?")
-        cache_files_currently_updating_or_writing.append(self.file_path)
-        self._print("Cache file locked")
-        self.read()
-        self._add_file_attribute(workflow_name, file_name, self.ParametersKey, config_data, False)
-        self.write()
-        cache_files_currently_updating_or_writing.remove(self.file_path)
-        self._print("Cache file UN-locked")
+        self.add_file_attributes([(workflow_name, file_name, self.ParametersKey, config_data, False)])
 
     def add_result(self, workflow_name, file_name, column_data) -> None:
         """
@@ -169,51 +384,173 @@ class CacheFile:
         :return: None
         """
         self._print(f"About to add a result attribute for workflow {workflow_name}; file {file_name}")
-        if not self.ok_to_continue():  # pragma: no cover
-            # I'm not sure if we should communicate this or not.
-            # For now let's print to the term, so that we might catch it for debugging
-            print("There was a problem adding a config to a cache file, something blocked for too long maybe?")
-        cache_files_currently_updating_or_writing.append(self.file_path)
-        self._print("Cache file locked")
-        self.read()
-        self._add_file_attribute(workflow_name, file_name, self.ResultsKey, column_data, True)
-        self.write()
-        cache_files_currently_updating_or_writing.remove(self.file_path)
+        self.add_file_attributes([(workflow_name, file_name, self.ResultsKey, column_data, True)])
+
+    def add_file_attributes(self, mutations: List[Tuple[str, str, str, Dict, bool]]) -> None:
+        """
+        Applies a list of file attribute changes to the cache in a single locked read-modify-write, which is much
+        cheaper than one write per change when many results arrive for the same directory at once.
+        In journal mode, the changes are appended to the journal instead, and workflow_state is reset to None,
+        so read() must be called before looking at the state again.
+
+        :param mutations: A list of (workflow name, file name, attribute, data, replace) tuples, applied in order,
+                          with the same meaning as the arguments to _add_file_attribute
+        :return: None
+        """
+        if self.Backend is not None:
+            self.Backend.apply_mutations(self.working_directory, mutations)
+            self.workflow_state = None
+            return
+        with cache_file_lock(self.file_path):
+            self._print("Cache file locked")
+            if self.JournalMode:
+                journal_size = self._append_to_journal(mutations)
+                self.workflow_state = None
+                if journal_size >= self.JournalCompactBytes:
+                    self._print("Compacting journal")
+                    self.read_file(use_parsed_cache=False)
+                    self.write()
+            else:
+                self.read_file(use_parsed_cache=False)  # we are about to modify the state, so get a private copy
+                for workflow_name, file_name, attribute, data, replace_data in mutations:
+                    self._add_file_attribute(workflow_name, file_name, attribute, data, replace_data)
+                self.write()
         self._print("Cache file UN-locked")
 
-    def read(self) -> None:
+    def _append_to_journal(self, mutations: List[Tuple[str, str, str, Dict, bool]]) -> int:
+        """
+        Appends one JSON line per change to the journal file; must only be called while holding cache_file_lock
+
+        :param mutations: A list of (workflow name, file name, attribute, data, replace) tuples
+        :return: The size of the journal file after appending, in bytes
+        """
+        body_text = ''.join(json.dumps(list(mutation)) + '\n' for mutation in mutations).encode('utf-8')
+        try:
+            with open(self.journal_file_path, 'a+b') as f:
+                # a crash in the middle of an earlier append can leave a partial last line, make sure it stays separate
+                if f.tell() > 0:
+                    f.seek(-1, SEEK_END)
+                    if f.read(1) != b'\n':
+                        body_text = b'\n' + body_text
+                f.write(body_text)
+                f.flush()
+                if self.FsyncOnWrite:
+                    fsync(f.fileno())
+                return f.tell()
+        except (IOError, OSError):
+            raise EPLaunchFileException(self.journal_file_path, 'Could not append to cache journal file')
+
+    def _replay_journal(self) -> None:
+        """
+        Applies the changes in the journal file, if there is one, to the current workflow state.
+        Lines that can't be parsed, such as a partial line left by a crash, are skipped.
+
+        :return: None
+        """
+        try:
+            with open(self.journal_file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        workflow_name, file_name, attribute, data, replace_data = loads(line)
+                    except (TypeError, ValueError):  # ValueError covers the decode errors of every JSON library
+                        continue
+                    self._add_file_attribute(workflow_name, file_name, attribute, data, replace_data)
+        except FileNotFoundError:
+            pass
+        except (IOError, UnicodeDecodeError):  # pragma: no cover  -- would be difficult to mock up this weird case
+            raise EPLaunchFileException(self.journal_file_path, 'Could not open or read text from file')
+
+    def read(self, use_parsed_cache: bool = True) -> None:
+        """
+        Reads the cache data, from the backend if one is set and from the cache file otherwise (see read_file),
+        and stores it in the workflow_state instance variable.
+
+        :param use_parsed_cache: Whether a previously parsed state may be returned if the file is unchanged
+        :return: None
+        """
+        if self.Backend is not None:
+            self.workflow_state = self.Backend.read(self.working_directory)
+        else:
+            self.read_file(use_parsed_cache)
+
+    def read_file(self, use_parsed_cache: bool = True) -> None:
         """
         Reads the existing cache file, if it exists, and stores the data in the workflow_state instance variable.
         If the cache file doesn't exist, this simply initializes the workflow_state instance variable.
+        If there is a journal file, its changes are replayed on top of the cache file contents.
+        Parsed cache files are remembered in memory, keyed on the modification time, size and inode of the cache and
+        journal files, so reading an unchanged cache file again does not re-parse it.  A state that came from that
+        in-memory cache is shared with other readers, so it must be treated as read-only; use_parsed_cache=False gets a
+        freshly parsed copy.
 
+        :param use_parsed_cache: Whether a previously parsed state may be returned if the file is unchanged
         :return: None
         """
-        if path.exists(self.file_path):
+        signature = (_optional_file_signature(self.file_path), _optional_file_signature(self.journal_file_path))
+        if signature == (None, None):
+            self.workflow_state = {self.RootKey: {}}
+            return
+        if use_parsed_cache:
+            cached_state = _get_parsed_state(self._absolute_file_path, signature)
+            if cached_state is not None:
+                self.workflow_state = cached_state
+                return
+        if signature[0] is None:
+            self.workflow_state = {self.RootKey: {}}
+        else:
             try:
-                with open(self.file_path, 'r') as f:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
                     body_text = f.read()
             except IOError:  # pragma: no cover  -- would be difficult to mock up this weird case
                 raise EPLaunchFileException(self.file_path, 'Could not open or read text from file')
             try:
                 self.workflow_state = loads(body_text)
-            except JSONDecodeError:
+            except ValueError:  # the decode errors of every JSON library derive from this
                 raise EPLaunchFileException(self.file_path, 'Could not parse cache file JSON text')
-        else:
-            self.workflow_state = {self.RootKey: {}}
+        if signature[1] is not None:
+            self._replay_journal()
+        if use_parsed_cache:
+            _put_parsed_state(self._absolute_file_path, signature, self.workflow_state)
 
     def write(self) -> None:
         """
         Writes out the workflow state to the previously determined cache file location
+        The file is indented for readability, unless CompactEncoding is set, which writes it in roughly half the size
+        and time; read() accepts either.
+        The state is written to a temporary file in the same directory, which then atomically replaces the cache file,
+        so readers only ever see the previous or the new contents, never a partially written file.
+        The workflow state is expected to include any journal changes (read() replays them), so the journal file is
+        removed afterwards.
         Note that this function does not protect for thread-safety!  It is expected that functions who are
-        altering the state of the cache should call write() within their own blocking structure
+        altering the state of the cache should call write() while holding cache_file_lock
 
         :return: None
         """
-        body_text = dumps(self.workflow_state, indent=2)
+        if self.CompactEncoding:
+            body_text = _dumps_compact(self.workflow_state)
+        else:
+            body_text = json.dumps(self.workflow_state, indent=2)
+        # hidden, unique, and in the same directory, so the final rename stays on one file system
+        temp_file_path = self.file_path.with_name(f"{self.FileName}.{uuid4().hex}.tmp")
         try:
-            with open(self.file_path, 'w') as f:
+            with open(temp_file_path, 'x', encoding='utf-8') as f:
                 f.write(body_text)
-        except IOError:  # pragma: no cover  -- would be difficult to mock up this weird case
+                if self.FsyncOnWrite:
+                    f.flush()
+                    fsync(f.fileno())
+            _retry_sharing_violations(lambda: replace(temp_file_path, self.file_path))
+            try:
+                _retry_sharing_violations(lambda: unlink(self.journal_file_path))
+            except FileNotFoundError:
+                pass
+            # the state just written is exactly what a reader would parse, so remember it to skip that parse
+            signature = (_file_signature(stat(self.file_path)), None)
+            _put_parsed_state(self._absolute_file_path, signature, self.workflow_state)
+        except (IOError, OSError):
+            try:
+                unlink(temp_file_path)
+            except OSError:
+                pass
             raise EPLaunchFileException(self.file_path, 'Could not write cache file')
 
     def get_files_for_workflow(self, current_workflow_name) -> Dict:
@@ -223,6 +560,8 @@ class CacheFile:
         :param current_workflow_name: The name of a workflow (as determined by the name() function on the workflow)
         :return: A map with keys that are file names found in this workflow
         """
+        if self.Backend is not None:
+            return self.Backend.get_files_for_workflow(self.working_directory, current_workflow_name)
         self.read()
         workflows = self.workflow_state[CacheFile.RootKey]
         if current_workflow_name in workflows:
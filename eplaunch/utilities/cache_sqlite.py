@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from json import dumps, loads
+from os import path
+from pathlib import Path
+from sqlite3 import Connection, Error as SqliteError, connect
+from threading import local
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from eplaunch.utilities.cache import CacheBackend, CacheFile
+from eplaunch.utilities.exceptions import EPLaunchFileException
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Stores the cache data of every directory in one SQLite database, with one row per (directory, workflow, file).
+
+    Each change only touches the rows of the files it changes, inside a transaction, so concurrent writers (GUI
+    threads, batch runs, or other EnergyPlus-Launch processes) get atomic, incremental updates instead of rewriting a
+    whole file.  The database runs in WAL mode, so readers are never blocked by a writer.  Since all directories are
+    in one place, results can also be queried across directories, see find_workflow_files.
+
+    The first time a directory is accessed, its existing .eplaunch file, if any, is imported into the database.
+    From then on the database is the only store for that directory; the .eplaunch file is not updated anymore.
+    """
+
+    DefaultFileName = '.EP-Launch.sqlite'
+    BusyTimeoutSeconds = 60  # how long a writer waits for another writer's transaction before giving up
+
+    def __init__(self, database_path: Optional[Path] = None):
+        """
+        Constructor for the backend, which creates the database file and tables if needed
+
+        :param database_path: The database file to use, defaults to a file in the user's home directory
+        """
+        self.database_path = database_path if database_path else Path.home() / self.DefaultFileName
+        self._thread_data = local()  # each thread gets its own connection, as connections can't be shared
+        self._imported_directories: Set[str] = set()  # directories known to be imported, to skip the lookup
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " directory TEXT NOT NULL, workflow TEXT NOT NULL, file TEXT NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (directory, workflow, file)"
+                ") WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS imported_directories (directory TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> Connection:
+        connection = getattr(self._thread_data, 'connection', None)
+        if connection is None:
+            try:
+                # autocommit mode, transactions are started explicitly in _transaction
+                connection = connect(str(self.database_path), timeout=self.BusyTimeoutSeconds, isolation_level=None)
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')  # still safe from corruption in WAL mode
+            except SqliteError:
+                raise EPLaunchFileException(self.database_path, 'Could not open cache database')
+            self._thread_data.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Connection]:
+        connection = self._connection()
+        try:
+            connection.execute('BEGIN IMMEDIATE')  # take the write lock up front, so the transaction can't deadlock
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+        except SqliteError:
+            raise EPLaunchFileException(self.database_path, 'Could not update cache database')
+
+    @staticmethod
+    def _directory_key(directory: Path) -> str:
+        return path.abspath(directory)
+
+    def _import_directory(self, directory: Path) -> str:
+        """
+        Imports the .eplaunch file of a directory into the database, unless that was done before
+
+        :param directory: The directory to import
+        :return: The key of the directory in the database
+        """
+        key = self._directory_key(directory)
+        if key in self._imported_directories:
+            return key
+        with self._transaction() as connection:
+            already_imported = connection.execute(
+                'SELECT 1 FROM imported_directories WHERE directory = ?', (key,)
+            ).fetchone()
+            if not already_imported:
+                cache = CacheFile(directory)
+                cache.read_file(use_parsed_cache=False)
+                rows = [
+                    (key, workflow_name, file_name, dumps(file_data))
+                    for workflow_name, workflow_data in cache.workflow_state.get(CacheFile.RootKey, {}).items()
+                    for file_name, file_data in workflow_data.get(CacheFile.FilesKey, {}).items()
+                ]
+                connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', rows)
+                connection.execute('INSERT INTO imported_directories VALUES (?)', (key,))
+        self._imported_directories.add(key)
+        return key
+
+    def _select(self, query: str, parameters: Tuple) -> List[Tuple]:
+        try:
+            return self._connection().execute(query, parameters).fetchall()
+        except SqliteError:
+            raise EPLaunchFileException(self.database_path, 'Could not read cache database')
+
+    def read(self, directory: Path) -> Dict:
+        key = self._import_directory(directory)
+        workflows: Dict[str, Dict] = {}
+        for workflow_name, file_name, data in self._select(
+                'SELECT workflow, file, data FROM files WHERE directory = ?', (key,)
+        ):
+            workflows.setdefault(workflow_name, {CacheFile.FilesKey: {}})[CacheFile.FilesKey][file_name] = loads(data)
+        return {CacheFile.RootKey: workflows}
+
+    def apply_mutations(self, directory: Path, mutations: List[Tuple[str, str, str, Dict, bool]]) -> None:
+        key = self._import_directory(directory)
+        with self._transaction() as connection:
+            for workflow_name, file_name, attribute, data, replace_data in mutations:
+                row = connection.execute(
+                    'SELECT data FROM files WHERE directory = ? AND workflow = ? AND file = ?',
+                    (key, workflow_name, file_name)
+                ).fetchone()
+                file_data = loads(row[0]) if row else {}
+                if replace_data or attribute not in file_data:
+                    file_data[attribute] = data
+                else:
+                    file_data[attribute] = {**file_data[attribute], **data}
+                connection.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                    (key, workflow_name, file_name, dumps(file_data))
+                )
+
+    def get_files_for_workflow(self, directory: Path, workflow_name: str) -> Dict:
+        key = self._import_directory(directory)
+        return {
+            file_name: loads(data) for file_name, data in self._select(
+                'SELECT file, data FROM files WHERE directory = ? AND workflow = ?', (key, workflow_name)
+            )
+        }
+
+    def find_workflow_files(self, workflow_name: str) -> Dict[Path, Dict]:
+        """
+        Gets the files of one workflow across all directories in the database.  Directories that have never been
+        accessed through this backend are not included, since their .eplaunch files have not been imported yet.
+
+        :param workflow_name: The name of a workflow (as determined by the name() function on the workflow)
+        :return: A map of directory paths to maps with keys that are file names found in this workflow
+        """
+        directories: Dict[Path, Dict] = {}
+        for directory, file_name, data in self._select(
+                'SELECT directory, file, data FROM files WHERE workflow = ? ORDER BY directory, file', (workflow_name,)
+        ):
+            directories.setdefault(Path(directory), {})[file_name] = loads(data)
+        return directories
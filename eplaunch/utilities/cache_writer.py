@@ -0,0 +1,159 @@
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Tuple
+
+from eplaunch.utilities.cache import CacheFile
+from eplaunch.utilities.exceptions import EPLaunchFileException
+
+
+class CoalescingCacheWriter:
+    """
+    A write-behind buffer for cache file changes.
+
+    Every add_config or add_result on a CacheFile is a full read, merge and rewrite of that directory's cache file,
+    so when hundreds of short workflows finish in one directory the cache file is rewritten hundreds of times.
+    This class collects those changes per directory instead, and a background thread applies each directory's
+    pending changes with a single CacheFile.add_file_attributes call once the oldest change is flush_interval_ms old,
+    or as soon as max_pending_mutations changes are waiting for that directory, whichever comes first.
+
+    Changes are applied in the order they were added, so the resulting cache file is the same as if each change had
+    been written directly.  Pending changes are only in memory, so owners must call close() (or at least flush())
+    before exiting.
+    """
+
+    def __init__(self, flush_interval_ms: int = 500, max_pending_mutations: int = 50,
+                 on_flushed: Optional[Callable[[Path], None]] = None,
+                 on_error: Optional[Callable[[Path, EPLaunchFileException], None]] = None):
+        """
+        Constructor for the writer, which starts the background flush thread
+
+        :param flush_interval_ms: The longest time a change waits in memory before it is written, in milliseconds
+        :param max_pending_mutations: The number of pending changes in one directory that triggers an immediate write
+        :param on_flushed: Optional function called with the directory after its cache file was written; it is called
+                           from the background thread, so GUI code must hand it off to the GUI thread
+        :param on_error: Optional function called with the directory and the exception if a write fails, in which
+                         case the changes for that write are dropped; called from the background thread as well
+        """
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending_mutations = max_pending_mutations
+        self.on_flushed = on_flushed
+        self.on_error = on_error
+        # directory -> (time the first pending change was added, list of pending changes)
+        self._pending: Dict[Path, Tuple[float, List[Tuple[str, str, str, Dict, bool]]]] = {}
+        self._condition = Condition()
+        self._write_lock = Lock()  # held while writing, so that flush() also waits for a write already in progress
+        self._closed = False
+        self._thread = Thread(target=self._run, name='CoalescingCacheWriter', daemon=True)
+        self._thread.start()
+
+    def add_config(self, directory: Path, workflow_name: str, file_name: str, config_data: Dict) -> None:
+        """
+        Queues a config data block for a workflow file, see CacheFile.add_config
+
+        :param directory: The directory holding the cache file
+        :param workflow_name: The name of the workflow to alter, as given by the workflow's name() method
+        :param file_name: The file name of the file to alter
+        :param config_data: A map of data to merge into this config section
+        :return: None
+        """
+        self._add(directory, (workflow_name, file_name, CacheFile.ParametersKey, config_data, False))
+
+    def add_result(self, directory: Path, workflow_name: str, file_name: str, column_data: Dict) -> None:
+        """
+        Queues a result data block for a workflow file, see CacheFile.add_result
+
+        :param directory: The directory holding the cache file
+        :param workflow_name: The name of the workflow to alter, as given by the workflow's name() method
+        :param file_name: The file name of the file to alter
+        :param column_data: A map of data to replace this result section with
+        :return: None
+        """
+        self._add(directory, (workflow_name, file_name, CacheFile.ResultsKey, column_data, True))
+
+    def num_pending(self) -> int:
+        with self._condition:
+            return sum(len(mutations) for _, mutations in self._pending.values())
+
+    def flush(self) -> None:
+        """
+        Writes all pending changes right away, on the calling thread, and returns once they are all on disk
+
+        :return: None
+        """
+        with self._write_lock:
+            with self._condition:
+                to_write = list(self._pending.items())
+                self._pending.clear()
+            for directory, (_, mutations) in to_write:
+                self._write(directory, mutations)
+
+    def close(self) -> None:
+        """
+        Stops the background thread and writes everything still pending.  Changes added after closing are written
+        immediately instead of being buffered.
+
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+
+    def _add(self, directory: Path, mutation: Tuple[str, str, str, Dict, bool]) -> None:
+        directory = Path(directory)
+        with self._condition:
+            if not self._closed:
+                _, mutations = self._pending.setdefault(directory, (monotonic(), []))
+                mutations.append(mutation)
+                if len(mutations) == 1 or len(mutations) >= self.max_pending_mutations:
+                    self._condition.notify()  # either there is a new deadline to wait for, or this is due right now
+                return
+        self._write(directory, [mutation])
+
+    def _is_due(self, first_added: float, mutations: List, now: float) -> bool:
+        return now - first_added >= self.flush_interval or len(mutations) >= self.max_pending_mutations
+
+    def _has_due(self) -> bool:
+        # must be called while holding the condition
+        now = monotonic()
+        return any(self._is_due(first_added, mutations, now) for first_added, mutations in self._pending.values())
+
+    def _take_due(self) -> List[Tuple[Path, List[Tuple[str, str, str, Dict, bool]]]]:
+        # must be called while holding the condition
+        now = monotonic()
+        due = [d for d, (first_added, mutations) in self._pending.items() if self._is_due(first_added, mutations, now)]
+        return [(d, self._pending.pop(d)[1]) for d in due]
+
+    def _next_wait(self) -> Optional[float]:
+        # must be called while holding the condition
+        if not self._pending:
+            return None
+        oldest = min(first_added for first_added, _ in self._pending.values())
+        return max(0.0, oldest + self.flush_interval - monotonic())
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._has_due():
+                    self._condition.wait(self._next_wait())
+                if self._closed:
+                    return  # close() writes whatever is left on its own thread
+            # take the due changes only once the write lock is held, so a concurrent flush() can't write newer
+            # changes for the same directory ahead of them
+            with self._write_lock:
+                with self._condition:
+                    due = self._take_due()
+                for directory, mutations in due:
+                    self._write(directory, mutations)
+
+    def _write(self, directory: Path, mutations: List[Tuple[str, str, str, Dict, bool]]) -> None:
+        try:
+            CacheFile(directory).add_file_attributes(mutations)
+        except EPLaunchFileException as e:
+            if self.on_error:
+                self.on_error(directory, e)
+            return
+        if self.on_flushed:
+            self.on_flushed(directory)
@@ -0,0 +1,139 @@
+import os
+from collections import deque
+from pathlib import Path
+from queue import Queue
+from threading import Condition, Lock, Thread
+from time import monotonic
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+# the listing of a directory: the sorted names of its subdirectories, or None if it can't be read
+DirectoryListing = Optional[List[str]]
+
+
+def list_subdirectories(directory: Path) -> DirectoryListing:
+    """
+    Lists the subdirectories of a directory with os.scandir, which knows which entries are directories from the
+    directory listing itself on most file systems, so only links and entries of unknown type cost a stat call
+
+    :param directory: The directory to list
+    :return: The sorted names of the subdirectories (including links to directories), or None if access is denied;
+             a directory that can't be listed for any other reason, such as having been removed, has none
+    """
+    names = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        names.append(entry.name)
+                except OSError:  # a broken link, or removed while listing
+                    continue
+    except PermissionError:
+        return None
+    except OSError:
+        return []
+    return sorted(names)
+
+
+class DirectoryChildrenCache:
+    """
+    Lists subdirectories on background threads and remembers the listings for ttl seconds, for a directory tree that
+    must not block while a slow (network) directory is listed.
+
+    request lists a directory on one of a few worker threads and calls back with the listing; several requests for
+    the same directory while it is being listed share one listing.  prefetch lists directories that are likely to be
+    needed next on a separate single thread, so it never delays requests, and a new prefetch replaces whatever the
+    previous one had not gotten to yet.  Callbacks are called from the background threads, so GUI code must hand them
+    off to the GUI thread.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_workers: int = 2):
+        """
+        Constructor for the cache, which starts its background threads
+
+        :param ttl: The number of seconds a listing is considered fresh
+        :param max_workers: The number of threads listing requested directories
+        """
+        self.ttl = ttl
+        self._lock = Lock()
+        self._listings: Dict[Path, Tuple[float, DirectoryListing]] = {}  # directory -> (time listed, listing)
+        self._waiting: Dict[Path, List[Callable[[Path, DirectoryListing], None]]] = {}  # directories being listed
+        # daemon threads, so that a listing stuck on an unresponsive share never keeps the program from exiting
+        self._requests: Queue = Queue()
+        for i in range(max_workers):
+            Thread(target=self._run_requests, name=f'DirectoryChildren{i}', daemon=True).start()
+        self._prefetch_queue: Deque[Path] = deque()
+        self._prefetch_condition = Condition(self._lock)
+        Thread(target=self._run_prefetch, name='DirectoryChildrenPrefetch', daemon=True).start()
+
+    def cached(self, directory: Path) -> Optional[Tuple[DirectoryListing, bool]]:
+        """
+        Gets the remembered listing of a directory, without listing it
+
+        :param directory: The directory
+        :return: None if the directory has not been listed, otherwise a tuple of its listing and whether that listing
+                 is still fresh
+        """
+        with self._lock:
+            known = self._listings.get(directory)
+        if known is None:
+            return None
+        return known[1], monotonic() - known[0] < self.ttl
+
+    def request(self, directory: Path, on_listed: Callable[[Path, DirectoryListing], None]) -> None:
+        """
+        Lists a directory in the background, even if a fresh listing is remembered
+
+        :param directory: The directory to list
+        :param on_listed: Called with the directory and its listing, from a background thread
+        """
+        with self._lock:
+            if directory in self._waiting:
+                self._waiting[directory].append(on_listed)
+                return
+            self._waiting[directory] = [on_listed]
+        self._requests.put(directory)
+
+    def prefetch(self, directories: Iterable[Path]) -> None:
+        """
+        Lists directories in the background that have no fresh listing yet, so that requesting them later is quick;
+        any directories left from earlier prefetches are dropped
+
+        :param directories: The directories, in the order to list them
+        """
+        with self._prefetch_condition:
+            self._prefetch_queue.clear()
+            self._prefetch_queue.extend(directories)
+            self._prefetch_condition.notify()
+
+    def invalidate(self, directory: Optional[Path] = None) -> None:
+        """Forgets the listing of a directory, or of all directories if None"""
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(directory, None)
+
+    def _list(self, directory: Path) -> None:
+        listing = list_subdirectories(directory)
+        with self._lock:
+            self._listings[directory] = (monotonic(), listing)
+            callbacks = self._waiting.pop(directory, [])
+        for on_listed in callbacks:
+            on_listed(directory, listing)
+
+    def _run_requests(self) -> None:
+        while True:
+            self._list(self._requests.get())
+
+    def _run_prefetch(self) -> None:
+        while True:
+            with self._prefetch_condition:
+                while not self._prefetch_queue:
+                    self._prefetch_condition.wait()
+                directory = self._prefetch_queue.popleft()
+                known = self._listings.get(directory)
+                if directory in self._waiting or (known is not None and monotonic() - known[0] < self.ttl):
+                    continue
+                self._waiting[directory] = []  # so that requests meanwhile wait for this listing
+            self._list(directory)
@@ -0,0 +1,88 @@
+import mimetypes
+from datetime import datetime
+from fnmatch import translate
+from functools import lru_cache
+from os import path, scandir
+from pathlib import Path
+from re import IGNORECASE, compile
+from typing import Callable, List, Tuple
+
+
+@lru_cache(maxsize=64)
+def _compile_file_types(file_types: Tuple[str, ...]) -> Callable[[str], bool]:
+    # one alternation of all patterns, case-insensitive where the platform's file names are, just like fnmatch
+    flags = IGNORECASE if path.normcase('A') == 'a' else 0
+    pattern = compile('|'.join(f"(?:{translate(file_type)})" for file_type in file_types), flags)
+    return lambda file_name: pattern.match(file_name) is not None
+
+
+def file_type_matcher(file_types: List[str]) -> Callable[[str], bool]:
+    """
+    Builds a function that checks whether a file name matches any of a list of glob patterns, equivalent to calling
+    fnmatch with each pattern, but with all patterns compiled into a single regular expression.
+    Matchers are remembered, so calling this again with the same patterns is cheap.
+
+    :param file_types: A list of glob patterns, such as a workflow's file_types
+    :return: A function taking a file name and returning True if it matches any of the patterns
+    """
+    if not file_types:
+        return lambda _file_name: False
+    return _compile_file_types(tuple(file_types))
+
+
+def _mime_type_key(file_name: str) -> str:
+    # mimetypes looks past compression suffixes (foo.tar.gz), so the key needs to keep one more suffix for those
+    root, extension = path.splitext(file_name)
+    if extension in mimetypes.encodings_map or extension.lower() in mimetypes.encodings_map \
+            or extension.lower() in mimetypes.suffix_map:
+        extension = path.splitext(root)[1] + extension
+    return extension
+
+
+@lru_cache(maxsize=1024)
+def _mime_type_for_key(key: str) -> str:
+    guessed_type = mimetypes.guess_type('file' + key)[0]
+    return "(unknown)" if guessed_type is None else guessed_type
+
+
+def mime_type_description(file_name: str) -> str:
+    """
+    Gets the guessed mime type of a file for display, remembering the result for each file extension
+
+    :param file_name: The name of the file
+    :return: The mime type, or "(unknown)" if it can't be guessed
+    """
+    return _mime_type_for_key(_mime_type_key(file_name))
+
+
+def list_workflow_files(directory: Path, file_types: List[str]) -> List[Tuple[str, str, str, str]]:
+    """
+    Lists the non-hidden files in a directory that match any of the given file types, along with display data.
+    The directory is read with os.scandir, so file names are filtered before anything is looked up on disk, and each
+    matching file costs at most one stat call (none on Windows, where scandir already returns the stat data).
+
+    :param directory: The directory to list
+    :param file_types: List of file patterns to keep, usually the file types of the current workflow
+    :return: A list of tuples which each contain (file name, file type, file size, modified time) for each file,
+             sorted by file name
+    """
+    matches = file_type_matcher(file_types)
+    file_list = []
+    with scandir(directory) as entries:
+        for entry in entries:
+            file_name = entry.name
+            if file_name.startswith('.') or not matches(file_name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                file_stat = entry.stat()
+                # the modified time shown is that of a link itself, rather than its target
+                modified_time = entry.stat(follow_symlinks=False).st_mtime if entry.is_symlink() else file_stat.st_mtime
+            except OSError:  # removed since the directory was read, or a broken link
+                continue
+            modified_time_string = str(datetime.fromtimestamp(modified_time).replace(microsecond=0))
+            file_size_string = '{0:12,.0f} KB'.format(file_stat.st_size / 1024)
+            file_list.append((file_name, mime_type_description(file_name), file_size_string, modified_time_string))
+    file_list.sort(key=lambda x: x[0])
+    return file_list
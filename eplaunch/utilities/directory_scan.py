@@ -0,0 +1,161 @@
+from pathlib import Path
+from threading import Event, Thread
+from typing import Callable, Dict, Iterable, List, Optional
+
+from eplaunch.utilities.cache import CacheFile
+from eplaunch.utilities.directory_listing import list_workflow_files
+from eplaunch.utilities.output_index import OutputIndex
+from eplaunch.workflows.workflow import Workflow
+
+
+def build_file_row(workflow: Workflow, file_name: str, files_in_current_workflow: Dict,
+                   stale_states: Dict[str, Optional[bool]]) -> List:
+    """
+    Builds the file list row for one file
+
+    :param workflow: The current workflow, whose columns make up the row
+    :param file_name: The name of the file
+    :param files_in_current_workflow: The cached data of the files in the directory for the workflow
+    :param stale_states: The stale states of the files in the cache, see OutputIndex.stale_states
+    :return: The row, a list of column values starting with the file name
+    """
+    # listview row always includes the filename itself, so start the array with that
+    row = [file_name]
+    # if it in the cache then the listview row can include additional data
+    if file_name in files_in_current_workflow:
+        # potentially add a stale column token
+        response = stale_states.get(file_name)
+        if response is None:  # doesn't support stale, so ignore
+            pass
+        elif response:  # does support stale and it's true
+            row.append('*')
+        else:  # does support stale and it's not
+            row.append('')
+        cached_file_info = files_in_current_workflow[file_name]
+        if workflow.uses_weather:
+            if CacheFile.ParametersKey in cached_file_info:
+                if CacheFile.WeatherFileKey in cached_file_info[CacheFile.ParametersKey]:
+                    full_weather_path = cached_file_info[CacheFile.ParametersKey][CacheFile.WeatherFileKey]
+                    weather_path_object = Path(full_weather_path)
+                    row.append(weather_path_object.name)
+                else:
+                    row.append('<no_weather_files>')
+            else:
+                row.append('<no_weather_file>')
+        if CacheFile.ResultsKey in cached_file_info:
+            for column in workflow.columns:
+                if column in cached_file_info[CacheFile.ResultsKey]:
+                    row.append(cached_file_info[CacheFile.ResultsKey][column])
+    return row
+
+
+def build_file_rows(directory: Path, workflow: Workflow, file_names: Iterable[str],
+                    output_index: Optional[OutputIndex] = None) -> List[List]:
+    """
+    Builds the file list rows for some of the files in a directory, such as the ones a DirectoryWatcher reported as
+    changed, leaving out any that are not (or no longer) files of the workflow
+
+    :param directory: The directory holding the files
+    :param workflow: The current workflow, whose file types and columns make up the rows
+    :param file_names: The names of the files
+    :param output_index: The output index of the directory to get stale states from, to reuse what it already knows
+    :return: The rows of the files that exist, each a list of column values starting with the file name, in file name
+             order
+    """
+    file_names = sorted(
+        f for f in file_names if not f.startswith('.') and workflow.matches_file_type(f) and (directory / f).is_file()
+    )
+    if not file_names:
+        return []
+    files_in_current_workflow = CacheFile(directory).get_files_for_workflow(workflow.name)
+    stale_states = _stale_states_of_cached_files(
+        output_index or OutputIndex(directory), workflow, file_names, files_in_current_workflow
+    )
+    return [build_file_row(workflow, f, files_in_current_workflow, stale_states) for f in file_names]
+
+
+def _stale_states_of_cached_files(output_index: OutputIndex, workflow: Workflow, file_names: Iterable[str],
+                                  files_in_current_workflow: Dict) -> Dict[str, Optional[bool]]:
+    # only files in the cache show a stale column
+    cached_file_names = [f for f in file_names if f in files_in_current_workflow]
+    return output_index.stale_states(cached_file_names, workflow.output_suffixes)
+
+
+class DirectoryScanThread(Thread):
+    """
+    Builds the file list rows for one directory on a background thread: the directory listing, the cache lookup and
+    the stale states, which can each take a long time on big or slow (network) directories.
+
+    Rows are handed to on_batch in groups of batch_size as they are built, so a GUI can fill in progressively.
+    Each scan carries a generation number, which is passed back with every call, so that a receiver can ignore calls
+    from scans it has since replaced.  A scan that is no longer wanted should be cancelled, after which it stops at the
+    next file and makes no further calls.  Note that the callbacks are called from the scan thread, so GUI code must
+    hand them off to the GUI thread.
+    """
+
+    def __init__(self, generation: int, directory: Path, workflow: Optional[Workflow],
+                 on_batch: Callable[[int, List[List], bool], None], on_error: Callable[[int, str], None],
+                 batch_size: int = 250, output_index: Optional[OutputIndex] = None):
+        """
+        Constructor for the scan thread, which starts it immediately
+
+        :param generation: A number identifying this scan, passed back to the callbacks
+        :param directory: The directory to scan
+        :param workflow: The current workflow, whose file types, columns and cached results make up the rows; if
+                         None, no files are listed
+        :param on_batch: Called with the generation, a list of rows (each a list of column values starting with the
+                         file name, in file name order), and whether this is the final batch
+        :param on_error: Called with the generation and a message if the scan fails, instead of the final batch
+        :param batch_size: Number of rows per batch
+        :param output_index: The output index of the directory to get stale states from, which keeps what it learns
+                             for later scans; if None, a new one is used
+        """
+        super().__init__(daemon=True)
+        self.generation = generation
+        self.directory = directory
+        self.workflow = workflow
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.output_index = output_index or OutputIndex(directory)
+        self._cancelled = Event()
+        self.start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self) -> None:
+        try:
+            self._scan()
+        except Exception as e:  # noqa -- anything from file system or cache errors, to report rather than lose
+            if not self.is_cancelled():
+                self.on_error(self.generation, f"Could not list directory {self.directory}: {e}")
+
+    def _scan(self) -> None:
+        if self.workflow is None:
+            self.on_batch(self.generation, [], True)
+            return
+        files_in_dir = list_workflow_files(self.directory, self.workflow.file_types)
+        if self.is_cancelled():
+            return
+        # there should be a cache file there, so get the cached data for the current workflow if it exists
+        files_in_current_workflow = CacheFile(self.directory).get_files_for_workflow(self.workflow.name)
+        # the stale states of all files come from a single pass over the output folders
+        stale_states = _stale_states_of_cached_files(
+            self.output_index, self.workflow, (f[0] for f in files_in_dir), files_in_current_workflow
+        )
+        if self.is_cancelled():
+            return
+        rows = []
+        for file_structure in files_in_dir:
+            if self.is_cancelled():
+                return
+            rows.append(build_file_row(self.workflow, file_structure[0], files_in_current_workflow, stale_states))
+            if len(rows) == self.batch_size:
+                self.on_batch(self.generation, rows, False)
+                rows = []
+        if not self.is_cancelled():
+            self.on_batch(self.generation, rows, True)
@@ -0,0 +1,351 @@
+import os
+import select
+import struct
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from pathlib import Path
+from threading import Event, Thread
+from time import monotonic, time_ns
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from eplaunch.utilities.crossplatform import Platform
+from eplaunch.utilities.output_index import OutputFolderPrefix
+
+
+class FileChange:
+    """
+    One change seen by a DirectoryWatcher.
+
+    For a file in the watched directory itself, output_folder is None and file_name is the name of the file.
+    For anything in an output folder (EPLaunchRun_<input file name without extension>), output_folder is the name of
+    that folder, and file_name is the name of the file within it, or None if the folder itself was added or removed.
+    A change of kind Unknown means changes may have been missed, so anything derived from the directory should be
+    rebuilt from scratch.
+    """
+
+    Added = 'added'
+    Removed = 'removed'
+    Modified = 'modified'
+    Unknown = 'unknown'
+
+    def __init__(self, kind: str, file_name: Optional[str] = None, output_folder: Optional[str] = None):
+        self.kind = kind
+        self.file_name = file_name
+        self.output_folder = output_folder
+
+    def _key(self) -> Tuple:
+        return self.kind, self.file_name, self.output_folder
+
+    def __eq__(self, other):
+        return isinstance(other, FileChange) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"FileChange({self.kind!r}, {self.file_name!r}, {self.output_folder!r})"
+
+
+class DirectoryWatcher(Thread):
+    """
+    Watches a directory and its output folders on a background thread, and reports what changed in batches.
+
+    Changes that arrive close together, such as all the files a simulation writes when it finishes, are collected
+    until settle_time seconds pass without another one, or max_delay seconds after the first, and then handed to
+    on_changes as one list, with repeats removed.  on_changes is called from the watcher thread, so GUI code must
+    hand it off to the GUI thread.  Use watch_directory to get the best watcher for the platform; the watcher starts
+    immediately and runs until stop() is called or the directory goes away.
+    """
+
+    Coalesces = True  # False for watchers whose changes already come in batches
+
+    def __init__(self, directory: Path, on_changes: Callable[[Path, List[FileChange]], None],
+                 settle_time: float = 0.2, max_delay: float = 1.0):
+        """
+        Constructor for the watcher thread, which starts it immediately
+
+        :param directory: The directory to watch
+        :param on_changes: Called with the directory and the list of changes in each batch
+        :param settle_time: Seconds without changes after which a batch is reported
+        :param max_delay: Seconds after the first change of a batch at which it is reported even if changes continue
+        """
+        super().__init__(daemon=True, name=f'DirectoryWatcher({directory})')
+        self.directory = directory
+        self.on_changes = on_changes
+        self.settle_time = settle_time
+        self.max_delay = max_delay
+        self._stopped = Event()
+        self._ready = Event()
+        self.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Waits until the watcher sees changes, returning False if it isn't ready within timeout seconds"""
+        return self._ready.wait(timeout)
+
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def _prepare(self) -> None:
+        """Sets up anything that takes a while on the watcher thread, rather than in the constructor"""
+        pass
+
+    def _read_changes(self, timeout: float) -> List[FileChange]:
+        """Waits up to timeout seconds for changes and returns them, an empty list if there are none"""
+        raise NotImplementedError()
+
+    def _close(self) -> None:
+        pass
+
+    def run(self) -> None:
+        try:
+            self._prepare()
+            self._ready.set()
+            pending: Dict[FileChange, None] = {}  # in the order seen
+            first_change_time = 0.0
+            while not self.is_stopped():
+                changes = self._read_changes(self.settle_time if pending else 0.5)
+                if changes and not pending:
+                    first_change_time = monotonic()
+                pending.update(dict.fromkeys(changes))
+                if not pending:
+                    continue
+                if not self.Coalesces or not changes or monotonic() - first_change_time >= self.max_delay:
+                    if not self.is_stopped():
+                        self.on_changes(self.directory, list(pending))
+                    pending = {}
+        except OSError:  # the directory went away or can't be read anymore, so there is nothing left to watch
+            pass
+        finally:
+            self._close()
+
+
+def _list_output_folders(directory: Path) -> List[str]:
+    with os.scandir(directory) as entries:
+        return [e.name for e in entries if e.name.startswith(OutputFolderPrefix) and e.is_dir(follow_symlinks=False)]
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """A DirectoryWatcher using Linux inotify, so it costs nothing while nothing changes"""
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WatchMask = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | \
+        IN_MOVE_SELF
+
+    EventHeader = struct.Struct('iIII')  # struct inotify_event: wd, mask, cookie, len, followed by len bytes of name
+
+    def __init__(self, directory: Path, on_changes: Callable[[Path, List[FileChange]], None], **kwargs):
+        self._libc = CDLL(find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(get_errno(), "Could not initialize inotify")
+        self._folders_by_watch: Dict[int, Optional[str]] = {}  # watch descriptor -> output folder, None for directory
+        self._main_watch = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WatchMask)
+        if self._main_watch < 0:
+            os.close(self._fd)
+            raise OSError(get_errno(), f"Could not watch directory {directory}")
+        self._folders_by_watch[self._main_watch] = None
+        super().__init__(directory, on_changes, **kwargs)
+
+    def _add_output_folder_watch(self, folder_name: str) -> None:
+        watch = self._libc.inotify_add_watch(self._fd, os.fsencode(self.directory / folder_name), self.WatchMask)
+        if watch >= 0:  # otherwise it is already gone, or the system is out of watches, so changes there are missed
+            self._folders_by_watch[watch] = folder_name
+
+    def _prepare(self) -> None:
+        for folder_name in _list_output_folders(self.directory):
+            self._add_output_folder_watch(folder_name)
+
+    def _read_changes(self, timeout: float) -> List[FileChange]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset < len(buffer):
+            watch, mask, _, name_length = self.EventHeader.unpack_from(buffer, offset)
+            offset += self.EventHeader.size
+            name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+            change = self._to_change(watch, mask, name)
+            if change is not None:
+                changes.append(change)
+        return changes
+
+    def _to_change(self, watch: int, mask: int, name: str) -> Optional[FileChange]:
+        if mask & self.IN_Q_OVERFLOW:
+            return FileChange(FileChange.Unknown)
+        if watch not in self._folders_by_watch:
+            return None  # a late event for a watch that has been removed
+        if mask & (self.IN_IGNORED | self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+            if watch == self._main_watch:
+                self.stop()  # the directory itself is gone
+            elif mask & self.IN_IGNORED:
+                del self._folders_by_watch[watch]
+            return None
+        if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+            kind = FileChange.Added
+        elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+            kind = FileChange.Removed
+        else:
+            kind = FileChange.Modified
+        output_folder = self._folders_by_watch[watch]
+        if output_folder is not None:
+            return None if mask & self.IN_ISDIR else FileChange(kind, name, output_folder)
+        if mask & self.IN_ISDIR:
+            if not name.startswith(OutputFolderPrefix):
+                return None
+            if kind == FileChange.Added:
+                self._add_output_folder_watch(name)
+            return FileChange(kind, None, name)
+        return FileChange(kind, name)
+
+    def _close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher(DirectoryWatcher):
+    """
+    A DirectoryWatcher that polls every poll_interval seconds, for platforms without a supported change notification
+    mechanism, comparing the modified times and sizes of the files with the previous poll.
+
+    Adding, removing or renaming a file changes the modified time of its folder, so a poll only stats the directory
+    and its output folders, and only lists the ones whose modified time changed again, with the details of each file
+    taken from the listing, which needs no further system calls on Windows.  A folder that was listed within
+    RacySeconds of its modified time is listed again on the next poll too, as file systems with coarse timestamps may
+    not change the time for another change that soon.  Writing to a file in place doesn't change its folder at all
+    though, so every full_rescan_interval seconds all folders are listed anyway.
+    """
+
+    Coalesces = False
+    RacySeconds = 2
+
+    def __init__(self, directory: Path, on_changes: Callable[[Path, List[FileChange]], None],
+                 poll_interval: float = 2.0, full_rescan_interval: float = 60.0, **kwargs):
+        self.poll_interval = poll_interval
+        self.full_rescan_interval = full_rescan_interval
+        # output folder, or None for the directory itself -> file name -> (modified time, size)
+        self._snapshot: Dict[Optional[str], Dict[str, Tuple[int, int]]] = {}
+        self._listed_times: Dict[Optional[str], int] = {}  # the modified time of each folder when it was listed
+        self._racy_folders: Set[Optional[str]] = set()
+        self._last_full_scan = 0.0
+        super().__init__(directory, on_changes, **kwargs)
+
+    def _list_folder(self, folder: Optional[str]) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, int]]:
+        # the files of a folder, and for the directory itself, the modified time of each output folder
+        files = {}
+        output_folder_times = {}
+        with os.scandir(self.directory if folder is None else self.directory / folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        file_stat = entry.stat()
+                        files[entry.name] = (file_stat.st_mtime_ns, file_stat.st_size)
+                    elif folder is None and entry.name.startswith(OutputFolderPrefix) and \
+                            entry.is_dir(follow_symlinks=False):
+                        output_folder_times[entry.name] = entry.stat(follow_symlinks=False).st_mtime_ns
+                except OSError:  # removed while listing
+                    continue
+        return files, output_folder_times
+
+    def _needs_listing(self, folder: Optional[str], modified_time: int, full: bool) -> bool:
+        return full or folder in self._racy_folders or self._listed_times.get(folder) != modified_time
+
+    def _take_snapshot(self, full: bool) -> Dict[Optional[str], Dict[str, Tuple[int, int]]]:
+        scan_time = time_ns()
+        snapshot = {}
+        listed_times = {}
+        directory_time = os.stat(self.directory).st_mtime_ns
+        if self._needs_listing(None, directory_time, full):
+            snapshot[None], output_folder_times = self._list_folder(None)
+        else:  # the same output folders are there, but files may have been added to or removed from them
+            snapshot[None] = self._snapshot[None]
+            output_folder_times = {}
+            for folder in self._snapshot:
+                if folder is not None:
+                    try:
+                        output_folder_times[folder] = os.stat(self.directory / folder).st_mtime_ns
+                    except OSError:  # removed since, which the directory shows once its time changes
+                        continue
+        listed_times[None] = directory_time
+        for folder, folder_time in output_folder_times.items():
+            if self._needs_listing(folder, folder_time, full):
+                try:
+                    snapshot[folder], _ = self._list_folder(folder)
+                except OSError:
+                    continue
+            else:
+                snapshot[folder] = self._snapshot[folder]
+            listed_times[folder] = folder_time
+        racy_nanoseconds = self.RacySeconds * 1_000_000_000
+        self._racy_folders = {f for f, t in listed_times.items() if scan_time - t < racy_nanoseconds}
+        self._listed_times = listed_times
+        return snapshot
+
+    def _prepare(self) -> None:
+        self._snapshot = self._take_snapshot(full=True)
+        self._last_full_scan = monotonic()
+
+    def _read_changes(self, timeout: float) -> List[FileChange]:
+        if self._stopped.wait(self.poll_interval):
+            return []
+        full = monotonic() - self._last_full_scan >= self.full_rescan_interval
+        if full:
+            self._last_full_scan = monotonic()
+        old_snapshot, self._snapshot = self._snapshot, self._take_snapshot(full)
+        changes = []
+        for folder, files in self._snapshot.items():
+            old_files = old_snapshot.get(folder)
+            if old_files is files:  # not listed again
+                continue
+            if old_files is None:  # a new output folder
+                changes.append(FileChange(FileChange.Added, None, folder))
+                old_files = {}
+            for file_name, state in files.items():
+                old_state = old_files.get(file_name)
+                if old_state is None:
+                    changes.append(FileChange(FileChange.Added, file_name, folder))
+                elif old_state != state:
+                    changes.append(FileChange(FileChange.Modified, file_name, folder))
+            for file_name in old_files.keys() - files.keys():
+                changes.append(FileChange(FileChange.Removed, file_name, folder))
+        for folder in old_snapshot.keys() - self._snapshot.keys():
+            changes.append(FileChange(FileChange.Removed, None, folder))
+            changes.extend(FileChange(FileChange.Removed, file_name, folder) for file_name in old_snapshot[folder])
+        return changes
+
+
+def watch_directory(directory: Path, on_changes: Callable[[Path, List[FileChange]], None]) -> DirectoryWatcher:
+    """
+    Starts watching a directory and its output folders with inotify on Linux, or by polling elsewhere, or if inotify
+    is not available
+
+    :param directory: The directory to watch
+    :param on_changes: Called from the watcher thread with the directory and a list of FileChange for each batch of
+                       changes
+    :return: The running watcher, to stop() once it is no longer needed
+    """
+    if Platform.get_current_platform() == Platform.LINUX:
+        try:
+            return InotifyWatcher(directory, on_changes)
+        except (OSError, AttributeError):  # no usable libc, or out of inotify instances or watches
+            pass
+    return PollingWatcher(directory, on_changes)
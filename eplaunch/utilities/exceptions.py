@@ -2,3 +2,4 @@ class EPLaunchFileException(Exception):
     def __init__(self, file_path, message=''):
         super(Exception, self).__init__(self, message)
         self.file_path = file_path
+        self.message = message
@@ -0,0 +1,171 @@
+from array import array
+from numbers import Number
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class FileListModel:
+    """
+    The rows of the file listing, independent of any widget, so that a widget only has to show the rows in view.
+
+    Each row is a tuple of column values starting with the file name, which is the key of the row.  Rows are kept in a
+    flat list, and the current view, which is the rows that pass the filter in sort order, is a compact array of
+    indices into that list.  The view is only rebuilt when it is asked for after a change that affects it, so many
+    changes in a row cost a single rebuild.
+    """
+
+    def __init__(self):
+        self._rows: List[Tuple] = []
+        self._index_by_name: Dict[str, int] = {}
+        self.sort_column = 0
+        self.sort_descending = False
+        self.filter_text = ''
+        self._view = array('L')
+        self._view_positions: Optional[Dict[str, int]] = None  # name -> position in the view, built when needed
+        self._view_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, file_name: str) -> Optional[Tuple]:
+        index = self._index_by_name.get(file_name)
+        return None if index is None else self._rows[index]
+
+    def upsert(self, rows: Iterable[Sequence]) -> bool:
+        """
+        Adds rows for new file names and replaces the rows of existing ones
+
+        :param rows: The rows, each a sequence of column values starting with the file name
+        :return: True if anything changed
+        """
+        changed = False
+        for row in rows:
+            values = tuple(row)
+            index = self._index_by_name.get(values[0])
+            if index is None:
+                self._index_by_name[values[0]] = len(self._rows)
+                self._rows.append(values)
+                self._view_dirty = True
+            elif self._rows[index] != values:
+                self._rows[index] = values
+                if self.sort_column != 0:  # the name never changes, so only other sort columns can move the row
+                    self._view_dirty = True
+            else:
+                continue
+            changed = True
+        return changed
+
+    def retain(self, file_names: Iterable[str]) -> bool:
+        """
+        Removes the rows of all files not in the given collection
+
+        :param file_names: The names of the files whose rows should stay
+        :return: True if any rows were removed
+        """
+        keep = set(file_names)
+        if all(name in keep for name in self._index_by_name):
+            return False
+        self._rows = [row for row in self._rows if row[0] in keep]
+        self._index_by_name = {row[0]: i for i, row in enumerate(self._rows)}
+        self._view_dirty = True
+        return True
+
+    def remove(self, file_names: Iterable[str]) -> bool:
+        """
+        Removes the rows of the given files, ignoring files that have no row
+
+        :param file_names: The names of the files whose rows should go
+        :return: True if any rows were removed
+        """
+        remove = {name for name in file_names if name in self._index_by_name}
+        if not remove:
+            return False
+        return self.retain(name for name in self._index_by_name if name not in remove)
+
+    def names(self) -> List[str]:
+        """Returns the names of all files in the model, in no particular order"""
+        return list(self._index_by_name)
+
+    def set_rows(self, rows: Sequence[Sequence]) -> bool:
+        """Makes the model hold exactly these rows, returning True if anything changed"""
+        upserted = self.upsert(rows)
+        retained = self.retain(row[0] for row in rows)
+        return upserted or retained
+
+    def sort_by(self, column: int, descending: bool = False) -> None:
+        """
+        Sets the sort order of the view.  Rows that have no value in the sort column come last, numbers sort before
+        text, text sorts case-insensitively, and rows that compare equal stay in file name order.
+        """
+        if (column, descending) != (self.sort_column, self.sort_descending):
+            self.sort_column = column
+            self.sort_descending = descending
+            self._view_dirty = True
+
+    def set_filter(self, filter_text: str) -> None:
+        """Limits the view to files whose name contains the given text, ignoring case; empty text shows all files"""
+        if filter_text != self.filter_text:
+            self.filter_text = filter_text
+            self._view_dirty = True
+
+    def _sort_key(self, index: int):
+        row = self._rows[index]
+        if self.sort_column == 0:
+            return row[0]
+        if self.sort_column >= len(row) or row[self.sort_column] == '':
+            return 2, 0, row[0]
+        value = row[self.sort_column]
+        if isinstance(value, Number) and not isinstance(value, bool):
+            return 0, value, row[0]
+        return 1, str(value).lower(), row[0]
+
+    def _update_view(self) -> None:
+        if not self._view_dirty:
+            return
+        if self.filter_text:
+            lower_filter = self.filter_text.lower()
+            indices = [i for i, row in enumerate(self._rows) if lower_filter in row[0].lower()]
+        else:
+            indices = range(len(self._rows))
+        self._view = array('L', sorted(indices, key=self._sort_key, reverse=self.sort_descending))
+        self._view_positions = None
+        self._view_dirty = False
+
+    def view_count(self) -> int:
+        """Returns the number of rows in the view"""
+        self._update_view()
+        return len(self._view)
+
+    def view_rows(self, start: int = 0, count: Optional[int] = None) -> List[Tuple]:
+        """
+        Gets a window of rows from the view
+
+        :param start: The position in the view of the first row to get
+        :param count: The number of rows to get, defaults to all rows from start on
+        :return: The rows, in view order
+        """
+        self._update_view()
+        stop = len(self._view) if count is None else start + count
+        return [self._rows[i] for i in self._view[start:stop]]
+
+    def view_position(self, file_name: str) -> Optional[int]:
+        """Returns the position of a file in the view, or None if it is not in the view"""
+        self._update_view()
+        if self._view_positions is None:
+            self._view_positions = {self._rows[i][0]: position for position, i in enumerate(self._view)}
+        return self._view_positions.get(file_name)
+
+    def view_names_between(self, first_name: str, last_name: str) -> List[str]:
+        """
+        Gets the names of the rows from one file to another in the view, such as for selecting a range of files
+
+        :param first_name: The file at one end of the range
+        :param last_name: The file at the other end of the range, which may come before first_name in the view
+        :return: The names of the files in the range, both ends included, in view order, or an empty list if either
+                 file is not in the view
+        """
+        first_position, last_position = self.view_position(first_name), self.view_position(last_name)
+        if first_position is None or last_position is None:
+            return []
+        if last_position < first_position:
+            first_position, last_position = last_position, first_position
+        return [row[0] for row in self.view_rows(first_position, last_position - first_position + 1)]
@@ -0,0 +1,112 @@
+from locale import getpreferredencoding
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+BlockSize = 64 * 1024  # characters read and tokenized at a time
+
+PathLike = Union[str, Path]
+
+
+def _iter_object_texts(file_path: PathLike, encoding: str) -> Iterator[str]:
+    # yields the text of each object, with the lines of the object stripped of comments and whitespace and joined, and
+    # without the ';', the same way the built-in workflows used to for the whole file, but a block of lines at a time
+    pending = ''  # the start of an object that continues into the next block
+    remainder = ''
+    with open(file_path, encoding=encoding) as f:
+        while True:
+            block = f.read(BlockSize)
+            data = remainder + block
+            if block:  # only tokenize complete lines, so that a comment is never split across blocks
+                end = data.rfind('\n') + 1
+                data, remainder = data[:end], data[end:]
+            texts = ''.join([line.partition('!')[0].strip() for line in data.split('\n')]).split(';')
+            texts[0] = pending + texts[0]
+            pending = texts.pop()
+            for text in texts:
+                if text and not text.isspace():  # a ';' on its own is not an object
+                    yield text
+            if not block:
+                break
+
+
+def iter_idf_objects(file_path: PathLike, encoding: Optional[str] = None) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Reads the objects of an IDF (or IMF) file one at a time, without holding more than a block of the file and the
+    current object in memory.  Comments (from a '!' to the end of the line) are dropped, and an object runs from its
+    type to the next ';', across any number of lines, with the fields separated by ','.
+
+    :param file_path: The IDF file
+    :param encoding: The encoding of the file, defaults to the same one open() uses
+    :return: An iterator over a tuple for each object, with the object type and the list of all fields (starting with
+             the object type) stripped of whitespace
+    :raises OSError: If the file can't be read
+    :raises UnicodeDecodeError: If the file isn't valid text in the encoding, even where the bad bytes are in a comment
+    """
+    for text in _iter_object_texts(file_path, encoding or getpreferredencoding(False)):
+        fields = [field.strip() for field in text.split(',')]
+        yield fields[0], fields
+
+
+class IDFObjectIndex:
+    """
+    The number of objects of an IDF file by object type, and the first object of each type, from a single pass over
+    the file.  Only the type of each object is looked at during the pass, and only the first object of each type is
+    split into fields, so the index stays small and quick to build even for large files.
+    """
+
+    def __init__(self, file_path: PathLike, encoding: Optional[str] = None):
+        """
+        Constructor for the index, which reads the whole file
+
+        :param file_path: The IDF file
+        :param encoding: The encoding of the file, defaults to the same one open() uses
+        :raises OSError: If the file can't be read
+        :raises UnicodeDecodeError: If the file isn't valid text in the encoding
+        """
+        self.counts: Dict[str, int] = {}  # upper case object type -> number of objects of the type
+        self._first_texts: Dict[str, str] = {}  # upper case object type -> text of the first object of the type
+        counts_by_type: Dict[str, int] = {}  # by the object type as it is in the file, to only upper case those
+        first_texts_by_type: Dict[str, str] = {}
+        for text in _iter_object_texts(file_path, encoding or getpreferredencoding(False)):
+            object_type = text.partition(',')[0].strip()
+            if object_type in counts_by_type:
+                counts_by_type[object_type] += 1
+            else:
+                counts_by_type[object_type] = 1
+                first_texts_by_type[object_type] = text
+        for object_type, count in counts_by_type.items():  # in the order each type first appears in the file
+            upper_type = object_type.upper()
+            self.counts[upper_type] = self.counts.get(upper_type, 0) + count
+            self._first_texts.setdefault(upper_type, first_texts_by_type[object_type])
+
+    def count(self, object_type: str) -> int:
+        """Returns the number of objects of a type, ignoring case like EnergyPlus does"""
+        return self.counts.get(object_type.upper(), 0)
+
+    def count_starting_with(self, type_prefix: str) -> int:
+        """Returns the number of objects whose type starts with a prefix, ignoring case"""
+        type_prefix = type_prefix.upper()
+        return sum(count for object_type, count in self.counts.items() if object_type.startswith(type_prefix))
+
+    def first_fields(self, object_type: str) -> Optional[List[str]]:
+        """Returns the fields of the first object of a type, or None if there is none"""
+        text = self._first_texts.get(object_type.upper())
+        return None if text is None else [field.strip() for field in text.split(',')]
+
+
+def find_idf_object(file_path: PathLike, object_type: str, encoding: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Finds the first object of a type in an IDF file, reading the file only up to the block with that object
+
+    :param file_path: The IDF file
+    :param object_type: The object type, ignoring case
+    :param encoding: The encoding of the file, defaults to the same one open() uses
+    :return: The fields of the object, starting with the object type, or None if there is no such object
+    :raises OSError: If the file can't be read
+    :raises UnicodeDecodeError: If the file up to that block isn't valid text in the encoding
+    """
+    object_type = object_type.upper()
+    for this_type, fields in iter_idf_objects(file_path, encoding):
+        if this_type.upper() == object_type:
+            return fields
+    return None
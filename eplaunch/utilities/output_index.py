@@ -0,0 +1,203 @@
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+OutputFolderPrefix = 'EPLaunchRun_'
+
+
+def output_folder_name(input_file_name: str) -> str:
+    """Returns the name of the folder a workflow writes the outputs of an input file to, EPLaunchRun_<name>"""
+    return OutputFolderPrefix + os.path.splitext(input_file_name)[0]
+
+
+class OutputIndex:
+    """
+    An index of the outputs in one directory and its output folders, for answering questions about the outputs of
+    many input files without looking for each output file on disk.
+
+    stale_states first refreshes the index: the directory itself is listed only if its modified time changed since
+    the last refresh, which is when output folders may have been added or removed, and each output folder is listed
+    only if its own modified time changed, which is when files were added to it or removed from it.  The modified
+    times of output files are looked up when first needed, and remembered along with the listing.  Files that are
+    rewritten in place don't change the modified time of their folder, so whoever knows about such writes, such as a
+    directory watcher or a finished workflow, should call invalidate for the folder.
+
+    Lookups of output files, such as output_paths, use what the index knows without refreshing it, so they are
+    dictionary lookups, apart from listing a folder that was invalidated.  To keep them current between refreshes,
+    whoever watches the directory should pass along what changed with file_added, file_removed and file_modified.
+    An index can be shared between threads.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._lock = Lock()
+        self._directory_mtime: Optional[int] = None
+        self._folder_names: List[str] = []
+        self._directory_files: Set[str] = set()  # the names of everything directly in the directory
+        # output folder name -> (folder modified time, {file name: file modified time, or None until needed})
+        self._folders: Dict[str, Tuple[int, Dict[str, Optional[float]]]] = {}
+
+    def invalidate(self, folder_name: Optional[str] = None) -> None:
+        """
+        Makes the next query list an output folder again even if its modified time didn't change
+
+        :param folder_name: The name of the output folder, or None to list the directory and every folder again
+        """
+        with self._lock:
+            if folder_name is None:
+                self._directory_mtime = None
+                self._folders.clear()
+            else:
+                self._folders.pop(folder_name, None)
+
+    def _refresh(self) -> None:
+        directory_mtime = os.stat(self.directory).st_mtime_ns
+        if directory_mtime != self._directory_mtime:
+            with os.scandir(self.directory) as entries:
+                self._folder_names = []
+                self._directory_files = set()
+                for e in entries:
+                    self._directory_files.add(e.name)
+                    if e.name.startswith(OutputFolderPrefix) and e.is_dir(follow_symlinks=False):
+                        self._folder_names.append(e.name)
+            self._directory_mtime = directory_mtime
+        folders = {}
+        for folder_name in self._folder_names:
+            known = self._folders.get(folder_name)
+            try:
+                folder_mtime = os.stat(os.path.join(str(self.directory), folder_name)).st_mtime_ns
+            except OSError:  # removed since the directory was listed
+                continue
+            if known is not None and known[0] == folder_mtime:
+                folders[folder_name] = known
+            else:
+                self._list_folder(folder_name, folders)
+        self._folders = folders
+
+    def _list_folder(self, folder_name: str, folders: Dict[str, Tuple[int, Dict[str, Optional[float]]]]) -> None:
+        folder_path = os.path.join(str(self.directory), folder_name)
+        try:
+            folder_mtime = os.stat(folder_path).st_mtime_ns
+            with os.scandir(folder_path) as entries:
+                files = dict.fromkeys(e.name for e in entries if e.is_file(follow_symlinks=False))
+        except OSError:  # removed since the directory was listed
+            return
+        folders[folder_name] = (folder_mtime, files)
+
+    def _folder_files(self, folder_name: str) -> Optional[Dict[str, Optional[float]]]:
+        if self._directory_mtime is None:  # never refreshed, or invalidated as a whole
+            self._refresh()
+        folder = self._folders.get(folder_name)
+        if folder is None and folder_name in self._folder_names:  # invalidated
+            self._list_folder(folder_name, self._folders)
+            folder = self._folders.get(folder_name)
+        return None if folder is None else folder[1]
+
+    def _output_file_time(self, folder_name: str, files: Dict[str, Optional[float]], file_name: str) -> Optional[float]:
+        if file_name not in files:
+            return None
+        file_time = files[file_name]
+        if file_time is None:
+            try:
+                file_time = os.lstat(os.path.join(str(self.directory), folder_name, file_name)).st_mtime
+            except OSError:  # removed since the folder was listed
+                return None
+            files[file_name] = file_time
+        return file_time
+
+    def stale_states(self, input_file_names: Iterable[str], output_suffixes: List[str]) -> Dict[str, Optional[bool]]:
+        """
+        Works out whether each of a set of input files is "stale", all at once: an input file is stale if any of its
+        outputs in its EPLaunchRun_ folder is older than it is.
+
+        :param input_file_names: The names of the input files in the directory
+        :param output_suffixes: The output suffixes of the workflow; if '.err' is one of them, only that one is checked
+        :return: A dict from input file name to None if stale cannot be determined (the workflow has no output
+                 suffixes), True if it is stale, and False if not
+        """
+        states = {}
+        with self._lock:
+            self._refresh()  # also for workflows without output suffixes, for the lookups that follow a scan
+            if len(output_suffixes) == 0:
+                return {f: None for f in input_file_names}
+            suffixes = ['.err'] if '.err' in output_suffixes else output_suffixes
+            directory = str(self.directory)
+            for input_file_name in input_file_names:
+                states[input_file_name] = False
+                file_name_no_ext = os.path.splitext(input_file_name)[0]
+                folder_name = OutputFolderPrefix + file_name_no_ext
+                folder = self._folders.get(folder_name)
+                if folder is None:
+                    continue
+                output_times = [self._output_file_time(folder_name, folder[1], file_name_no_ext + s) for s in suffixes]
+                output_times = [t for t in output_times if t is not None]
+                if not output_times:
+                    continue
+                try:
+                    input_file_date = os.lstat(os.path.join(directory, input_file_name)).st_mtime
+                except OSError:
+                    continue
+                states[input_file_name] = any(t < input_file_date for t in output_times)
+        return states
+
+    def output_paths(self, input_file_name: str, suffix: str) -> Tuple[Optional[Path], Optional[Path]]:
+        """
+        Looks up where the output of an input file with a given suffix is, if anywhere
+
+        :param input_file_name: The name of the input file in the directory
+        :param suffix: The output suffix, such as '.err'
+        :return: A tuple of the path of the output next to the input file, and the path of the output in the output
+                 folder of the input file, each None if there is no such file
+        """
+        file_name_no_ext = os.path.splitext(input_file_name)[0]
+        output_file_name = file_name_no_ext + suffix
+        folder_name = OutputFolderPrefix + file_name_no_ext
+        with self._lock:
+            folder_files = self._folder_files(folder_name)
+            in_directory = output_file_name in self._directory_files
+            in_folder = folder_files is not None and output_file_name in folder_files
+        return (
+            self.directory / output_file_name if in_directory else None,
+            self.directory / folder_name / output_file_name if in_folder else None
+        )
+
+    def has_output(self, input_file_name: str, suffix: str) -> bool:
+        """Returns True if there is an output of an input file with the given suffix, see output_paths"""
+        return self.output_paths(input_file_name, suffix) != (None, None)
+
+    def file_added(self, file_name: Optional[str], output_folder: Optional[str] = None) -> None:
+        """
+        Tells the index that a file, or an output folder, was added
+
+        :param file_name: The name of the file, or None if output_folder itself was added
+        :param output_folder: The name of the output folder the file was added to, or None for the directory itself
+        """
+        with self._lock:
+            if output_folder is None:
+                self._directory_files.add(file_name)
+            elif file_name is None:
+                self._directory_files.add(output_folder)
+                if output_folder not in self._folder_names:
+                    self._folder_names.append(output_folder)
+            elif output_folder in self._folders:
+                self._folders[output_folder][1][file_name] = None
+
+    def file_removed(self, file_name: Optional[str], output_folder: Optional[str] = None) -> None:
+        """Tells the index that a file, or an output folder, was removed; see file_added for the arguments"""
+        with self._lock:
+            if output_folder is None:
+                self._directory_files.discard(file_name)
+            elif file_name is None:
+                self._directory_files.discard(output_folder)
+                if output_folder in self._folder_names:
+                    self._folder_names.remove(output_folder)
+                self._folders.pop(output_folder, None)
+            elif output_folder in self._folders:
+                self._folders[output_folder][1].pop(file_name, None)
+
+    def file_modified(self, file_name: Optional[str], output_folder: Optional[str] = None) -> None:
+        """Tells the index that a file was written to, so its modified time is looked up again when needed"""
+        with self._lock:
+            if output_folder is not None and file_name is not None and output_folder in self._folders:
+                self._folders[output_folder][1][file_name] = None
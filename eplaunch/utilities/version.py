@@ -2,6 +2,8 @@ import json
 import os
 from typing import Tuple
 
+from eplaunch.utilities.idf_tokenizer import find_idf_object
+
 # TODO: this built-in eplaunch/utilities/version module should be removed, workflows should manage this themselves
 
 
@@ -23,22 +25,9 @@ class Version:
         """Attempts to read a version number from an IDF syntax file"""
         # noinspection PyBroadException
         try:
-            with open(file_path, "r") as f:
-                cur_line = f.readline()
-                while cur_line:
-                    cur_line = cur_line.strip()
-                    if len(cur_line) > 0 and cur_line[0] != "!" and "VERSION" in cur_line.upper():
-                        cur_line = Version.line_with_no_comment(cur_line)
-                        if ";" in cur_line:  # one liner version object ("Version, 8.4;")
-                            poss_obj = cur_line
-                        else:  # hoping for a two-liner version object ("Version,\n  8.4;")
-                            next_line = Version.line_with_no_comment(f.readline().strip())
-                            poss_obj = cur_line + next_line
-                        hopeful_object = poss_obj[:-1] if poss_obj[-1] == ";" else poss_obj
-                        fields = hopeful_object.split(',')
-                        return True, fields[1], Version.numeric_version_from_string(fields[1])
-                    cur_line = f.readline()  # get the next line
-        except:  # noqa: E722
+            fields = find_idf_object(file_path, 'Version')
+            return True, fields[1], Version.numeric_version_from_string(fields[1])
+        except:  # noqa: E722  # no version object, a file-not-found, a badly encoded file, a bad version number....
             return False, '', 0
 
     @staticmethod
@@ -13,8 +13,19 @@ class EPLaunchWorkflowResponse1:
         self.extra_data = extra_data
 
 
+class WorkflowExecutionMode:
+    Thread = 'thread'  # main() runs on a thread inside the EnergyPlus-Launch process
+    Process = 'process'  # main() runs in a worker process, useful for CPU-bound pure-Python workflows
+
+
 class BaseEPLaunchWorkflow1:
 
+    #: Where main() is executed; derived workflows may set this to WorkflowExecutionMode.Process to run in a
+    #: separate worker process, in which case callback() messages and the returned response are relayed back to the
+    #: GUI automatically.  The workflow class must be importable from its file, and its main() must not rely on any
+    #: state set up on the instance by the GUI, since a fresh instance is created in the worker process.
+    execution_mode: str = WorkflowExecutionMode.Thread
+
     def __init__(self):
         self.my_id: Optional[str] = None  # will be a UUID string
         self._callback: Optional[Callable] = None  # callback instance to pass messages back up to the GUI
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+"""
+This file is a standalone, headless EnergyPlus-Launch batch runner.
+It runs one workflow over every matching file in a set of directories or group files, without the GUI,
+and stores results in each directory's cache file just like the GUI does.
+"""
+
+from argparse import ArgumentParser
+from glob import glob
+from pathlib import Path
+from queue import Queue
+from sys import exit
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from eplaunch.utilities.cache import CacheBackendType, CacheFile, set_cache_backend
+from eplaunch.utilities.cache_writer import CoalescingCacheWriter
+from eplaunch.utilities.exceptions import EPLaunchFileException
+from eplaunch.workflows.base import EPLaunchWorkflowResponse1
+from eplaunch.workflows.install_finder import InstallCache
+from eplaunch.workflows.manager import WorkflowManager
+from eplaunch.workflows.manifest import WorkflowManifest
+from eplaunch.workflows.scheduler import WorkflowScheduler
+from eplaunch.workflows.workflow import Workflow
+from eplaunch.workflows.workflow_process import shutdown_pool
+from eplaunch.workflows.workflow_thread import WorkflowThread
+
+GROUP_FILE_EXTENSION = '.epg3'
+DESIGN_DAY_ONLY_WEATHER = '<No_Weather_File>'  # what the GUI stores in the cache when a run has no weather file
+
+
+class BatchRunner:
+
+    def __init__(self, workflow: Workflow, max_concurrent: Optional[int] = None, weather: Optional[str] = None,
+                 verbose: bool = False, printer: Callable[[str], None] = print):
+        """
+        Constructor for the batch runner
+
+        :param workflow: The workflow to run on each file
+        :param max_concurrent: The maximum number of workflows to run at once, defaults to the core count
+        :param weather: A weather file to use for all files, otherwise the weather saved in the cache is used; it is
+                        made absolute, as the GUI and workflows may use it from another working directory
+        :param verbose: If True, messages that the workflow sends to its callback are printed as well
+        :param printer: Function used to emit progress lines, defaults to printing to stdout
+        """
+        self.workflow = workflow
+        self.scheduler = WorkflowScheduler(max_concurrent)
+        self.weather = str(Path(weather).resolve()) if weather else None
+        self.verbose = verbose
+        self.printer = printer
+
+    def find_files(self, targets: List[str]) -> List[Path]:
+        """
+        Expands the list of command line targets into a unique, ordered list of files to run.
+        Each target may be a group file (one file path per line), or a glob pattern matching directories and/or files.
+        Files found in matched directories are filtered with the workflow file types, hidden files are skipped.
+
+        :param targets: The list of targets to expand
+        :return: A list of file paths
+        """
+        found: Dict[Path, None] = {}  # a dict, as an ordered set
+        for target in targets:
+            if target.endswith(GROUP_FILE_EXTENSION) and Path(target).is_file():
+                candidates = [Path(e) for e in Path(target).read_text().splitlines() if e]
+            else:
+                candidates = []
+                for match in sorted(glob(target)):
+                    match_path = Path(match)
+                    if match_path.is_dir():
+                        candidates.extend(sorted(p for p in match_path.iterdir() if p.is_file()))
+                    else:
+                        candidates.append(match_path)
+            for candidate in candidates:
+                if candidate.name.startswith('.') or not candidate.is_file():
+                    continue
+                if self.workflow.matches_file_type(candidate.name):
+                    found[candidate.resolve()] = None
+        return list(found)
+
+    def _weather_for_file(self, file_path: Path, cache_writer: CoalescingCacheWriter) -> str:
+        if self.weather is not None:
+            # queued like the results, so each cache file is written once per batch, rather than once per file
+            cache_writer.add_config(
+                file_path.parent, self.workflow.name, file_path.name, {CacheFile.WeatherFileKey: self.weather}
+            )
+            return self.weather
+        cache = CacheFile(file_path.parent)
+        cached_file_info = cache.get_files_for_workflow(self.workflow.name).get(file_path.name, {})
+        weather = cached_file_info.get(CacheFile.ParametersKey, {}).get(CacheFile.WeatherFileKey, '')
+        return '' if weather == DESIGN_DAY_ONLY_WEATHER else weather
+
+    def run(self, file_paths: List[Path]) -> int:
+        """
+        Runs the workflow on each file, using a bounded pool of workflow threads, and waits for all of them to finish
+
+        :param file_paths: The list of files to run
+        :return: The number of files that failed
+        """
+        # config and results are buffered and written to each directory's cache file in batches, instead of once
+        # per file
+        failed_cache_directories: Dict[Path, None] = {}  # a dict, as an ordered set
+
+        def cache_write_failed(directory: Path, _exception: EPLaunchFileException) -> None:
+            failed_cache_directories[directory] = None
+
+        cache_writer = CoalescingCacheWriter(on_error=cache_write_failed)
+        done_queue: Queue = Queue()
+        runs: Dict[str, Path] = {}
+        for file_path in file_paths:
+            run_id = str(uuid4())
+            runs[run_id] = file_path
+            weather = self._weather_for_file(file_path, cache_writer) if self.workflow.uses_weather else ''
+            main_args = {'weather': weather, 'workflow location': self.workflow.workflow_directory}
+            workflow_instance = self.workflow.workflow_class()
+            workflow_instance.register_standard_output_callback(run_id, self._stdout_callback(file_path))
+            self.scheduler.submit(
+                WorkflowThread(
+                    run_id, workflow_instance, file_path.parent, file_path.name, main_args, done_queue.put,
+                    start_immediately=False, workflow_module_path=self.workflow.module_path
+                )
+            )
+        succeeded: List[Path] = []
+        for num_done in range(1, len(runs) + 1):
+            response: EPLaunchWorkflowResponse1 = done_queue.get()
+            file_path = runs[response.id]
+            if response.success:
+                succeeded.append(file_path)
+                cache_writer.add_result(file_path.parent, self.workflow.name, file_path.name, response.column_data)
+            status = '   OK' if response.success else 'ERROR'
+            self.printer(f"[{num_done}/{len(runs)}] {status}: {file_path}: {response.message}")
+        cache_writer.close()
+        for directory in failed_cache_directories:
+            self.printer(f"ERROR: Could not write results to cache file in {directory}")
+        # a file only counts as successful if its results made it into the cache file
+        num_stored = len([f for f in succeeded if f.parent not in failed_cache_directories])
+        return len(runs) - num_stored
+
+    def _stdout_callback(self, file_path: Path) -> Callable[[str, str], None]:
+        def callback(_workflow_id: str, message: str) -> None:
+            if self.verbose:
+                self.printer(f" INFO: {file_path.name}: {message}")
+        return callback
+
+
+def find_workflow(manager: WorkflowManager, workflow_name: str, context: Optional[str]) -> List[Workflow]:
+    if context is not None:
+        workflow = manager.workflow_by_name(context, workflow_name)
+        return [workflow] if workflow else []
+    return [w for w in manager.workflows if w.name == workflow_name]
+
+
+def cli(args: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(description='Run an EnergyPlus-Launch workflow over many files without the GUI')
+    parser.add_argument('targets', nargs='+', help='Directory or file glob patterns, or .epg3 group files')
+    parser.add_argument('-w', '--workflow', required=True, help='Name of the workflow to run')
+    parser.add_argument('-c', '--context', help='Context of the workflow, required if the name is ambiguous')
+    parser.add_argument('-d', '--workflow-dir', action='append', default=[], type=Path,
+                        help='Additional workflow directory to load workflows from, may be repeated')
+    parser.add_argument('--skip-ep-search', action='store_true',
+                        help='Do not search for workflows in EnergyPlus install locations')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Maximum number of workflows to run at once, defaults to the core count')
+    parser.add_argument('--weather', help='Weather file to use for every file, if the workflow uses weather')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print workflow output messages as well')
+    parser.add_argument('--cache-backend', default=CacheBackendType.Json,
+                        choices=[CacheBackendType.Json, CacheBackendType.Journal, CacheBackendType.Sqlite],
+                        help='Where to store results, should match the CacheBackend setting of the GUI')
+    parser.add_argument('--compact-cache', action='store_true',
+                        help='Write cache files without indentation, which is smaller and faster for large caches')
+    parser.add_argument('--workflow-manifest', type=Path, default=None,
+                        help='File that remembers the workflows found in each workflow file, defaults to '
+                             f'{WorkflowManifest.DefaultFileName} in the home directory')
+    parser.add_argument('--install-cache', type=Path, default=None,
+                        help='File that remembers the EnergyPlus installs found, defaults to '
+                             f'{InstallCache.DefaultFileName} in the home directory')
+    options = parser.parse_args(args)
+    set_cache_backend(options.cache_backend)
+    CacheFile.CompactEncoding = options.compact_cache
+
+    manager = WorkflowManager(WorkflowManifest(options.workflow_manifest), InstallCache(options.install_cache))
+    if options.skip_ep_search:
+        manager.workflow_directories = list(options.workflow_dir)
+    else:
+        manager.workflow_directories = manager.auto_found_workflow_dirs + list(options.workflow_dir)
+    manager.instantiate_all_workflows()
+    for warning in manager.warnings:
+        print(f" WARN: {warning}")
+    if options.verbose:
+        for workflow_file, seconds in sorted(manager.import_timings.items(), key=lambda t: t[1], reverse=True):
+            print(f" INFO: Imported workflow file {workflow_file} in {seconds:.3f} s")
+
+    matching_workflows = find_workflow(manager, options.workflow, options.context)
+    if len(matching_workflows) == 0:
+        print(f"ERROR: Could not find workflow named \"{options.workflow}\"")
+        return 2
+    elif len(matching_workflows) > 1:
+        contexts = ', '.join(w.context for w in matching_workflows)
+        print(f"ERROR: Workflow name \"{options.workflow}\" is ambiguous, specify one of these contexts: {contexts}")
+        return 2
+    workflow = matching_workflows[0]
+
+    try:  # import the workflow class up front, if it is only known from the manifest, to fail before running anything
+        _ = workflow.workflow_class
+    except EPLaunchFileException as e:
+        print(f"ERROR: {e.message}")
+        return 2
+
+    runner = BatchRunner(workflow, options.jobs, options.weather, options.verbose)
+    file_paths = runner.find_files(options.targets)
+    if len(file_paths) == 0:
+        print("ERROR: Did not find any files matching the workflow file types in the given targets")
+        return 2
+    print(f" INFO: Running {workflow} on {len(file_paths)} files, up to {runner.scheduler.max_concurrent} at a time")
+    num_failed = runner.run(file_paths)
+    shutdown_pool()  # every run is done, so this only stops the worker processes, if a workflow started any
+    print(f" INFO: Completed {len(file_paths) - num_failed} of {len(file_paths)} files successfully")
+    return 1 if num_failed > 0 else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    exit(cli())
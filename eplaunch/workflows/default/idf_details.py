@@ -3,7 +3,8 @@ from pathlib import Path
 from typing import Dict, List
 
 from eplaunch import NAME, VERSION
-from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+from eplaunch.utilities.idf_tokenizer import IDFObjectIndex
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1, WorkflowExecutionMode
 
 
 class ColumnNames:
@@ -15,6 +16,9 @@ class ColumnNames:
 
 class IDFDetailsWorkflow1(BaseEPLaunchWorkflow1):
 
+    # pure-Python parsing is CPU bound, so let batches of these spread across cores
+    execution_mode = WorkflowExecutionMode.Process
+
     def name(self) -> str:
         return "IDF Details"
 
@@ -41,18 +45,9 @@ class IDFDetailsWorkflow1(BaseEPLaunchWorkflow1):
     def main(self, run_directory: Path, file_name: str, args: Dict) -> EPLaunchWorkflowResponse1:  # pragma: no cover
         self.callback(f"In {type(self).__name__}, about to process file: {file_name}")
         file_path = os.path.join(run_directory, file_name)
-        content = open(file_path).read()
-        new_lines = []
         try:
-            for line in content.split('\n'):
-                if line.strip() == '':
-                    continue
-                if '!' not in line:
-                    new_lines.append(line.strip())
-                else:
-                    line_without_comment = line[0:line.index('!')].strip()
-                    if line_without_comment != '':
-                        new_lines.append(line_without_comment)
+            index = IDFObjectIndex(file_path)
+            version_fields = index.first_fields('Version')
         except Exception as e:
             self.callback("Could not process IDF; error: " + str(e))
             return EPLaunchWorkflowResponse1(
@@ -65,22 +60,10 @@ class IDFDetailsWorkflow1(BaseEPLaunchWorkflow1):
                     ColumnNames.NumZones: '*unknown*'
                 }
             )
-        one_long_line = ''.join(new_lines)
-        objects = one_long_line.split(';')
-        num_dds = 0
-        num_rps = 0
-        num_zones = 0
-        version_id = '*unknown*'
-        for obj in objects:
-            if obj.upper().startswith('SIZINGPERIOD:DESIGNDAY'):
-                num_dds += 1
-            elif obj.upper().startswith('RUNPERIOD'):
-                num_rps += 1
-            elif obj.upper().startswith('ZONE,'):
-                num_zones += 1
-            elif obj.upper().startswith('VERSION,'):
-                version_fields = obj.split(',')
-                version_id = version_fields[1]
+        num_dds = index.count_starting_with('SizingPeriod:DesignDay')
+        num_rps = index.count_starting_with('RunPeriod')
+        num_zones = index.count('Zone')
+        version_id = version_fields[1] if version_fields is not None and len(version_fields) > 1 else '*unknown*'
         self.callback(f"Completed {type(self).__name__}")
         return EPLaunchWorkflowResponse1(
             success=True,
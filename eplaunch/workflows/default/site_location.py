@@ -2,7 +2,8 @@ from pathlib import Path
 from typing import Dict, List
 
 from eplaunch import NAME, VERSION
-from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1
+from eplaunch.utilities.idf_tokenizer import find_idf_object
+from eplaunch.workflows.base import BaseEPLaunchWorkflow1, EPLaunchWorkflowResponse1, WorkflowExecutionMode
 
 
 class ColumnNames:
@@ -11,6 +12,9 @@ class ColumnNames:
 
 class SiteLocationWorkflow(BaseEPLaunchWorkflow1):
 
+    # pure-Python parsing is CPU bound, so let batches of these spread across cores
+    execution_mode = WorkflowExecutionMode.Process
+
     def name(self) -> str:
         return "Get Site:Location"
 
@@ -31,30 +35,14 @@ class SiteLocationWorkflow(BaseEPLaunchWorkflow1):
 
     def main(self, run_directory: Path, file_name: str, args: Dict) -> EPLaunchWorkflowResponse1:  # pragma: no cover
         self.callback(f"In {type(self).__name__}, about to process file: {file_name}")
-        content = (run_directory / file_name).read_text()
-        new_lines = []
-        for line in content.split('\n'):
-            if line.strip() == '':
-                continue
-            if '!' not in line:
-                new_lines.append(line.strip())
-            else:
-                line_without_comment = line[0:line.index('!')].strip()
-                if line_without_comment != '':
-                    new_lines.append(line_without_comment)
-        one_long_line = ''.join(new_lines)
-        objects = one_long_line.split(';')
-        for obj in objects:
-            if obj.upper().startswith('SITE:LOCATION'):
-                location_fields = obj.split(',')
-                location_name = location_fields[1]
-                break
-        else:
+        location_fields = find_idf_object(run_directory / file_name, 'Site:Location')
+        if location_fields is None or len(location_fields) < 2:
             return EPLaunchWorkflowResponse1(
                 success=False,
                 message='Could not parse location object!',
                 column_data={ColumnNames.Location: '*unknown*'}
             )
+        location_name = location_fields[1]
         self.callback(f"Completed {type(self).__name__}")
         return EPLaunchWorkflowResponse1(
             success=True,
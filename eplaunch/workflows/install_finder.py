@@ -0,0 +1,137 @@
+import os
+from fnmatch import fnmatch
+from json import dumps, loads
+from pathlib import Path
+from string import ascii_uppercase
+from threading import Thread
+from time import monotonic, time
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+from eplaunch.utilities.crossplatform import Platform
+
+
+def search_roots() -> List[Path]:
+    """Returns the folders that EnergyPlus is normally installed in, every drive on Windows"""
+    if Platform.get_current_platform() == Platform.WINDOWS:
+        from ctypes import windll
+        bitmask = windll.kernel32.GetLogicalDrives()
+        roots: List[Path] = []
+        for letter in ascii_uppercase:
+            if bitmask & 1:
+                roots.append(Path(f"{letter}:\\"))
+            bitmask >>= 1
+        return roots
+    elif Platform.get_current_platform() == Platform.LINUX:
+        return [Path('/usr/local/bin/'), Path('/tmp/'), Path('/opt')]
+    else:  # Assuming Platform.get_current_platform() == Platform.MAC:
+        return [Path('/Applications/'), Path('/tmp/')]
+
+
+def search_names() -> List[str]:
+    """Returns the patterns that the name of an EnergyPlus install folder matches"""
+    names = ["EnergyPlus*", "EP*", "ep*", "E+*", "e+*"]
+    if Platform.get_current_platform() == Platform.LINUX:
+        names.append("energyplus*")  # add lower case check on case-sensitive file systems (typically Linux)
+    return names
+
+
+def find_workflow_directories_in_root(search_root: Path, names: List[str]) -> List[Path]:
+    """
+    Finds the workflows folders of the EnergyPlus installs directly in one folder, listing the folder once
+
+    :param search_root: The folder to look in
+    :param names: The patterns the name of an install folder matches, see search_names
+    :return: The workflows folders found, in order of install folder name
+    """
+    found = []
+    try:
+        with os.scandir(search_root) as entries:
+            install_names = sorted(e.name for e in entries if any(fnmatch(e.name, n) for n in names))
+    except OSError:  # just skip it, it could be like an empty DVD drive
+        return found
+    for install_name in install_names:
+        ep_workflow_dir = search_root / install_name / 'workflows'
+        if ep_workflow_dir.is_dir():  # pragma: no cover, would have to install in system folders
+            found.append(ep_workflow_dir)
+    return found
+
+
+def find_workflow_directories(roots: List[Path], names: List[str], timeout_per_root: float) -> List[Path]:
+    """
+    Finds the workflows folders of the EnergyPlus installs in several folders at once, each on its own thread, so
+    that a folder that doesn't respond, such as a disconnected network drive, only delays the search by the timeout
+
+    :param roots: The folders to look in
+    :param names: The patterns the name of an install folder matches, see search_names
+    :param timeout_per_root: The seconds to wait for each folder, which is skipped if it takes longer
+    :return: The workflows folders found, in order of the roots
+    """
+    results: List[Optional[List[Path]]] = [None] * len(roots)
+
+    def search(index: int, search_root: Path) -> None:
+        results[index] = find_workflow_directories_in_root(search_root, names)
+
+    # daemon threads, so that a search stuck on an unresponsive drive never keeps the program from exiting
+    threads = [Thread(target=search, args=(i, r), name=f'InstallSearch({r})', daemon=True) for i, r in enumerate(roots)]
+    start_time = monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(max(0.0, start_time + timeout_per_root - monotonic()))
+    found = []
+    for root_results in results:
+        if root_results is not None:
+            found.extend(d for d in root_results if d not in found)
+    return found
+
+
+class InstallCache:
+    """
+    Remembers the EnergyPlus workflows folders found by the last search, so that a search, which may have to wait for
+    every drive of the machine, isn't needed at every startup.
+
+    The folders are checked to still exist when the cache is loaded, which only costs a stat call for each one, but
+    new installs are only found by another search, so the cache is considered fresh for ttl seconds, after which the
+    search should be run again, typically in the background.
+    """
+
+    DefaultFileName = '.EP-Launch.installs.json'
+
+    def __init__(self, cache_path: Optional[Path] = None, ttl: float = 24 * 60 * 60):
+        """
+        Constructor for the cache
+
+        :param cache_path: The cache file to use, defaults to a file in the user's home directory
+        :param ttl: The number of seconds the folders found by a search are considered fresh
+        """
+        self.cache_path = cache_path if cache_path else Path.home() / self.DefaultFileName
+        self.ttl = ttl
+
+    def load(self) -> Optional[Tuple[List[Path], bool]]:
+        """
+        Gets the workflows folders found by the last search that still exist
+
+        :return: None if there has not been a search, otherwise a tuple of the folders and whether they are still fresh
+        """
+        try:
+            contents = loads(self.cache_path.read_text())
+            searched_at = float(contents['searched_at'])
+            directories = [Path(d) for d in contents['workflow_directories']]
+        except (OSError, ValueError, KeyError, TypeError):  # missing, unreadable or not an install cache
+            return None
+        return [d for d in directories if d.is_dir()], 0 <= time() - searched_at < self.ttl
+
+    def save(self, directories: List[Path]) -> None:
+        """Remembers the workflows folders found by a search that just finished"""
+        contents = {'searched_at': time(), 'workflow_directories': [str(d) for d in directories]}
+        # unique, as several processes may search at once, and in the same directory, so the rename stays on one disk
+        temporary_path = self.cache_path.with_name(f"{self.cache_path.name}.{uuid4().hex}.tmp")
+        try:
+            temporary_path.write_text(dumps(contents))
+            os.replace(temporary_path, self.cache_path)
+        except OSError:  # the cache only saves time, so the next startup simply searches again
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
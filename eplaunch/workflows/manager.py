@@ -1,59 +1,220 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from string import ascii_uppercase
-from typing import Dict, List, Optional, Set, Tuple, Type
-from importlib import util as import_util
+from threading import Thread
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
 from inspect import getmembers, isclass
+from time import perf_counter
 
 from eplaunch.utilities.crossplatform import Platform
 from eplaunch.workflows.base import BaseEPLaunchWorkflow1
-from eplaunch.workflows.workflow import Workflow
-from eplaunch.workflows.workflow_thread import WorkflowThread
+from eplaunch.workflows.install_finder import InstallCache, find_workflow_directories, search_names, search_roots
+from eplaunch.workflows.manifest import WorkflowManifest, workflow_file_state
+from eplaunch.workflows.scheduler import WorkflowScheduler
+from eplaunch.workflows.workflow import Workflow, import_workflow_module
+from eplaunch.workflows.workflow_thread import WorkflowThread, WorkflowThreadStatus
 
 
 class WorkflowManager:
-    def __init__(self):
+    MaxImportThreads = 8  # the most workflow directories imported at once
+    InstallSearchTimeoutPerRoot = 5.0  # seconds to wait for each folder searched for EnergyPlus installs
+
+    def __init__(self, manifest: Optional[WorkflowManifest] = None, install_cache: Optional[InstallCache] = None):
+        """
+        Constructor for the workflow manager, which also looks for EnergyPlus workflow directories
+
+        :param manifest: The manifest of workflow files to use when instantiating workflows, defaults to the manifest
+                         in the user's home directory
+        :param install_cache: The cache of EnergyPlus workflow directories found by earlier searches, defaults to the
+                              cache in the user's home directory
+        """
+        self.manifest = manifest if manifest else WorkflowManifest()
+        self.install_cache = install_cache if install_cache else InstallCache()
         self.current_workflow: Optional[Workflow] = None
         self.threads: Dict[str, WorkflowThread] = dict()
+        self.scheduler = WorkflowScheduler()
         self.workflow_directories: List[Path] = []
         self.auto_found_workflow_dirs: List[Path] = []
         self.workflows: List[Workflow] = []
         self.workflow_contexts: Set[str] = set()
+        self._workflows_by_context: Dict[str, List[Workflow]] = {}
+        self._workflows_by_context_and_name: Dict[Tuple[str, str], Workflow] = {}
         self.warnings: List[str] = []
-        self.auto_find_workflow_directories()
+        self.import_timings: Dict[Path, float] = {}  # seconds to import each workflow file imported by the last pass
+        # workflow file -> (modified time and size, its workflows, its warnings) as of the last pass
+        self._loaded_files: Dict[Path, Tuple[Optional[Tuple[int, int]], List[Workflow], List[str]]] = {}
+        # use the workflow directories found by an earlier search if there was one, and only search now otherwise
+        cached = self.install_cache.load()
+        if cached is None:
+            self.auto_find_workflow_directories()
+            self._auto_found_are_fresh = True
+        else:
+            self.auto_found_workflow_dirs, self._auto_found_are_fresh = cached
         self.workflow_directories = self.auto_found_workflow_dirs
 
     def workflow_instances(self, workflow_context: str) -> List[Workflow]:
-        return [x for x in self.workflows if x.context == workflow_context]
+        return list(self._workflows_by_context.get(workflow_context, []))
+
+    def workflow_by_name(self, workflow_context: str, workflow_name: str) -> Optional[Workflow]:
+        """Gets the workflow with a name in a context, the first one in the workflow list if there are several"""
+        return self._workflows_by_context_and_name.get((workflow_context, workflow_name))
+
+    def _index_workflows(self) -> None:
+        """Rebuilds the lookups of the workflows by context and name, whenever the workflow list is replaced"""
+        self._workflows_by_context = {}
+        self._workflows_by_context_and_name = {}
+        for w in self.workflows:
+            self._workflows_by_context.setdefault(w.context, []).append(w)
+            self._workflows_by_context_and_name.setdefault((w.context, w.name), w)
+
+    def thread_status_counts(self) -> Dict[str, int]:
+        """Returns the number of known workflow threads in each status (queued, running, done)"""
+        counts = {WorkflowThreadStatus.Queued: 0, WorkflowThreadStatus.Running: 0, WorkflowThreadStatus.Done: 0}
+        for thread in list(self.threads.values()):
+            counts[thread.status] += 1
+        return counts
 
     def auto_find_workflow_directories(self) -> None:
-        """Locate the (EnergyPlus) workflow directories that are in predestined locations"""
-        self.auto_found_workflow_dirs = []
-        # then search for e+ workflows
-        if Platform.get_current_platform() == Platform.WINDOWS:
-            from ctypes import windll
-            bitmask = windll.kernel32.GetLogicalDrives()
-            roots: List[Path] = []
-            for letter in ascii_uppercase:
-                if bitmask & 1:
-                    roots.append(Path(f"{letter}:\\"))
-                bitmask >>= 1
-        elif Platform.get_current_platform() == Platform.LINUX:
-            roots = [Path('/usr/local/bin/'), Path('/tmp/'), Path('/opt')]
-        else:  # Assuming Platform.get_current_platform() == Platform.MAC:
-            roots = [Path('/Applications/'), Path('/tmp/')]
-        search_names = ["EnergyPlus*", "EP*", "ep*", "E+*", "e+*"]
-        if Platform.get_current_platform() == Platform.LINUX:
-            search_names.append("energyplus*")  # add lower case check on case-sensitive file systems (typically Linux)
-        for search_root in roots:
-            try:
-                for search_name in search_names:
-                    eplus_folder_matches = search_root.glob(search_name)
-                    for ep_folder in eplus_folder_matches:  # pragma: no cover, would have to install in system folders
-                        ep_workflow_dir = ep_folder / 'workflows'
-                        if ep_workflow_dir.exists():
-                            self.auto_found_workflow_dirs.append(ep_workflow_dir)
-            except PermissionError:  # pragma: no cover -- this could be quite hard to reproduce :)
-                continue  # just skip it, it could be like an empty DVD drive
+        """Locate the (EnergyPlus) workflow directories that are in predestined locations, and remember them"""
+        self.auto_found_workflow_dirs = find_workflow_directories(
+            search_roots(), search_names(), self.InstallSearchTimeoutPerRoot
+        )
+        self.install_cache.save(self.auto_found_workflow_dirs)
+
+    def auto_find_workflow_directories_in_background(self, on_found: Callable[[List[Path]], None]) -> bool:
+        """
+        Searches for (EnergyPlus) workflow directories on a background thread if the ones remembered from the last
+        search are not fresh anymore, remembering what it finds.  Pass what on_found gets to
+        merge_auto_found_workflow_directories, on the thread that uses this manager.
+
+        :param on_found: Called from the background thread with the workflow directories found, once the search is done
+        :return: True if a search was started
+        """
+        if self._auto_found_are_fresh:
+            return False
+
+        def search() -> None:
+            found = find_workflow_directories(search_roots(), search_names(), self.InstallSearchTimeoutPerRoot)
+            self.install_cache.save(found)
+            on_found(found)
+
+        self._auto_found_are_fresh = True  # so that only one search is started
+        Thread(target=search, name='InstallSearch', daemon=True).start()
+        return True
+
+    def merge_auto_found_workflow_directories(self, found: List[Path]) -> List[Path]:
+        """
+        Adds the workflow directories found by a search to the auto-found ones
+
+        :param found: The workflow directories found
+        :return: The directories that were not known before
+        """
+        new_directories = [d for d in found if d not in self.auto_found_workflow_dirs]
+        self.auto_found_workflow_dirs.extend(new_directories)
+        return new_directories
+
+    @staticmethod
+    def _energyplus_version_of_directory(workflow_directory: Path) -> Tuple[bool, Optional[str]]:
+        """Works out whether a workflow directory is in an EnergyPlus install, and if so, the version of it"""
+        sanitized_directory_upper_case = str(workflow_directory).upper().replace('-', '.').replace('\\', '/')
+        version_id = None
+        dir_is_eplus = False
+        # I tried regexes, and they worked using online Python regex testers, but using the same patterns
+        # and strings in here resulting in false responses...bogus.  So here I go, manually chopping up a string
+        # re_dots = re.compile('(?P<version>(\d.\d.\d))')
+        if Platform.get_current_platform() == Platform.WINDOWS:  # pragma: no cover, skipping platform specifics
+            energyplus_uc_search_string = 'ENERGYPLUSV'
+        else:  # pragma: no cover, skipping platform specifics
+            energyplus_uc_search_string = 'ENERGYPLUS.'
+        if energyplus_uc_search_string in sanitized_directory_upper_case:
+            dir_is_eplus = True
+            san = sanitized_directory_upper_case
+            trailing_string = san[san.index(energyplus_uc_search_string) + 11:]
+            if '/' in trailing_string:
+                version_id = trailing_string[:trailing_string.index('/')]
+        return dir_is_eplus, version_id
+
+    def _import_workflow_file(
+            self, module_file_path: Path, workflow_classes: Dict[str, Type[BaseEPLaunchWorkflow1]]
+    ) -> Tuple[List[Dict], List[str]]:
+        """
+        Imports a workflow file and instantiates each workflow class in it to find out what it does
+
+        :param module_file_path: The workflow file
+        :param workflow_classes: Gets each workflow class that was found, by class name
+        :return: A tuple of a list of dicts describing each workflow class, as stored in the manifest, and a list of
+                 warnings
+        """
+        found_workflows: List[Dict] = []
+        warnings: List[str] = []
+        try:
+            this_module = import_workflow_module(module_file_path)
+        except ImportError as ie:
+            # this error generally means they have a bad workflow class or something
+            warnings.append(f"Import error occurred on workflow file {str(module_file_path)}: {ie.msg}")
+            return found_workflows, warnings
+        except SyntaxError as se:
+            # syntax errors are, well, syntax errors in the Python code itself
+            warnings.append(f"Syntax error in workflow {str(module_file_path)}, line {se.lineno}: {se.msg}")
+            return found_workflows, warnings
+        except Exception as e:  # pragma: no cover
+            # there's always the potential of some other unforeseen thing going on when a workflow is executed
+            warnings.append(f"Unexpected error importing workflow: {str(module_file_path)}: {str(e)}")
+            return found_workflows, warnings
+
+        class_members: List[Tuple[str, Type[BaseEPLaunchWorkflow1]]] = getmembers(this_module, isclass)
+        for this_class in class_members:
+            this_class_name, this_class_type = this_class
+            # so right here, we could check issubclass, but this also matches the BaseEPLaunchWorkflow1, which
+            # is imported in each workflow class.  No need to do that.  For now, I'm going to check the direct
+            # parent class of this class to verify we only get direct descendants.  We can evaluate this later.
+            # if issubclass(this_class_type, BaseEPLaunchWorkflow1):
+            num_inheritance = len(this_class_type.__bases__)
+            base_class_name = this_class_type.__bases__[0].__name__
+            workflow_base_class_name = 'BaseEPLaunchWorkflow1'
+            if num_inheritance == 1 and workflow_base_class_name in base_class_name:
+                try:
+                    # we've got a good match, grab more data and get ready to load this into the Detail class
+                    workflow_instance: BaseEPLaunchWorkflow1 = this_class_type()
+                    found_workflows.append({
+                        'class_name': this_class_name,
+                        'name': workflow_instance.name(),
+                        'context': workflow_instance.context(),
+                        'file_types': workflow_instance.get_file_types(),
+                        'output_suffixes': workflow_instance.get_output_suffixes(),
+                        'columns': workflow_instance.get_interface_columns(),
+                        'uses_weather': workflow_instance.uses_weather(),
+                    })
+                    workflow_classes[this_class_name] = this_class_type
+                except NotImplementedError as nme:
+                    warnings.append(
+                        f"Import error for file \"{module_file_path}\"; class: \"{this_class_name}\"; error: "
+                        f"\"{str(nme)}\" "
+                    )
+                except Exception as e:
+                    # there's always the potential of some other thing going on when a workflow is executed
+                    warnings.append(
+                        f"Unexpected error in file \"{module_file_path}\"; class: \"{this_class_name}\"; error:"
+                        f" \"{str(e)}\" "
+                    )
+        return found_workflows, warnings
+
+    def _import_workflow_directory(
+            self, files: List[Path]
+    ) -> List[Tuple[Path, Tuple[List[Dict], List[str]], Dict[str, Type[BaseEPLaunchWorkflow1]], float]]:
+        """
+        Imports workflow files of one directory, one after the other, timing each one
+
+        :param files: The workflow files to import
+        :return: For each file, a tuple of the file, what was found in it (see _import_workflow_file), its workflow
+                 classes by class name, and the seconds it took to import it and instantiate its workflow classes
+        """
+        results = []
+        for this_file_path in files:
+            start_time = perf_counter()
+            workflow_classes: Dict[str, Type[BaseEPLaunchWorkflow1]] = {}
+            found = self._import_workflow_file(this_file_path, workflow_classes)
+            results.append((this_file_path, found, workflow_classes, perf_counter() - start_time))
+        return results
 
     def instantiate_all_workflows(self, disable_builtins=False, extra_workflow_dir: Optional[Path] = None,
                                   skip_ep_search: bool = False) -> None:
@@ -76,112 +237,86 @@ class WorkflowManager:
         self.workflows = []
         self.workflow_contexts.clear()
         self.warnings = []
-        for i, workflow_directory in enumerate(all_workflow_directories):
-            sanitized_directory_upper_case = str(workflow_directory).upper().replace('-', '.').replace('\\', '/')
-            version_id = None
-            dir_is_eplus = False
-            # I tried regexes, and they worked using online Python regex testers, but using the same patterns
-            # and strings in here resulting in false responses...bogus.  So here I go, manually chopping up a string
-            # re_dots = re.compile('(?P<version>(\d.\d.\d))')
-            if Platform.get_current_platform() == Platform.WINDOWS:  # pragma: no cover, skipping platform specifics
-                energyplus_uc_search_string = 'ENERGYPLUSV'
-            else:  # pragma: no cover, skipping platform specifics
-                energyplus_uc_search_string = 'ENERGYPLUS.'
-            if energyplus_uc_search_string in sanitized_directory_upper_case:
-                dir_is_eplus = True
-                san = sanitized_directory_upper_case
-                trailing_string = san[san.index(energyplus_uc_search_string) + 11:]
-                if '/' in trailing_string:
-                    version_id = trailing_string[:trailing_string.index('/')]
-
-            modules = []
-            for this_file_path in workflow_directory.glob('*.py'):
-                if this_file_path.name == '__init__.py':
-                    continue
-                module_spec = import_util.spec_from_file_location(('workflow_module_%s' % i), this_file_path)
-                this_module = import_util.module_from_spec(module_spec)
-                try:
-                    modules.append([this_file_path, this_module])
-                    module_spec.loader.exec_module(this_module)
-                except ImportError as ie:
-                    # this error generally means they have a bad workflow class or something
-                    self.warnings.append(f"Import error occurred on workflow file {str(this_file_path)}: {ie.msg}")
-                    continue
-                except SyntaxError as se:
-                    # syntax errors are, well, syntax errors in the Python code itself
-                    self.warnings.append(f"Syntax error in workflow {str(this_file_path)}, line {se.lineno}: {se.msg}")
-                    continue
-                except Exception as e:  # pragma: no cover
-                    # there's always the potential of some other unforeseen thing going on when a workflow is executed
-                    self.warnings.append(f"Unexpected error importing workflow: {str(this_file_path)}: {str(e)}")
+        # keep the workflows of files that didn't change since the last pass, and otherwise use what was found in
+        # each file last time according to the manifest, unless it changed, so the module isn't imported
+        previously_loaded, self._loaded_files = self._loaded_files, {}
+        files_by_directory: List[List[Path]] = []
+        file_states: Dict[Path, Optional[Tuple[int, int]]] = {}
+        found_by_file: Dict[Path, Tuple[List[Dict], List[str]]] = {}
+        to_import: List[List[Path]] = []  # the changed files of each directory that has any
+        for workflow_directory in all_workflow_directories:
+            files = [p for p in sorted(workflow_directory.glob('*.py')) if p.name != '__init__.py']
+            files_by_directory.append(files)
+            changed_files = []
+            for this_file_path in files:
+                state = workflow_file_state(this_file_path)
+                loaded = previously_loaded.get(this_file_path)
+                # files with warnings are imported again, as the cause may be gone, like a package that was missing
+                if loaded is not None and state is not None and loaded[0] == state and not loaded[2]:
+                    self._loaded_files[this_file_path] = loaded
                     continue
+                file_states[this_file_path] = state
+                found = self.manifest.lookup(this_file_path)
+                if found is None:
+                    changed_files.append(this_file_path)
+                else:
+                    found_by_file[this_file_path] = found
+            if changed_files:
+                to_import.append(changed_files)
+
+        # import the rest, the files of each directory on their own thread, as some pull in heavy dependencies
+        if len(to_import) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(to_import), self.MaxImportThreads)) as executor:
+                imported = list(executor.map(self._import_workflow_directory, to_import))
+        else:
+            imported = [self._import_workflow_directory(files) for files in to_import]
+        workflow_classes: Dict[Path, Dict[str, Type[BaseEPLaunchWorkflow1]]] = {}
+        self.import_timings = {}
+        for directory_results in imported:
+            for this_file_path, found, file_classes, seconds in directory_results:
+                self.manifest.record(this_file_path, *found)
+                found_by_file[this_file_path] = found
+                workflow_classes[this_file_path] = file_classes
+                self.import_timings[this_file_path] = seconds
 
-            for module_file_path, this_module in modules:
-                class_members: List[Tuple[str, Type[BaseEPLaunchWorkflow1]]] = getmembers(this_module, isclass)
-                for this_class in class_members:
-                    this_class_name, this_class_type = this_class
-                    # so right here, we could check issubclass, but this also matches the BaseEPLaunchWorkflow1, which
-                    # is imported in each workflow class.  No need to do that.  For now, I'm going to check the direct
-                    # parent class of this class to verify we only get direct descendants.  We can evaluate this later.
-                    # if issubclass(this_class_type, BaseEPLaunchWorkflow1):
-                    num_inheritance = len(this_class_type.__bases__)
-                    base_class_name = this_class_type.__bases__[0].__name__
-                    workflow_base_class_name = 'BaseEPLaunchWorkflow1'
-                    if num_inheritance == 1 and workflow_base_class_name in base_class_name:
-                        try:
-                            # we've got a good match, grab more data and get ready to load this into the Detail class
-                            workflow_instance: BaseEPLaunchWorkflow1 = this_class_type()
-                            workflow_name: str = workflow_instance.name()
-                            workflow_file_types = workflow_instance.get_file_types()
-                            workflow_output_suffixes = workflow_instance.get_output_suffixes()
-                            workflow_columns = workflow_instance.get_interface_columns()
-                            workflow_context = workflow_instance.context()
-                            workflow_weather = workflow_instance.uses_weather()
-
-                            file_type_string = "("
-                            first = True
-                            for file_type in workflow_file_types:
-                                if first:
-                                    first = False
-                                else:
-                                    file_type_string += ", "
-                                file_type_string += file_type
-                            file_type_string += ")"
-
-                            description = f"{workflow_name} {file_type_string}"
-                            self.workflow_contexts.add(workflow_context)
-
-                            self.workflows.append(
-                                Workflow(
-                                    this_class_type,
-                                    workflow_name,
-                                    workflow_context,
-                                    workflow_output_suffixes,
-                                    workflow_file_types,
-                                    workflow_columns,
-                                    workflow_directory,
-                                    description,
-                                    dir_is_eplus,
-                                    workflow_weather,
-                                    version_id
-                                )
-                            )
-                        except NotImplementedError as nme:
-                            self.warnings.append(
-                                f"Import error for file \"{module_file_path}\"; class: \"{this_class_name}\"; error: "
-                                f"\"{str(nme)}\" "
-                            )
-                        except Exception as e:
-                            # there's always the potential of some other thing going on when a workflow is executed
-                            self.warnings.append(
-                                f"Unexpected error in file \"{module_file_path}\"; class: \"{this_class_name}\"; error:"
-                                f" \"{str(e)}\" "
-                            )
-                            continue
+        # and merge everything in directory and file order, so the result doesn't depend on which import ended first
+        for workflow_directory, files in zip(all_workflow_directories, files_by_directory):
+            dir_is_eplus, version_id = self._energyplus_version_of_directory(workflow_directory)
+            for this_file_path in files:
+                loaded = self._loaded_files.get(this_file_path)
+                if loaded is None:
+                    found_workflows, file_warnings = found_by_file[this_file_path]
+                    file_classes = workflow_classes.get(this_file_path, {})
+                    file_workflows = [
+                        Workflow(
+                            file_classes.get(w['class_name']),
+                            w['name'],
+                            w['context'],
+                            w['output_suffixes'],
+                            w['file_types'],
+                            w['columns'],
+                            workflow_directory,
+                            f"{w['name']} ({', '.join(w['file_types'])})",
+                            dir_is_eplus,
+                            w['uses_weather'],
+                            version_id,
+                            this_file_path,
+                            class_name=w['class_name']
+                        ) for w in found_workflows
+                    ]
+                    loaded = (file_states[this_file_path], file_workflows, file_warnings)
+                    self._loaded_files[this_file_path] = loaded
+                _, file_workflows, file_warnings = loaded
+                self.warnings.extend(file_warnings)
+                self.workflows.extend(file_workflows)
+                self.workflow_contexts.update(w.context for w in file_workflows)
+        self.manifest.save()
 
         self.workflows.sort(key=lambda w: w.description)
+        self._index_workflows()
 
     def reset_workflow_array(self, filter_context=None) -> None:
         self.instantiate_all_workflows()
         if filter_context:
             self.workflows = [w for w in self.workflows if w.context == filter_context]
+            self._index_workflows()
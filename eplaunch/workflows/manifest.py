@@ -0,0 +1,109 @@
+import os
+from json import dumps, loads
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from eplaunch import VERSION
+
+
+def workflow_file_state(file_path: Path) -> Optional[Tuple[int, int]]:
+    """Returns the modified time and size of a workflow file, which change when it is edited, or None if it is gone"""
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+class WorkflowManifest:
+    """
+    Remembers what was found in each workflow file the last time it was imported, so that discovering workflows at
+    startup doesn't have to import (and run) every workflow module again.
+
+    Each entry is keyed by the path of the workflow file, and is only used while the file's modified time and size
+    still match, so an edited workflow file is imported again.  An entry holds, for each workflow class in the file,
+    the class name and everything the interface needs without an instance: name, context, file types, output
+    suffixes, columns and whether it uses weather.  Files with warnings, such as files that failed to import, have no
+    entry, so they are imported again every time: the cause may be outside the file, like a missing package that
+    gets installed later.  The whole manifest is dropped when the EnergyPlus-Launch version changes, as the base
+    workflow class may have changed with it.
+    """
+
+    DefaultFileName = '.EP-Launch.workflows.json'
+    FormatVersion = 1
+
+    def __init__(self, manifest_path: Optional[Path] = None):
+        """
+        Constructor for the manifest, which reads the manifest file if there is one
+
+        :param manifest_path: The manifest file to use, defaults to a file in the user's home directory
+        """
+        self.manifest_path = manifest_path if manifest_path else Path.home() / self.DefaultFileName
+        self._entries: Dict[str, Dict] = {}
+        self._seen: Dict[str, None] = {}  # files looked up or recorded since the manifest was read
+        self._changed = False
+        try:
+            contents = loads(self.manifest_path.read_text())
+            if contents.get('format') == self.FormatVersion and contents.get('eplaunch_version') == VERSION:
+                self._entries = contents['files']
+        except (OSError, ValueError, KeyError, AttributeError):  # missing, unreadable or not a manifest
+            pass
+
+    def lookup(self, file_path: Path) -> Optional[Tuple[List[Dict], List[str]]]:
+        """
+        Gets what was found in a workflow file, if it hasn't changed since it was recorded
+
+        :param file_path: The workflow file
+        :return: None if the file has to be imported, otherwise a tuple of the list of workflow dicts (see record) and
+                 the list of warnings from importing it
+        """
+        key = str(file_path)
+        self._seen[key] = None
+        entry = self._entries.get(key)
+        if entry is None or entry['warnings'] or workflow_file_state(file_path) != (entry['mtime_ns'], entry['size']):
+            return None
+        return entry['workflows'], entry['warnings']
+
+    def record(self, file_path: Path, workflows: List[Dict], warnings: List[str]) -> None:
+        """
+        Records what was found when importing a workflow file, unless there were warnings, in which case any earlier
+        entry for the file is dropped, so it is imported again next time
+
+        :param file_path: The workflow file
+        :param workflows: A dict for each workflow class in the file, with the keys class_name, name, context,
+                          file_types, output_suffixes, columns and uses_weather
+        :param warnings: The warnings from importing the file and instantiating its workflow classes
+        """
+        key = str(file_path)
+        self._seen[key] = None
+        state = workflow_file_state(file_path)
+        if state is None or warnings:
+            if self._entries.pop(key, None) is not None:
+                self._changed = True
+            return
+        self._entries[key] = {'mtime_ns': state[0], 'size': state[1], 'workflows': workflows, 'warnings': warnings}
+        self._changed = True
+
+    def save(self) -> None:
+        """
+        Writes the manifest file if anything was recorded, dropping entries of workflow files that don't exist anymore
+        """
+        for key in [k for k in self._entries if k not in self._seen and not os.path.exists(k)]:
+            del self._entries[key]
+            self._changed = True
+        if not self._changed:
+            return
+        contents = {'format': self.FormatVersion, 'eplaunch_version': VERSION, 'files': self._entries}
+        # unique, as several batch runner processes may share a home directory, and in the same directory, so the
+        # final rename stays on one file system
+        temporary_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{uuid4().hex}.tmp")
+        try:
+            temporary_path.write_text(dumps(contents))
+            os.replace(temporary_path, self.manifest_path)
+            self._changed = False
+        except OSError:  # the manifest only saves time, so workflows are simply imported again next time
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
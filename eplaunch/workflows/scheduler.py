@@ -0,0 +1,90 @@
+from collections import deque
+from os import cpu_count
+from threading import Lock
+from typing import Deque, List, Optional
+
+from eplaunch.workflows.workflow_thread import WorkflowThread, WorkflowThreadStatus
+
+
+def default_concurrency() -> int:
+    """Returns the default number of workflows allowed to run at once, which is the number of available cores"""
+    return cpu_count() or 1
+
+
+class WorkflowScheduler:
+    """
+    Runs workflow threads with a bounded number of concurrent workers.
+
+    Threads are submitted un-started; if there is a free slot they start right away, otherwise they wait in a FIFO
+    queue and are started as running threads finish.  Each thread carries its own status (queued/running/done),
+    so the workflow manager can report on all known threads without asking the scheduler.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        """
+        Constructor for the scheduler
+
+        :param max_concurrent: The maximum number of workflow threads to run at once, defaults to the core count
+        """
+        self.max_concurrent: int = max_concurrent if max_concurrent else default_concurrency()
+        self._pending: Deque[WorkflowThread] = deque()
+        self._running: List[WorkflowThread] = []
+        self._lock = Lock()
+
+    def submit(self, thread: WorkflowThread) -> None:
+        """
+        Adds a new, not yet started, workflow thread to the end of the queue, starting it if a slot is available
+
+        :param thread: A workflow thread instance created with start_immediately=False
+        :return: None
+        """
+        thread.status = WorkflowThreadStatus.Queued
+        thread.on_finished = self._thread_finished
+        with self._lock:
+            self._pending.append(thread)
+        self._start_pending()
+
+    def set_max_concurrent(self, max_concurrent: Optional[int]) -> None:
+        """
+        Updates the concurrency limit; a falsy value resets it to the core count.  If the limit was raised, queued
+        threads are started immediately to fill the new slots.
+
+        :param max_concurrent: The new maximum number of workflow threads to run at once
+        :return: None
+        """
+        self.max_concurrent = max_concurrent if max_concurrent else default_concurrency()
+        self._start_pending()
+
+    def cancel_pending(self) -> List[WorkflowThread]:
+        """
+        Removes all queued threads so that they will never be started, for example when the program is closing
+
+        :return: The list of threads that were removed from the queue
+        """
+        with self._lock:
+            cancelled = list(self._pending)
+            self._pending.clear()
+        return cancelled
+
+    def num_pending(self) -> int:
+        return len(self._pending)
+
+    def num_running(self) -> int:
+        return len(self._running)
+
+    def _thread_finished(self, thread: WorkflowThread) -> None:
+        with self._lock:
+            if thread in self._running:
+                self._running.remove(thread)
+        self._start_pending()
+
+    def _start_pending(self) -> None:
+        to_start: List[WorkflowThread] = []
+        with self._lock:
+            while self._pending and len(self._running) < self.max_concurrent:
+                thread = self._pending.popleft()
+                thread.status = WorkflowThreadStatus.Running
+                self._running.append(thread)
+                to_start.append(thread)
+        for thread in to_start:
+            thread.start()
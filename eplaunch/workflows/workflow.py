@@ -1,12 +1,42 @@
+from importlib import util as import_util
+from itertools import count
 from pathlib import Path
-from typing import List, Type
+from threading import Lock
+from types import ModuleType
+from typing import Callable, List, Optional, Type
 
+from eplaunch.utilities.directory_listing import file_type_matcher
+from eplaunch.utilities.exceptions import EPLaunchFileException
 from eplaunch.workflows.base import BaseEPLaunchWorkflow1
 
 
+_module_numbers = count()
+
+
+def import_workflow_module(module_file_path: Path) -> ModuleType:
+    """
+    Imports a workflow file as a new module, letting any error in the file propagate.  Each import gets a module name
+    of its own, so that workflow files with the same name, or a workflow file imported again after it was edited,
+    never share a module.
+    """
+    module_name = f"workflow_module_{next(_module_numbers)}_{module_file_path.stem}"
+    module_spec = import_util.spec_from_file_location(module_name, module_file_path)
+    this_module = import_util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(this_module)
+    return this_module
+
+
 class Workflow:
+    """
+    A workflow found in a workflow directory.  The workflow class may be given directly, or be left to be imported
+    from module_path by class_name the first time workflow_class is used, so that workflows known from the manifest
+    are only imported if they are actually run.
+    """
+
+    _class_lock = Lock()  # so that a workflow file is imported once even if two threads run the workflow at once
+
     def __init__(self,
-                 workflow_class: Type[BaseEPLaunchWorkflow1],
+                 workflow_class: Optional[Type[BaseEPLaunchWorkflow1]],
                  name: str,
                  context: str,
                  output_suffixes: List[str],
@@ -16,8 +46,13 @@ class Workflow:
                  description: str,
                  is_energyplus: bool,
                  uses_weather: bool,
-                 version_id: str):
-        self.workflow_class = workflow_class
+                 version_id: str,
+                 module_path: Optional[Path] = None,
+                 class_name: Optional[str] = None):
+        self._workflow_class = workflow_class
+        if class_name is None and workflow_class is not None:
+            class_name = workflow_class.__name__
+        self.class_name = class_name
         self.name = name
         self.context = context
         self.output_suffixes = output_suffixes
@@ -28,6 +63,38 @@ class Workflow:
         self.is_energyplus = is_energyplus
         self.uses_weather = uses_weather
         self.version_id = version_id
+        self.module_path = module_path  # the workflow file this class was loaded from
+        self._file_type_matcher: Optional[Callable[[str], bool]] = None
+
+    @property
+    def class_is_loaded(self) -> bool:
+        """Returns True if the workflow class is imported, so that using workflow_class costs nothing"""
+        return self._workflow_class is not None
+
+    @property
+    def workflow_class(self) -> Type[BaseEPLaunchWorkflow1]:
+        """
+        The workflow class, to instantiate for each run, imported from module_path the first time it is needed
+
+        :raises EPLaunchFileException: If the workflow file can't be imported or doesn't have the class anymore
+        """
+        if self._workflow_class is None:
+            with self._class_lock:
+                if self._workflow_class is None:
+                    try:
+                        this_module = import_workflow_module(self.module_path)
+                        self._workflow_class = getattr(this_module, self.class_name)
+                    except Exception as e:
+                        raise EPLaunchFileException(
+                            self.module_path, f"Could not load workflow class {self.class_name}: {str(e)}"
+                        )
+        return self._workflow_class
+
+    def matches_file_type(self, file_name: str) -> bool:
+        """Returns True if a file name matches any of the file types of the workflow, like fnmatch with each one"""
+        if self._file_type_matcher is None:  # compiled once per workflow, as the file types don't change
+            self._file_type_matcher = file_type_matcher(self.file_types)
+        return self._file_type_matcher(file_name)
 
     def __str__(self) -> str:
         return f"Workflow {self.context}:{self.name}"
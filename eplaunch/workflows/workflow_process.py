@@ -0,0 +1,116 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib import util as import_util
+from multiprocessing import get_context
+from os import cpu_count, getpid, kill
+from pathlib import Path
+from queue import Queue
+from signal import SIGTERM
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+
+class WorkflowProcessMessage:
+    Started = 'started'  # the process ID of the worker that started running main(), always the first message
+    Stdout = 'stdout'  # a message the workflow sent through callback()
+    Response = 'response'  # the EPLaunchWorkflowResponse1 returned from main(), always the last message
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_queue_manager = None
+_pool_lock = Lock()
+_future_pools: 'WeakKeyDictionary[Future, ProcessPoolExecutor]' = WeakKeyDictionary()  # the pool that runs each call
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily creates the shared worker process pool, so nothing is spawned unless a workflow asks for it"""
+    global _pool, _queue_manager
+    with _pool_lock:
+        if _pool is None:
+            # the workers are spawned rather than forked, as forking a process with the GUI, watcher, scanning and
+            # cache writing threads running can leave a lock held by one of them locked forever in the worker
+            context = get_context('spawn')
+            _pool = ProcessPoolExecutor(max_workers=cpu_count() or 1, mp_context=context)
+            if _queue_manager is None:
+                _queue_manager = context.Manager()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Shuts down the worker process pool and the queue manager, if they were ever started, without waiting for calls
+    that are still running; those should be terminated first (see terminate_workflow_main), as the interpreter
+    waits for the pool workers to finish before it exits.
+    """
+    global _pool, _queue_manager
+    with _pool_lock:
+        pool, queue_manager = _pool, _queue_manager
+        _pool = _queue_manager = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if queue_manager is not None:
+        queue_manager.shutdown()
+
+
+def submit_workflow_main(module_path: Path, class_name: str, workflow_id: str,
+                         run_directory: Path, file_name: str, main_args: Dict) -> Tuple[Future, Queue]:
+    """
+    Submits a workflow main() call to the shared process pool.
+
+    :param module_path: The workflow file the class was loaded from, it is re-imported inside the worker process
+    :param class_name: The name of the workflow class inside that file
+    :param workflow_id: The unique workflow run ID, passed to the callback registered in the worker
+    :param run_directory: The run directory argument to main()
+    :param file_name: The file name argument to main()
+    :param main_args: The arguments dictionary to main()
+    :return: A tuple of the future for the worker call, and the queue that the worker posts
+             (WorkflowProcessMessage, payload) tuples onto
+    """
+    pool = _get_pool()
+    message_queue = _queue_manager.Queue()
+    future = pool.submit(
+        _run_workflow_main, str(module_path), class_name, workflow_id, run_directory, file_name, main_args,
+        message_queue
+    )
+    with _pool_lock:
+        _future_pools[future] = pool
+    return future, message_queue
+
+
+def terminate_workflow_main(future: Future, worker_process_id: int) -> None:
+    """
+    Stops a running workflow main() call by terminating the worker process running it.  A pool with a terminated
+    worker can't run anything anymore, so that pool is retired, and the next call starts a new one; other calls that
+    were running in the retired pool fail with BrokenProcessPool, and can simply be submitted again.
+
+    :param future: The future of the call, as returned by submit_workflow_main
+    :param worker_process_id: The process ID that the worker sent in its WorkflowProcessMessage.Started message
+    """
+    global _pool
+    with _pool_lock:
+        pool = _future_pools.get(future)
+        if pool is not None and pool is _pool:
+            _pool = None
+    try:
+        kill(worker_process_id, SIGTERM)  # TerminateProcess on Windows
+    except OSError:  # it already finished
+        pass
+    if pool is not None:  # the calls waiting in it fail with BrokenProcessPool as well, rather than being cancelled
+        pool.shutdown(wait=False)
+
+
+def _run_workflow_main(module_path: str, class_name: str, workflow_id: str,
+                       run_directory: Path, file_name: str, main_args: Dict, message_queue) -> None:
+    """This is what actually executes inside the worker process"""
+    message_queue.put((WorkflowProcessMessage.Started, getpid()))
+    module_spec = import_util.spec_from_file_location('workflow_process_module', module_path)
+    this_module = import_util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(this_module)
+    workflow_instance = getattr(this_module, class_name)()
+
+    def relay_stdout(_workflow_id: str, message: str) -> None:
+        message_queue.put((WorkflowProcessMessage.Stdout, message))
+
+    workflow_instance.register_standard_output_callback(workflow_id, relay_stdout)
+    response = workflow_instance.main(run_directory, file_name, main_args)
+    message_queue.put((WorkflowProcessMessage.Response, response))
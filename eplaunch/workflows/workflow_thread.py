@@ -1,15 +1,25 @@
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from queue import Empty
 from threading import Thread
-from typing import Dict, Callable
+from typing import Dict, Callable, Optional
 
-from eplaunch.workflows.base import EPLaunchWorkflowResponse1
+from eplaunch.workflows.base import EPLaunchWorkflowResponse1, WorkflowExecutionMode
+from eplaunch.workflows.workflow_process import WorkflowProcessMessage, submit_workflow_main, terminate_workflow_main
+
+
+class WorkflowThreadStatus:
+    Queued = 'queued'
+    Running = 'running'
+    Done = 'done'
 
 
 class WorkflowThread(Thread):
     """Worker Thread Class."""
 
     def __init__(self, identifier: str, workflow_instance,
-                 run_directory: Path, file_name: str, main_args: Dict, done_callback: Callable):
+                 run_directory: Path, file_name: str, main_args: Dict, done_callback: Callable,
+                 start_immediately: bool = True, workflow_module_path: Optional[Path] = None):
         super().__init__()
         self._want_abort = 0
         self.id = identifier
@@ -19,12 +29,31 @@ class WorkflowThread(Thread):
         self.file_name = file_name
         self.workflow_main_args = main_args
         self.workflow_done_callback = done_callback
-        self.start()
+        self.workflow_module_path = workflow_module_path  # required to run main() in a worker process
+        self.status = WorkflowThreadStatus.Queued
+        # assigned by the workflow scheduler so it can hand this thread's slot to the next queued thread
+        self.on_finished: Optional[Callable[['WorkflowThread'], None]] = None
+        if start_immediately:
+            self.start()
 
     def run(self):
         """Run Workflow Thread."""
+        self.status = WorkflowThreadStatus.Running
         try:
-            workflow_response = self.workflow_instance.main(self.run_directory, self.file_name, self.workflow_main_args)
+            self._run_workflow()
+        finally:
+            self.status = WorkflowThreadStatus.Done
+            if self.on_finished:
+                self.on_finished(self)
+
+    def _run_workflow(self):
+        try:
+            if self._runs_in_process():
+                workflow_response = self._run_main_in_process()
+            else:
+                workflow_response = self.workflow_instance.main(
+                    self.run_directory, self.file_name, self.workflow_main_args
+                )
             if type(workflow_response) is not EPLaunchWorkflowResponse1:
                 workflow_response = EPLaunchWorkflowResponse1(
                     success=False,
@@ -45,7 +74,54 @@ class WorkflowThread(Thread):
             pass
             # print("Could not post finished event to the GUI, did the GUI get force closed?")
 
+    def _runs_in_process(self) -> bool:
+        execution_mode = getattr(self.workflow_instance, 'execution_mode', WorkflowExecutionMode.Thread)
+        return execution_mode == WorkflowExecutionMode.Process and self.workflow_module_path is not None
+
+    def _run_main_in_process(self) -> Optional[EPLaunchWorkflowResponse1]:
+        """Runs main() in the worker process pool, relaying callback messages until the response comes back"""
+        try:
+            return self._run_main_in_worker()
+        except BrokenProcessPool:
+            if self._want_abort:
+                raise
+            # another run was aborted by terminating its worker, which broke the pool this one ran in, so run it
+            # again in a new pool
+            return self._run_main_in_worker()
+
+    def _run_main_in_worker(self) -> Optional[EPLaunchWorkflowResponse1]:
+        future, message_queue = submit_workflow_main(
+            self.workflow_module_path, type(self.workflow_instance).__name__, self.id,
+            self.run_directory, self.file_name, self.workflow_main_args
+        )
+        worker_process_id = None
+        while True:
+            if self._want_abort and (future.cancel() or worker_process_id is not None or future.done()):
+                if worker_process_id is not None and not future.done():
+                    terminate_workflow_main(future, worker_process_id)
+                return EPLaunchWorkflowResponse1(
+                    success=False, message='Workflow aborted while running in a worker process', column_data=None
+                )
+            try:
+                message_type, payload = message_queue.get(timeout=0.1)
+            except Empty:
+                if future.done() and message_queue.empty():
+                    if future.cancelled():  # the pool was shut down before the call started
+                        return EPLaunchWorkflowResponse1(
+                            success=False, message='Worker process pool was shut down', column_data=None
+                        )
+                    future.result()  # re-raises anything that went wrong in the worker
+                    return None  # the worker finished without ever sending a response
+                continue
+            if message_type == WorkflowProcessMessage.Started:
+                worker_process_id = payload
+            elif message_type == WorkflowProcessMessage.Stdout:
+                self.workflow_instance.callback(payload)
+            elif message_type == WorkflowProcessMessage.Response:
+                return payload
+
     def abort(self):
         """abort worker thread."""
         # Method for use by main thread to signal an abort
+        self._want_abort = 1
         self.workflow_instance.abort()
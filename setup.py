@@ -31,7 +31,8 @@ setup(
         ],
         'console_scripts': [
             'energyplus_launch_configure=eplaunch.configure:configure_cli',
-            'energyplus_launch_workflow_tester=eplaunch.workflows.workflow_tester:cli'
+            'energyplus_launch_workflow_tester=eplaunch.workflows.workflow_tester:cli',
+            'energyplus_launch_batch_runner=eplaunch.workflows.batch_runner:cli'
         ]
     },
     classifiers=[